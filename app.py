@@ -1,21 +1,47 @@
 import os
-from flask import Flask, jsonify, request, redirect, url_for, session, flash, get_flashed_messages
+from flask import Flask, Response, g, get_flashed_messages, jsonify, request, redirect, url_for, session, flash, make_response, render_template, stream_template, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event, bindparam, create_engine
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
+import re
 import json
+import csv
+import io
+import base64
+import mimetypes
+import hashlib
+import itertools
+import math
 import random
-from functools import wraps
+from abc import ABC, abstractmethod
+from functools import wraps, lru_cache
+from collections import OrderedDict, namedtuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
+import click
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from google_auth_oauthlib.flow import Flow
 import smtplib
 from email.mime.text import MIMEText
 from dotenv import load_dotenv
-from werkzeug.utils import secure_filename
+from werkzeug.utils import safe_join, send_file as werkzeug_send_file
+from urllib.parse import quote
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup, escape
 import time
 
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow opsional: tanpa Pillow hanya file asli yang disimpan & disajikan
+    Image = ImageOps = None
+
 # Load environment variables
 load_dotenv()
 
@@ -26,6 +52,26 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
 app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'static/uploads')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+# Cara file upload dikirim: 'flask' (send_file), 'x-accel' (nginx) atau 'x-sendfile' (Apache/lighttpd)
+app.config['UPLOAD_SERVE_MODE'] = os.getenv('UPLOAD_SERVE_MODE', 'flask')
+app.config['UPLOAD_ACCEL_PREFIX'] = os.getenv('UPLOAD_ACCEL_PREFIX', '/_uploads/')
+app.config['TEMPLATE_CACHE_FOLDER'] = os.path.join(app.instance_path, 'jinja_cache')
+# Penyimpanan keranjang: 'table' (CartItem di database utama) atau 'sqlite' (file terpisah, WAL)
+app.config['CART_STORE'] = os.getenv('CART_STORE', 'table')
+app.config['CART_STORE_PATH'] = os.getenv('CART_STORE_PATH', os.path.join(app.instance_path, 'carts.db'))
+# Counter nomor order/jurnal (file SQLite terpisah) dan jumlah nomor yang diambil tiap worker sekaligus
+app.config['ID_SEQUENCE_PATH'] = os.getenv('ID_SEQUENCE_PATH', os.path.join(app.instance_path, 'sequences.db'))
+app.config['ID_SEQUENCE_BLOCK'] = int(os.getenv('ID_SEQUENCE_BLOCK', '20'))
+
+# Template Jinja dikompilasi sekali lalu bytecode-nya disimpan di disk, jadi worker
+# baru / restart tidak perlu mem-parse ulang template
+os.makedirs(app.config['TEMPLATE_CACHE_FOLDER'], exist_ok=True)
+app.jinja_options = {
+    **app.jinja_options,
+    'bytecode_cache': FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_FOLDER']),
+    'trim_blocks': True,
+    'lstrip_blocks': True,
+}
 
 # Ensure upload folders exist
 os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'products'), exist_ok=True)
@@ -46,20 +92,70 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def save_product_image(file, product_name=None):
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Blob yang lebih muda dari ini tidak disapu GC: bisa jadi milik upload yang belum di-commit
+UPLOAD_GC_GRACE_SECONDS = 60 * 60
+# Format hasil deteksi Pillow -> ekstensi blob
+IMAGE_FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+def detect_image_extension(path):
+    """Ekstensi dari format gambar yang sebenarnya, atau None jika tidak dikenali"""
+    if Image is None:
+        return None
+    try:
+        # Image.open hanya membaca header file
+        with Image.open(path) as image:
+            return IMAGE_FORMAT_EXTENSIONS.get(image.format)
+    except Exception:
+        return None
+
+def store_upload_blob(file, folder):
+    """Simpan upload dengan nama dari hash SHA-256 isinya (content-addressed).
+
+    File dibaca & di-hash per chunk sambil ditulis ke file sementara. Jika isi yang
+    sama sudah ada, file lama dipakai bersama dan file sementara dibuang. Ekstensi
+    diambil dari format gambar yang terdeteksi, jadi isi yang sama selalu mendapat
+    nama yang sama apa pun nama file dari client; ekstensi nama file hanya dipakai
+    jika format tidak bisa dideteksi (mis. tanpa Pillow).
+    Mengembalikan (nama_file, path, baru_ditulis).
+    """
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        
+        ext = detect_image_extension(tmp_path)
+        if ext is None:
+            ext = file.filename.rsplit('.', 1)[1].lower()
+            if ext == 'jpeg':
+                ext = 'jpg'
+        filename = f'{digest.hexdigest()}.{ext}'
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            # Perbarui mtime supaya blob yang dirujuk ulang tidak ikut tersapu GC
+            os.utime(path)
+            return filename, path, False
+        
+        os.replace(tmp_path, path)
+        return filename, path, True
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def save_product_image(file):
     """Save product image and return filename"""
     if file and allowed_file(file.filename):
-        if product_name:
-            safe_name = secure_filename(product_name)
-            safe_name = safe_name.replace(' ', '_').lower()
-            filename = f"{safe_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file.filename.rsplit('.', 1)[1].lower()}"
-        else:
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-            filename = timestamp + filename
-        
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'products', filename)
-        file.save(filepath)
+        folder = os.path.join(app.config['UPLOAD_FOLDER'], 'products')
+        filename, filepath, is_new = store_upload_blob(file, folder)
+        if is_new:
+            # Resize & konversi format dikerjakan worker; kartu memakai foto asli sampai selesai
+            enqueue_image_job(filename)
         return f'uploads/products/{filename}'
     return None
 
@@ -72,6 +168,172 @@ def save_logo(file):
         return f'uploads/logos/{filename}'
     return None
 
+# ===== TURUNAN GAMBAR PRODUK =====
+# Setiap foto produk dibuat ulang dalam ukuran tetap (crop tengah) sebagai WebP dan JPEG,
+# supaya kartu produk tidak perlu mengunduh foto asli beresolusi penuh.
+IMAGE_VARIANTS = {
+    'thumb': (160, 120),
+    'card': (480, 360),
+    'detail': (1200, 900),
+}
+IMAGE_VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+PRODUCT_IMAGE_PREFIX = '/static/uploads/products/'
+
+# Nilai atribut `sizes` per tampilan
+CARD_IMAGE_SIZES = '(max-width: 768px) 100vw, 400px'
+THUMB_IMAGE_SIZES = '80px'
+
+def _image_variant_name(original_name, variant, fmt):
+    base = original_name.replace('.', '_')
+    return f'{base}-{variant}.{fmt}'
+
+def _derived_image_folder():
+    return os.path.join(app.config['UPLOAD_FOLDER'], 'products', 'derived')
+
+def generate_image_variants(image_path):
+    """Buat varian thumb/card/detail (WebP + JPEG) dari foto asli.
+
+    Mengembalikan False jika Pillow tidak terpasang atau file tidak bisa dibaca;
+    halaman lalu tetap memakai foto asli.
+    """
+    if Image is None:
+        return False
+    
+    folder = _derived_image_folder()
+    os.makedirs(folder, exist_ok=True)
+    original_name = os.path.basename(image_path)
+    try:
+        with Image.open(image_path) as original:
+            original = ImageOps.exif_transpose(original).convert('RGB')
+            for variant, (width, height) in IMAGE_VARIANTS.items():
+                # Foto kecil tidak diperbesar; kotaknya diperkecil dengan rasio yang sama
+                scale = min(1.0, original.width / width, original.height / height)
+                size = (max(1, round(width * scale)), max(1, round(height * scale)))
+                resized = ImageOps.fit(original, size, Image.LANCZOS)
+                for fmt, (pil_format, options) in IMAGE_VARIANT_FORMATS.items():
+                    path = os.path.join(folder, _image_variant_name(original_name, variant, fmt))
+                    tmp_path = f'{path}.tmp'
+                    resized.save(tmp_path, pil_format, **options)
+                    os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error generating image variants for {image_path}: {e}")
+        return False
+    return True
+
+def generate_missing_image_variants():
+    """Lengkapi varian untuk foto produk yang sudah ada (mis. data awal)"""
+    folder = os.path.join(app.config['UPLOAD_FOLDER'], 'products')
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if os.path.isfile(path) and allowed_file(name) and product_image_variants(PRODUCT_IMAGE_PREFIX + name) is None:
+            generate_image_variants(path)
+    _image_variant_cache.clear()
+
+# image_url -> srcset; hanya hasil positif yang disimpan karena varian bisa menyusul
+# (dibuat worker) setelah kartu pertama kali dirender. URL berbasis hash isi file,
+# jadi entri yang ada tidak pernah basi.
+_image_variant_cache = {}
+
+def product_image_variants(image_url):
+    """srcset WebP/JPEG untuk foto produk, atau None jika variannya belum ada"""
+    variants = _image_variant_cache.get(image_url)
+    if variants is None:
+        variants = _find_image_variants(image_url)
+        if variants:
+            _image_variant_cache[image_url] = variants
+    return variants
+
+def _find_image_variants(image_url):
+    if not image_url or not image_url.startswith(PRODUCT_IMAGE_PREFIX):
+        return None
+    
+    original_name = image_url[len(PRODUCT_IMAGE_PREFIX):]
+    folder = _derived_image_folder()
+    srcsets = {}
+    for fmt in IMAGE_VARIANT_FORMATS:
+        candidates = []
+        for variant, (width, _) in IMAGE_VARIANTS.items():
+            name = _image_variant_name(original_name, variant, fmt)
+            if not os.path.exists(os.path.join(folder, name)):
+                return None
+            candidates.append(f'{PRODUCT_IMAGE_PREFIX}derived/{name} {width}w')
+        srcsets[fmt] = ', '.join(candidates)
+    
+    return {
+        'webp': srcsets['webp'],
+        'jpg': srcsets['jpg'],
+        'src': f"{PRODUCT_IMAGE_PREFIX}derived/{_image_variant_name(original_name, 'card', 'jpg')}",
+    }
+
+def product_image_tag(product, css_class='product-image', style='', sizes=CARD_IMAGE_SIZES):
+    """<img> foto produk; dengan <picture> + srcset WebP/JPEG jika varian tersedia"""
+    alt = escape(product.name)
+    style_attr = f' style="{style}"' if style else ''
+    variants = product_image_variants(product.image_url)
+    if not variants:
+        return Markup(f'''<img src="{escape(product.image_url or '')}" alt="{alt}" class="{css_class}"{style_attr} onerror="this.style.display='none'">''')
+    
+    return Markup(f'''<picture>
+                <source type="image/webp" srcset="{variants['webp']}" sizes="{sizes}">
+                <img src="{variants['src']}" srcset="{variants['jpg']}" sizes="{sizes}" alt="{alt}" class="{css_class}"{style_attr} loading="lazy" onerror="this.style.display='none'">
+            </picture>''')
+
+def sweep_unreferenced_uploads(grace_seconds=UPLOAD_GC_GRACE_SECONDS, dry_run=False):
+    """Hapus foto produk (beserta variannya) yang tidak lagi dirujuk Product.image_url.
+
+    File yang lebih muda dari `grace_seconds` dilewati. Mengembalikan daftar nama
+    file yang dihapus (atau yang akan dihapus jika dry_run).
+    """
+    folder = os.path.join(app.config['UPLOAD_FOLDER'], 'products')
+    derived_folder = _derived_image_folder()
+    referenced = {
+        image_url[len(PRODUCT_IMAGE_PREFIX):]
+        for (image_url,) in db.session.query(Product.image_url)
+                                      .filter(Product.image_url.like(PRODUCT_IMAGE_PREFIX + '%'))
+    }
+    cutoff = time.time() - grace_seconds
+    removed = []
+    
+    kept_variants = set()
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if not os.path.isfile(path):
+            continue
+        if name in referenced or os.path.getmtime(path) > cutoff:
+            kept_variants.update(_image_variant_name(name, variant, fmt)
+                                 for variant in IMAGE_VARIANTS for fmt in IMAGE_VARIANT_FORMATS)
+            continue
+        removed.append(name)
+        if not dry_run:
+            os.remove(path)
+    
+    # Varian yang foto aslinya sudah tidak ada
+    if os.path.isdir(derived_folder):
+        for name in sorted(os.listdir(derived_folder)):
+            path = os.path.join(derived_folder, name)
+            if name in kept_variants or os.path.getmtime(path) > cutoff:
+                continue
+            removed.append(f'derived/{name}')
+            if not dry_run:
+                os.remove(path)
+    
+    if not dry_run:
+        _image_variant_cache.clear()
+    return removed
+
+@app.cli.command('sweep-uploads')
+@click.option('--dry-run', is_flag=True, help='Hanya tampilkan file yang akan dihapus.')
+@click.option('--grace', default=UPLOAD_GC_GRACE_SECONDS, show_default=True, help='Umur minimal file (detik).')
+def sweep_uploads_command(dry_run, grace):
+    """Sapu foto produk yang tidak dirujuk produk mana pun."""
+    removed = sweep_unreferenced_uploads(grace_seconds=grace, dry_run=dry_run)
+    for name in removed:
+        print(f"{'[dry-run] ' if dry_run else ''}hapus {name}")
+    print(f"{len(removed)} file {'akan dihapus' if dry_run else 'dihapus'}")
+
 # ===== OAuth flow configuration =====
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
@@ -134,6 +396,8 @@ class User(UserMixin, db.Model):
     google_id = db.Column(db.String(100), unique=True)
     email_verified = db.Column(db.Boolean, default=False)
     verification_code = db.Column(db.String(6))
+    # Jumlah baris CartItem milik user; dijaga oleh event CartItem (lihat JUMLAH KERANJANG)
+    cart_count = db.Column(db.Integer, nullable=False, default=0)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -159,7 +423,15 @@ class Product(db.Model):
     is_featured = db.Column(db.Boolean, default=False)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     image_url = db.Column(db.String(500))
+    
+    __table_args__ = (
+        # Katalog: filter is_active + kategori, urut/rentang harga
+        db.Index('ix_product_active_category_price', 'is_active', 'category', 'price'),
+        # Manajemen produk seller: produk per seller, terbaru dulu
+        db.Index('ix_product_seller_created', 'seller_id', 'created_at'),
+    )
 
 class CartItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -167,6 +439,11 @@ class CartItem(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Satu baris per produk per user; penambahan berikutnya menambah quantity (upsert)
+        db.UniqueConstraint('user_id', 'product_id', name='uq_cart_item_user_product'),
+    )
 
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -181,6 +458,7 @@ class Order(db.Model):
     order_date = db.Column(db.DateTime, default=datetime.utcnow)
     completed_date = db.Column(db.DateTime)
     tracking_info = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -233,10 +511,804 @@ class AppSetting(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class ImageJob(db.Model):
+    """Antrian pembuatan varian gambar produk (lihat ANTRIAN PROSES GAMBAR)"""
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)  # nama blob di uploads/products
+    status = db.Column(db.String(20), default='pending', index=True)  # pending, processing, done, failed
+    attempts = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
+# ===== VERSION STAMPS =====
+# Satu file kecil per domain di folder instance. mtime-nya dipakai sebagai nomor versi
+# sehingga semua worker bisa cek data basi cukup dengan os.stat(), tanpa query DB.
+app.config['VERSION_STAMP_FOLDER'] = os.path.join(app.instance_path, 'versions')
+os.makedirs(app.config['VERSION_STAMP_FOLDER'], exist_ok=True)
+
+def _version_stamp_path(name):
+    return os.path.join(app.config['VERSION_STAMP_FOLDER'], f'{name}.version')
+
+def get_version_stamp(name):
+    """Versi terakhir domain `name` (0 jika belum pernah ditulis)"""
+    try:
+        return os.stat(_version_stamp_path(name)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+def bump_version_stamp(name):
+    """Naikkan versi domain `name`; nilai baru selalu lebih besar dari sebelumnya"""
+    path = _version_stamp_path(name)
+    version = max(time.time_ns(), get_version_stamp(name) + 1)
+    with open(path, 'a'):
+        pass
+    os.utime(path, ns=(version, version))
+    return version
+
+def mark_stamp_dirty(session, name):
+    """Tandai domain berubah; versi baru dinaikkan setelah transaksi di-commit"""
+    session.info.setdefault('dirty_stamps', set()).add(name)
+
+@event.listens_for(Session, 'after_commit')
+def bump_dirty_stamps(session):
+    for name in session.info.pop('dirty_stamps', ()):
+        bump_version_stamp(name)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_dirty_stamps(session):
+    session.info.pop('dirty_stamps', None)
+
+# Domain data dan model yang menulisnya; setiap insert/update/delete lewat ORM
+# menaikkan versi domain tersebut setelah commit
+DATA_VERSION_DOMAINS = {
+    'settings': (AppSetting,),
+    'products': (Product,),
+    'orders': (Order, OrderItem),
+    'journals': (JournalEntry, JournalDetail, Account),
+}
+
+def _mark_domain_dirty(name):
+    def listener(mapper, connection, target):
+        mark_stamp_dirty(object_session(target), name)
+    return listener
+
+for _domain, _models in DATA_VERSION_DOMAINS.items():
+    for _model in _models:
+        for _event_name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(_model, _event_name, _mark_domain_dirty(_domain))
+
+# ===== JUMLAH KERANJANG =====
+# (Penyimpanan 'table') User.cart_count ikut termuat bersama current_user, jadi badge
+# keranjang di navigasi dirender tanpa query tambahan. Nilainya dihitung ulang dari tabel cart_item di
+# transaksi yang sama setiap kali item ditambah/dihapus.
+def _cart_count_update(user_id):
+    return (db.update(User.__table__)
+              .where(User.__table__.c.id == user_id)
+              .values(cart_count=db.select(db.func.count(CartItem.__table__.c.id))
+                                   .where(CartItem.__table__.c.user_id == user_id)
+                                   .scalar_subquery()))
+
+@event.listens_for(CartItem, 'after_insert')
+@event.listens_for(CartItem, 'after_delete')
+def refresh_cart_count(mapper, connection, target):
+    connection.execute(_cart_count_update(target.user_id))
+
+def sync_cart_count(user_id):
+    """Untuk perubahan cart_item yang tidak lewat ORM (statement Core TableCartStore)"""
+    db.session.execute(_cart_count_update(user_id))
+
+def upsert_cart_item(user_id, product_id, quantity):
+    """Tambah `quantity` produk ke keranjang dalam satu statement INSERT ... ON CONFLICT.
+
+    Syarat stok ikut di statement (untuk baris baru maupun penambahan quantity), jadi
+    klik ganda tidak membuat baris dobel atau melewati stok. Mengembalikan
+    (quantity baru, nama produk, jumlah keranjang), atau None jika produk tidak ada
+    atau stok tidak cukup; tidak melakukan commit.
+    """
+    cart_table = CartItem.__table__
+    product_table = Product.__table__
+    source = (db.select(db.literal(user_id), product_table.c.id, db.literal(quantity), db.literal(datetime.utcnow()))
+                .where(product_table.c.id == product_id, product_table.c.stock >= quantity))
+    stmt = sqlite_insert(cart_table).from_select(['user_id', 'product_id', 'quantity', 'added_at'], source)
+    # Subquery berkorelasi ke baris cart_item/excluded ditulis sebagai SQL teks: SQLAlchemy
+    # tidak menerapkan korelasi di dalam klausa ON CONFLICT dan RETURNING
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'product_id'],
+        set_={'quantity': cart_table.c.quantity + stmt.excluded.quantity},
+        where=db.text('(SELECT stock FROM product WHERE product.id = excluded.product_id)'
+                      ' >= cart_item.quantity + excluded.quantity'),
+    ).returning(
+        cart_table.c.quantity,
+        db.literal_column('(SELECT name FROM product WHERE product.id = cart_item.product_id)'),
+    )
+    row = db.session.execute(stmt).first()
+    if row is None:
+        return None
+    
+    new_quantity, product_name = row
+    if new_quantity == quantity:
+        # Baris baru (penambahan ke baris lama selalu > quantity): INSERT Core tidak
+        # memicu event CartItem, jadi counter dihitung ulang di sini
+        cart_count = db.session.execute(
+            _cart_count_update(user_id).returning(User.__table__.c.cart_count)
+        ).scalar()
+    else:
+        # Jumlah baris tidak berubah; user yang login sudah ada di identity map
+        cart_count = db.session.get(User, user_id).cart_count
+    return new_quantity, product_name, cart_count
+
+# ===== PENYIMPANAN KERANJANG =====
+# Keranjang sangat sering ditulis. CartStore memisahkan di mana baris keranjang disimpan:
+# TableCartStore memakai tabel CartItem (satu transaksi dengan database utama), sedangkan
+# SQLiteCartStore memakai file SQLite sendiri sehingga tambah/ubah keranjang tidak berebut
+# write lock dengan checkout dan jurnal. Keranjang baru masuk database utama saat checkout
+# (sebagai OrderItem). Baris keranjang: objek dengan atribut id, product_id, quantity.
+class CartStore(ABC):
+    table = None
+    
+    @abstractmethod
+    def rows(self, user_id):
+        """[(baris keranjang, Product atau None)] urut waktu tambah"""
+    
+    @abstractmethod
+    def count(self, user):
+        """Jumlah baris keranjang milik `user`"""
+    
+    @abstractmethod
+    def add(self, user_id, product_id, quantity):
+        """Tambah quantity (dengan syarat stok) -> (quantity baru, nama produk, jumlah baris) atau None"""
+    
+    @abstractmethod
+    def _write(self, user_id, statements):
+        """Jalankan [(statement, params)] dalam satu transaksi dan commit; hasilnya dikembalikan"""
+    
+    def set_quantities(self, user_id, quantities):
+        """Tetapkan quantity per produk ({product_id: quantity}; 0 = hapus dari keranjang)"""
+        table = self.table
+        removed = [product_id for product_id, quantity in quantities.items() if not quantity]
+        now = datetime.utcnow()
+        kept = [{'user_id': user_id, 'product_id': product_id, 'quantity': quantity, 'added_at': now}
+                for product_id, quantity in quantities.items() if quantity]
+        statements = []
+        if removed:
+            statements.append((db.delete(table).where(table.c.user_id == user_id,
+                                                      table.c.product_id.in_(removed)), None))
+        if kept:
+            upsert = sqlite_insert(table)
+            upsert = upsert.on_conflict_do_update(index_elements=['user_id', 'product_id'],
+                                                  set_={'quantity': upsert.excluded.quantity})
+            statements.append((upsert, kept))
+        if statements:
+            self._write(user_id, statements)
+    
+    def remove(self, user_id, line_id):
+        """Hapus satu baris keranjang; True jika baris milik user ditemukan"""
+        table = self.table
+        result, = self._write(user_id, [(db.delete(table).where(table.c.id == line_id,
+                                                                table.c.user_id == user_id), None)])
+        return result.rowcount > 0
+    
+    @abstractmethod
+    def clear(self, user_id):
+        """Kosongkan keranjang sebagai bagian dari transaksi db.session yang sedang berjalan
+        (checkout): keranjang baru benar-benar kosong jika transaksi itu di-commit"""
+
+class TableCartStore(CartStore):
+    """Keranjang di tabel CartItem database utama"""
+    table = CartItem.__table__
+    
+    def rows(self, user_id):
+        return (db.session.query(CartItem, Product)
+                          .outerjoin(Product, Product.id == CartItem.product_id)
+                          .filter(CartItem.user_id == user_id)
+                          .order_by(CartItem.id)
+                          .all())
+    
+    def count(self, user):
+        return user.cart_count
+    
+    def add(self, user_id, product_id, quantity):
+        result = upsert_cart_item(user_id, product_id, quantity)
+        if result is not None:
+            db.session.commit()
+        return result
+    
+    def _write(self, user_id, statements, commit=True):
+        results = [db.session.execute(statement, params) for statement, params in statements]
+        # Statement Core tidak memicu event CartItem
+        sync_cart_count(user_id)
+        if commit:
+            db.session.commit()
+        return results
+    
+    def clear(self, user_id):
+        self._write(user_id, [(db.delete(self.table).where(self.table.c.user_id == user_id), None)],
+                    commit=False)
+
+def configure_sqlite_wal(dbapi_connection, connection_record):
+    """Pragma untuk file SQLite tambahan yang ditulis banyak worker sekaligus"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.close()
+
+cart_store_metadata = db.MetaData()
+cart_line_table = db.Table(
+    'cart_line', cart_store_metadata,
+    db.Column('id', db.Integer, primary_key=True),
+    db.Column('user_id', db.Integer, nullable=False),
+    db.Column('product_id', db.Integer, nullable=False),
+    db.Column('quantity', db.Integer, nullable=False),
+    db.Column('added_at', db.DateTime, default=datetime.utcnow),
+    db.UniqueConstraint('user_id', 'product_id'),
+)
+
+class SQLiteCartStore(CartStore):
+    """Keranjang di file SQLite terpisah dalam mode WAL.
+
+    Produk tetap dibaca dari database utama (hanya baca, tanpa write lock). Nilai
+    User.cart_count tidak dipakai; jumlah baris dihitung dari file ini.
+    """
+    table = cart_line_table
+    
+    def __init__(self, path):
+        self.engine = create_engine(f'sqlite:///{path}')
+        event.listen(self.engine, 'connect', configure_sqlite_wal)
+        cart_store_metadata.create_all(self.engine)
+        event.listen(Session, 'after_commit', self._clear_committed_carts)
+        event.listen(Session, 'after_rollback', self._discard_pending_clears)
+    
+    def rows(self, user_id):
+        table = self.table
+        with self.engine.connect() as connection:
+            lines = connection.execute(db.select(table.c.id, table.c.product_id, table.c.quantity)
+                                         .where(table.c.user_id == user_id)
+                                         .order_by(table.c.id)).all()
+        if not lines:
+            return []
+        products = {product.id: product for product in
+                    Product.query.filter(Product.id.in_({line.product_id for line in lines}))}
+        return [(line, products.get(line.product_id)) for line in lines]
+    
+    def _count(self, connection, user_id):
+        table = self.table
+        return connection.execute(db.select(db.func.count(table.c.id))
+                                    .where(table.c.user_id == user_id)).scalar()
+    
+    def count(self, user):
+        with self.engine.connect() as connection:
+            return self._count(connection, user.id)
+    
+    def add(self, user_id, product_id, quantity):
+        product = db.session.query(Product.name, Product.stock).filter(Product.id == product_id).first()
+        if not product or product.stock < quantity:
+            return None
+        
+        table = self.table
+        upsert = sqlite_insert(table).values(user_id=user_id, product_id=product_id,
+                                             quantity=quantity, added_at=datetime.utcnow())
+        upsert = upsert.on_conflict_do_update(
+            index_elements=['user_id', 'product_id'],
+            set_={'quantity': table.c.quantity + upsert.excluded.quantity},
+            where=table.c.quantity + upsert.excluded.quantity <= product.stock,
+        ).returning(table.c.quantity)
+        with self.engine.begin() as connection:
+            new_quantity = connection.execute(upsert).scalar()
+            if new_quantity is None:
+                return None
+            return new_quantity, product.name, self._count(connection, user_id)
+    
+    def _write(self, user_id, statements):
+        with self.engine.begin() as connection:
+            return [connection.execute(statement, params) for statement, params in statements]
+    
+    def clear(self, user_id):
+        # File keranjang tidak bisa ikut transaksi database utama: dikosongkan setelah commit
+        db.session.info.setdefault('cleared_carts', set()).add(user_id)
+    
+    def _clear_committed_carts(self, session):
+        user_ids = session.info.pop('cleared_carts', None)
+        if not user_ids:
+            return
+        # Order sudah ter-commit: gagal mengosongkan keranjang tidak boleh membuat checkout
+        # dilaporkan gagal (customer akan mengulang dan order jadi dobel)
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(db.delete(self.table).where(self.table.c.user_id.in_(user_ids)))
+        except Exception as e:
+            print(f"Error clearing carts {sorted(user_ids)}: {e}")
+    
+    def _discard_pending_clears(self, session):
+        session.info.pop('cleared_carts', None)
+
+CART_STORES = {
+    'table': lambda: TableCartStore(),
+    'sqlite': lambda: SQLiteCartStore(app.config['CART_STORE_PATH']),
+}
+cart_store = CART_STORES[app.config['CART_STORE']]()
+
+def current_cart_count():
+    """Jumlah baris keranjang user yang login (0 untuk seller/anonim), sekali per request"""
+    if 'cart_count' not in g:
+        g.cart_count = 0
+        if current_user.is_authenticated and current_user.user_type == 'customer':
+            g.cart_count = cart_store.count(current_user)
+    return g.cart_count
+
+app.add_template_global(current_cart_count, 'cart_count')
+
+# ===== GENERATOR NOMOR =====
+sequence_metadata = db.MetaData()
+id_sequence_table = db.Table(
+    'id_sequence', sequence_metadata,
+    db.Column('name', db.String(20), primary_key=True),
+    db.Column('next_value', db.Integer, nullable=False),
+)
+
+class SequenceAllocator:
+    """Counter nomor urut per nama, dibagikan ke worker per blok.
+
+    Counter disimpan di file SQLite sendiri, bukan di database utama: pengambilan blok
+    tidak menunggu write lock transaksi request yang sedang berjalan dan tidak ikut
+    ter-rollback. Tiap proses mengambil `block_size` nomor dengan satu UPSERT atomik lalu
+    membagikannya dari memori. Sisa blok yang tidak terpakai (worker berhenti) dilewati,
+    tidak pernah dipakai ulang.
+    """
+    
+    def __init__(self, path, block_size):
+        self.engine = create_engine(f'sqlite:///{path}')
+        event.listen(self.engine, 'connect', configure_sqlite_wal)
+        sequence_metadata.create_all(self.engine)
+        self.block_size = block_size
+        self._blocks = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+    
+    def _allocate(self, name, highest_used):
+        table = id_sequence_table
+        with self.engine.begin() as connection:
+            # Counter baru (atau file yang hilang/di-reset) dimulai setelah nomor tertinggi
+            # yang sudah tersimpan; worker yang kalah balapan insert tetap lewat ON CONFLICT
+            missing = connection.execute(db.select(table.c.name).where(table.c.name == name)).first() is None
+            first = highest_used() + 1 if missing else 1
+            upsert = sqlite_insert(table).values(name=name, next_value=first + self.block_size)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=['name'],
+                set_={'next_value': table.c.next_value + self.block_size},
+            ).returning(table.c.next_value)
+            end = connection.execute(upsert).scalar()
+        return [end - self.block_size, end]
+    
+    def next_value(self, key, period, highest_used):
+        """Nomor berikutnya dari counter `key + period`.
+
+        `highest_used()` mengembalikan nomor tertinggi yang sudah dipakai; hanya dipanggil
+        jika counter itu belum ada di file. Blok periode lama dibuang saat periode berganti.
+        """
+        with self._lock:
+            # Worker hasil fork tidak boleh memakai sisa blok (dan koneksi) milik proses induk
+            if self._pid != os.getpid():
+                self._pid, self._blocks = os.getpid(), {}
+                self.engine.dispose(close=False)
+            cached = self._blocks.get(key)
+            if cached is None or cached[0] != period or cached[1][0] >= cached[1][1]:
+                cached = self._blocks[key] = (period, self._allocate(f'{key}{period}', highest_used))
+            block = cached[1]
+            value = block[0]
+            block[0] += 1
+            return value
+
+sequence_allocator = SequenceAllocator(app.config['ID_SEQUENCE_PATH'], app.config['ID_SEQUENCE_BLOCK'])
+SEQUENCE_DIGITS = 7
+
+def generate_number(prefix, column):
+    """prefix + tanggal + nomor urut 7 digit, mis. ORD202501010000042.
+
+    Nomor urut berasal dari counter `prefix + tanggal` (mulai lagi setiap hari per
+    prefix). Satu nilai counter hanya dibagikan sekali, jadi nomor unik tanpa cek ke
+    database sebelum insert. Jika counter belum ada, nilai awalnya diambil dari nomor
+    tertinggi dengan prefix dan tanggal yang sama di `column`, sehingga sequences.db
+    yang hilang tidak membuat nomor hari itu terulang. Nomor format lama (timestamp
+    per detik) panjangnya berbeda, jadi tidak ikut terhitung dan tidak bisa bentrok.
+    """
+    period = datetime.now().strftime('%Y%m%d')
+    base = f'{prefix}{period}'
+    
+    def highest_used():
+        suffix = db.cast(db.func.substr(column, len(base) + 1), db.Integer)
+        with db.session.no_autoflush:
+            return db.session.query(db.func.max(suffix)).filter(
+                column.like(f'{base}%'), db.func.length(column) == len(base) + SEQUENCE_DIGITS
+            ).scalar() or 0
+    
+    return f"{base}{sequence_allocator.next_value(prefix, period, highest_used):0{SEQUENCE_DIGITS}d}"
+
+def generate_order_number():
+    return generate_number('ORD', Order.order_number)
+
+# ===== LOADER KERANJANG =====
+# Satu baris keranjang beserta produknya (None jika produk sudah dihapus)
+CartLine = namedtuple('CartLine', ['item', 'product', 'subtotal'])
+
+def load_cart(user_id):
+    """Keranjang user beserta produknya (TableCartStore: satu query cart_item LEFT JOIN product).
+
+    Mengembalikan dict: lines (CartLine, urut waktu tambah), total (jumlah subtotal
+    produk yang masih ada) dan unavailable (baris yang produknya hilang atau stoknya
+    kurang dari quantity).
+    """
+    lines = [CartLine(item, product, product.price * item.quantity if product else 0)
+             for item, product in cart_store.rows(user_id)]
+    return {
+        'lines': lines,
+        'total': sum(line.subtotal for line in lines),
+        'unavailable': [line for line in lines
+                        if line.product is None or line.product.stock < line.item.quantity],
+    }
+
+# ===== OPERASI KERANJANG BATCH =====
+CART_BATCH_MAX_OPERATIONS = 100
+CART_BATCH_OPS = ('add', 'set', 'remove')
+
+def cart_summary(quantities, products):
+    """Ringkasan keranjang untuk response JSON (item, total, jumlah baris).
+
+    quantities: {product_id: quantity} berurutan sesuai urutan keranjang.
+    """
+    items = []
+    total = 0
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if not product:
+            continue
+        subtotal = product.price * quantity
+        total += subtotal
+        items.append({
+            'product_id': product.id,
+            'name': product.name,
+            'price': product.price,
+            'quantity': quantity,
+            'subtotal': subtotal,
+        })
+    return {'items': items, 'total': total, 'count': len(quantities)}
+
+def apply_cart_operations(user_id, operations):
+    """Terapkan daftar operasi add/set/remove ke keranjang user dalam satu transaksi.
+
+    Semua operasi divalidasi dulu terhadap keranjang dan stok yang dibaca sekali;
+    jika ada yang gagal tidak ada yang diterapkan. Mengembalikan (ringkasan, errors).
+    `operations` (biasanya langsung dari request.json) tidak diubah.
+    """
+    errors = []
+    # (op, product_id, quantity) hasil normalisasi, satu per operasi input
+    normalized = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in CART_BATCH_OPS:
+            errors.append({'index': index, 'message': f"op harus salah satu dari {', '.join(CART_BATCH_OPS)}"})
+            continue
+        op = operation['op']
+        product_id = operation.get('product_id')
+        quantity = operation.get('quantity', 1 if op == 'add' else 0)
+        # Hanya bilangan bulat JSON: 1.7, true dan "3" ditolak, bukan dibulatkan/dikonversi
+        if type(product_id) is not int:
+            errors.append({'index': index, 'message': 'product_id harus berupa bilangan bulat'})
+            continue
+        if type(quantity) is not int:
+            errors.append({'index': index, 'message': 'quantity harus berupa bilangan bulat'})
+            continue
+        if quantity < (1 if op == 'add' else 0):
+            errors.append({'index': index, 'message': 'quantity tidak valid'})
+            continue
+        normalized.append((op, product_id, quantity))
+    if errors:
+        return None, errors
+    
+    cart = load_cart(user_id)
+    current = {line.item.product_id: line.item.quantity for line in cart['lines']}
+    products = {line.product.id: line.product for line in cart['lines'] if line.product}
+    # Stok produk yang belum ada di keranjang diambil dengan satu query tambahan
+    new_ids = {product_id for _, product_id, _ in normalized} - set(products)
+    if new_ids:
+        products.update((product.id, product) for product in Product.query.filter(Product.id.in_(new_ids)))
+    
+    quantities = dict(current)
+    for index, (op, product_id, quantity) in enumerate(normalized):
+        if op == 'add':
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        elif op == 'set':
+            quantities[product_id] = quantity
+        else:
+            quantities[product_id] = 0
+        
+        product = products.get(product_id)
+        if quantities[product_id] and not product:
+            errors.append({'index': index, 'message': f'Produk #{product_id} tidak ditemukan'})
+        elif product and quantities[product_id] > product.stock:
+            errors.append({'index': index, 'message': f'Stock {product.name} tidak mencukupi. Stok tersedia: {product.stock}'})
+    if errors:
+        return None, errors
+    
+    # Ringkasan dibuat sebelum commit: setelah commit semua objek kedaluwarsa dan dimuat ulang
+    summary = cart_summary({product_id: quantity for product_id, quantity in quantities.items() if quantity},
+                           products)
+    cart_store.set_quantities(user_id, {product_id: quantity for product_id, quantity in quantities.items()
+                                        if quantity != current.get(product_id, 0)})
+    return summary, []
+
+# ===== SETTINGS CACHE =====
+_settings_cache = {'version': None, 'values': None}
+
+def get_settings():
+    """Semua AppSetting sebagai dict, dilayani dari memori proses.
+
+    Dict yang dikembalikan dipakai bersama, jangan diubah; gunakan set_setting().
+    """
+    global _settings_cache
+    version = get_version_stamp('settings')
+    cached = _settings_cache
+    if cached['values'] is None or cached['version'] != version:
+        # Versi dibaca sebelum query, jadi perubahan di tengah jalan memicu reload berikutnya
+        cached = {'version': version, 'values': {s.key: s.value for s in AppSetting.query.all()}}
+        _settings_cache = cached
+    return cached['values']
+
+def set_setting(key, value):
+    """Simpan satu AppSetting; cache ikut ter-invalidate lewat event ORM"""
+    setting = AppSetting.query.filter_by(key=key).first()
+    if setting:
+        setting.value = value
+    else:
+        db.session.add(AppSetting(key=key, value=value))
+    db.session.commit()
+
+def invalidate_settings_cache():
+    """Untuk perubahan AppSetting yang tidak lewat ORM (bulk update, SQL manual)"""
+    bump_version_stamp('settings')
+
+# ===== PRODUK UNGGULAN =====
+# Daftar produk unggulan di home dimaterialisasi di memori proses sebagai record ringan
+# (bukan objek ORM), jadi render home tidak menyentuh tabel product. Versi 'featured'
+# hanya naik jika kolom yang menentukan isi/tampilan daftar berubah.
+FEATURED_PRODUCT_LIMIT = 3
+FeaturedProduct = namedtuple('FeaturedProduct', [
+    'id', 'name', 'description', 'price', 'stock', 'size_cm', 'weight_kg', 'image_url', 'updated_at',
+])
+# updated_at hanya tercatat di history jika di-set manual (worker gambar menyentuhnya
+# setelah varian jadi); onupdate otomatis tidak ikut memicu rebuild
+FEATURED_TRIGGER_COLUMNS = (
+    'is_featured', 'is_active', 'price', 'stock', 'image_url', 'updated_at',
+    'name', 'description', 'size_cm', 'weight_kg',
+)
+_featured_cache = {'version': None, 'products': None}
+
+def get_featured_products():
+    """Produk unggulan aktif (tuple FeaturedProduct), dibangun ulang hanya jika versinya berubah"""
+    global _featured_cache
+    version = get_version_stamp('featured')
+    cached = _featured_cache
+    if cached['products'] is None or cached['version'] != version:
+        rows = (db.session.query(*(getattr(Product, field) for field in FeaturedProduct._fields))
+                          .filter(Product.is_featured == True, Product.is_active == True)
+                          .order_by(Product.id)
+                          .limit(FEATURED_PRODUCT_LIMIT)
+                          .all())
+        cached = {'version': version, 'products': tuple(FeaturedProduct(*row) for row in rows)}
+        _featured_cache = cached
+    return cached['products']
+
+def invalidate_featured_products():
+    """Untuk perubahan Product yang tidak lewat ORM (bulk update, SQL manual)"""
+    bump_version_stamp('featured')
+
+@event.listens_for(Product, 'after_insert')
+@event.listens_for(Product, 'after_delete')
+def mark_featured_dirty_on_insert_delete(mapper, connection, target):
+    if target.is_featured:
+        mark_stamp_dirty(object_session(target), 'featured')
+
+@event.listens_for(Product, 'after_update')
+def mark_featured_dirty_on_update(mapper, connection, target):
+    state = sa_inspect(target)
+    if not (target.is_featured or state.attrs.is_featured.history.deleted):
+        return
+    if any(state.attrs[column].history.has_changes() for column in FEATURED_TRIGGER_COLUMNS):
+        mark_stamp_dirty(object_session(target), 'featured')
+
+# ===== FRAGMENT CACHE =====
+class FragmentCache:
+    """Cache LRU untuk potongan HTML yang sudah dirender (kartu produk, kartu order).
+
+    Key berbentuk (kind, entity_id, versi, ...) - versi (updated_at baris) membuat
+    worker lain otomatis miss setelah baris berubah; invalidate() membuang entri
+    lama di proses yang melakukan perubahan.
+    """
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys_by_entity = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+    
+    def set(self, key, html):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            self._keys_by_entity.setdefault(key[:2], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+    
+    def get_or_render(self, key, render):
+        html = self.get(key)
+        if html is None:
+            html = render()
+            self.set(key, html)
+        return html
+    
+    def invalidate(self, kind, entity_id):
+        with self._lock:
+            for key in self._keys_by_entity.pop((kind, entity_id), ()):
+                self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_entity.clear()
+    
+    def _forget(self, key):
+        keys = self._keys_by_entity.get(key[:2])
+        if keys:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_entity[key[:2]]
+
+fragment_cache = FragmentCache()
+
+# Halaman utuh untuk pengunjung anonim (lihat anonymous_page_cache)
+page_cache = FragmentCache(max_entries=64)
+
+def viewer_role():
+    """Peran pengunjung untuk key cache: customer, seller, atau anonymous"""
+    return current_user.user_type if current_user.is_authenticated else 'anonymous'
+
+# ===== ANTRIAN PROSES GAMBAR =====
+# Upload hanya menyimpan foto asli lalu mencatat ImageJob; pembuatan varian dijalankan
+# thread pool di belakang. Job tersimpan di DB, jadi job yang belum selesai saat proses
+# berhenti dilanjutkan oleh resume_image_jobs() / `flask process-image-jobs`.
+IMAGE_WORKER_THREADS = int(os.getenv('IMAGE_WORKER_THREADS', '2'))
+IMAGE_JOB_MAX_ATTEMPTS = 3
+# Klaim 'processing' yang lebih tua dari ini dianggap milik worker yang sudah mati
+IMAGE_JOB_TIMEOUT = timedelta(minutes=int(os.getenv('IMAGE_JOB_TIMEOUT_MINUTES', '10')))
+
+_image_executor = None
+_image_executor_lock = threading.Lock()
+
+def _get_image_executor():
+    global _image_executor
+    with _image_executor_lock:
+        if _image_executor is None:
+            _image_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKER_THREADS, thread_name_prefix='image-job')
+        return _image_executor
+
+def enqueue_image_job(filename):
+    """Catat job untuk blob `filename`; dikirim ke worker setelah transaksi di-commit"""
+    if Image is None:
+        return None
+    job = ImageJob(filename=filename)
+    db.session.add(job)
+    db.session.info.setdefault('queued_image_jobs', []).append(job)
+    return job
+
+@event.listens_for(Session, 'after_commit')
+def submit_queued_image_jobs(session):
+    for job in session.info.pop('queued_image_jobs', ()):
+        identity = sa_inspect(job).identity
+        if identity:
+            _get_image_executor().submit(run_image_job, identity[0])
+
+@event.listens_for(Session, 'after_rollback')
+def discard_queued_image_jobs(session):
+    session.info.pop('queued_image_jobs', None)
+
+def run_image_job(job_id, resubmit=True):
+    """Kerjakan satu job (biasanya di thread worker).
+
+    Mengembalikan status akhir job, atau None jika job sudah diklaim worker lain.
+    Job yang gagal tapi masih boleh dicoba lagi dikirim ulang ke worker jika `resubmit`.
+    """
+    claimed = 0
+    with app.app_context():
+        try:
+            # Klaim atomik: hanya satu worker/proses yang bisa memindahkan pending -> processing
+            claimed = db.session.execute(
+                db.update(ImageJob)
+                .where(ImageJob.id == job_id, ImageJob.status == 'pending')
+                .values(status='processing', attempts=ImageJob.attempts + 1, updated_at=datetime.utcnow())
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                return None
+            
+            job = db.session.get(ImageJob, job_id)
+            path = os.path.join(app.config['UPLOAD_FOLDER'], 'products', job.filename)
+            if generate_image_variants(path):
+                job.status = 'done'
+                job.last_error = None
+                # updated_at baru membuat fragment cache & ETag memakai varian yang baru dibuat
+                for product in Product.query.filter_by(image_url=PRODUCT_IMAGE_PREFIX + job.filename):
+                    product.updated_at = datetime.utcnow()
+            else:
+                job.last_error = 'Gagal membuat varian gambar'
+                job.status = 'failed' if job.attempts >= IMAGE_JOB_MAX_ATTEMPTS else 'pending'
+            db.session.commit()
+            
+            if job.status == 'pending' and resubmit:
+                _get_image_executor().submit(run_image_job, job_id)
+            return job.status
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error processing image job {job_id}: {e}")
+            if not claimed:
+                return None
+            return _release_image_job(job_id, str(e), resubmit)
+
+def _release_image_job(job_id, error, resubmit):
+    """Lepas klaim job yang error di tengah jalan: pending lagi, atau failed jika jatah percobaan habis"""
+    try:
+        db.session.execute(
+            db.update(ImageJob)
+            .where(ImageJob.id == job_id, ImageJob.status == 'processing')
+            .values(status=db.case((ImageJob.attempts >= IMAGE_JOB_MAX_ATTEMPTS, 'failed'), else_='pending'),
+                    last_error=error, updated_at=datetime.utcnow())
+        )
+        db.session.commit()
+        status = db.session.query(ImageJob.status).filter_by(id=job_id).scalar()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error releasing image job {job_id}: {e}")
+        return None
+    if status == 'pending' and resubmit:
+        _get_image_executor().submit(run_image_job, job_id)
+    return status
+
+def resume_image_jobs(wait=False):
+    """Kirim ulang job yang belum selesai (mis. setelah restart) ke worker"""
+    # Hanya klaim 'processing' yang sudah basi (worker-nya mati) yang dikembalikan ke antrian;
+    # job yang sedang dikerjakan worker/proses lain dibiarkan
+    db.session.execute(
+        db.update(ImageJob)
+        .where(ImageJob.status == 'processing', ImageJob.updated_at < datetime.utcnow() - IMAGE_JOB_TIMEOUT)
+        .values(status='pending')
+    )
+    db.session.commit()
+    job_ids = [job_id for (job_id,) in db.session.query(ImageJob.id).filter_by(status='pending')]
+    if wait:
+        for job_id in job_ids:
+            while run_image_job(job_id, resubmit=False) == 'pending':
+                pass
+    else:
+        for job_id in job_ids:
+            _get_image_executor().submit(run_image_job, job_id)
+    return len(job_ids)
+
+@app.cli.command('process-image-jobs')
+def process_image_jobs_command():
+    """Kerjakan semua job gambar yang tertunda lalu keluar."""
+    count = resume_image_jobs(wait=True)
+    print(f"{count} job gambar diproses")
+
 # ===== DATABASE MIGRATION =====
 def reset_database_safe():
     """Safely reset database by creating new one"""
@@ -582,21 +1654,87 @@ def customer_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def conditional_page(*domains):
+    """GET bersyarat berdasarkan version stamp domain data.
+
+    ETag lemah dihitung dari URL, versi domain, versi settings, aset shell dan user
+    yang login. Jika cocok dengan If-None-Match, 304 dikirim sebelum view dijalankan,
+    jadi query dan render dilewati sama sekali. Last-Modified tetap dikirim sebagai
+    informasi, tetapi hanya ETag yang dipakai untuk memutuskan 304.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Flash message yang menunggu harus ikut dirender, jadi jangan dijawab 304
+            if request.method != 'GET' or session.get('_flashes'):
+                return f(*args, **kwargs)
+            
+            versions = [get_version_stamp(domain) for domain in domains]
+            fingerprint = '|'.join([
+                request.full_path,
+                viewer_role(),
+                str(current_user.get_id()),
+                # Badge keranjang di navigasi ikut dirender ke halaman
+                str(current_cart_count()),
+                str(get_version_stamp('settings')),
+                STATIC_ASSETS.get('css', ''),
+                STATIC_ASSETS.get('js', ''),
+            ] + [str(version) for version in versions])
+            etag = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:20]
+            last_modified = None
+            if max(versions, default=0):
+                last_modified = datetime.utcfromtimestamp(max(versions) // 1_000_000_000)
+            
+            # If-Modified-Since sengaja diabaikan: Last-Modified hanya ikut versi domain dengan
+            # resolusi satu detik, sedangkan user, keranjang, flash dan settings hanya ada di ETag
+            if request.if_none_match and request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return decorated_function
+    return decorator
+
+def anonymous_page_cache(f):
+    """Sajikan GET anonim dari memori.
+
+    Halaman seperti /login dan /register untuk pengunjung yang belum login hanya
+    bergantung pada AppSetting, aset shell dan flash message. Key-nya path + versi
+    settings + aset, jadi tidak perlu DB; request dengan flash message yang menunggu
+    selalu dirender ulang dan tidak disimpan.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method != 'GET' or current_user.is_authenticated or session.get('_flashes'):
+            return f(*args, **kwargs)
+        
+        key = ('page', request.path, get_version_stamp('settings'),
+               STATIC_ASSETS.get('css'), STATIC_ASSETS.get('js'))
+        html = page_cache.get(key)
+        if html is None:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            html = response.get_data(as_text=True)
+            page_cache.set(key, html)
+        return Response(html, mimetype='text/html')
+    return decorated_function
+
 # ===== AKUNTANSI FUNCTIONS =====
 def generate_unique_transaction_number(prefix='TRX'):
-    """Generate unique transaction number dengan timestamp dan random number"""
-    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-    random_num = random.randint(100, 999)
-    return f"{prefix}{timestamp}{random_num}"
+    """Nomor transaksi jurnal unik (lihat generate_number)"""
+    return generate_number(prefix, JournalEntry.transaction_number)
 
 def create_journal_entry(transaction_number, date, description, journal_type, entries):
     try:
-        # Cek apakah transaction number sudah ada
-        existing_journal = JournalEntry.query.filter_by(transaction_number=transaction_number).first()
-        if existing_journal:
-            # Jika sudah ada, generate yang baru
-            transaction_number = generate_unique_transaction_number()
-        
         journal = JournalEntry(
             transaction_number=transaction_number,
             date=date,
@@ -688,8 +1826,7 @@ def create_journal_from_template(template_key, date, amounts):
         return None
 
 def generate_transaction_number(prefix='TRX'):
-    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-    return f"{prefix}{timestamp}"
+    return generate_unique_transaction_number(prefix)
 
 def create_cash_flow_entry(date, description, category, amount, flow_type):
     cash_flow = CashFlow(
@@ -896,10 +2033,7 @@ def update_stock_from_journal(journal_entry):
                 product_name = journal_entry.description
                 
                 # Cari produk berdasarkan nama atau deskripsi
-                product = Product.query.filter(
-                    (Product.name.ilike(f"%{product_name}%")) | 
-                    (Product.description.ilike(f"%{product_name}%"))
-                ).first()
+                product = find_product_by_text(product_name)
                 
                 if product:
                     # Hitung quantity berdasarkan harga (asumsi harga per item)
@@ -959,28 +2093,50 @@ def create_sales_journal(order):
     return None
 
 # ===== FUNGSI BUKU BESAR =====
-def get_ledger_data():
-    """Ambil data untuk buku besar - hanya akun yang punya transaksi"""
+LEDGER_ACCOUNT_FOOTER = '''
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+            '''
+
+def iter_ledger_data():
+    """Buku besar per akun sebagai potongan HTML - hanya akun yang punya transaksi"""
     try:
-        # Dapatkan semua akun yang punya transaksi di journal_details
-        accounts_with_transactions = db.session.query(Account).join(JournalDetail).distinct().order_by(Account.code).all()
+        # Satu query untuk semua detail, urut per akun lalu per jurnal, diambil per batch
+        rows = db.session.execute(
+            db.select(
+                Account.id.label('account_id'), Account.code, Account.name,
+                Account.category, Account.balance,
+                JournalEntry.date, JournalEntry.description,
+                JournalDetail.debit, JournalDetail.credit
+            )
+            .join(JournalDetail, JournalDetail.account_id == Account.id)
+            .join(JournalEntry, JournalEntry.id == JournalDetail.journal_id)
+            .order_by(Account.code, JournalDetail.journal_id, JournalDetail.id)
+            .execution_options(yield_per=STREAM_CHUNK_ROWS)
+        )
         
-        ledger_html = ""
+        current_account_id = None
+        running_balance = 0
         
-        for account in accounts_with_transactions:
-            # Dapatkan semua transaksi untuk akun ini
-            journal_details = JournalDetail.query.filter_by(account_id=account.id).order_by(JournalDetail.journal_id).all()
-            
-            account_html = f'''
+        for row in rows:
+            if row.account_id != current_account_id:
+                if current_account_id is not None:
+                    yield LEDGER_ACCOUNT_FOOTER
+                current_account_id = row.account_id
+                running_balance = 0
+                
+                yield f'''
             <div class="card" style="margin-bottom: 2rem;">
                 <h4 style="color: var(--primary); margin-bottom: 1rem;">
-                    {account.code} - {account.name}
+                    {row.code} - {row.name}
                 </h4>
                 <div style="margin-bottom: 1rem;">
                     <strong>Saldo Awal:</strong> Rp 0
                     <strong style="margin-left: 2rem;">Saldo Akhir:</strong> 
-                    <span class="{'debit' if account.balance >= 0 else 'credit'}">
-                        Rp {abs(account.balance):,.0f}
+                    <span class="{'debit' if row.balance >= 0 else 'credit'}">
+                        Rp {abs(row.balance):,.0f}
                     </span>
                 </div>
                 
@@ -998,40 +2154,29 @@ def get_ledger_data():
                         <tbody>
             '''
             
-            running_balance = 0
+            if row.category in ['asset', 'expense']:
+                running_balance += row.debit - row.credit
+            else:
+                running_balance += row.credit - row.debit
             
-            for detail in journal_details:
-                journal = detail.journal_entry
-                
-                if account.category in ['asset', 'expense']:
-                    running_balance += detail.debit - detail.credit
-                else:
-                    running_balance += detail.credit - detail.debit
-                
-                account_html += f'''
+            yield f'''
                 <tr>
-                    <td>{journal.date.strftime('%d/%m/%Y')}</td>
-                    <td>{journal.description}</td>
-                    <td class="debit">{"Rp {0:,.0f}".format(detail.debit) if detail.debit > 0 else ""}</td>
-                    <td class="credit">{"Rp {0:,.0f}".format(detail.credit) if detail.credit > 0 else ""}</td>
+                    <td>{row.date.strftime('%d/%m/%Y')}</td>
+                    <td>{row.description}</td>
+                    <td class="debit">{"Rp {0:,.0f}".format(row.debit) if row.debit > 0 else ""}</td>
+                    <td class="credit">{"Rp {0:,.0f}".format(row.credit) if row.credit > 0 else ""}</td>
                     <td class="{'debit' if running_balance >= 0 else 'credit'}">Rp {abs(running_balance):,.0f}</td>
                 </tr>
                 '''
-            
-            account_html += f'''
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-            '''
-            
-            ledger_html += account_html
         
-        return ledger_html if ledger_html else '<div class="card"><p>Belum ada transaksi untuk ditampilkan di buku besar.</p></div>'
+        if current_account_id is None:
+            yield '<div class="card"><p>Belum ada transaksi untuk ditampilkan di buku besar.</p></div>'
+        else:
+            yield LEDGER_ACCOUNT_FOOTER
         
     except Exception as e:
         print(f"Error generating ledger data: {e}")
-        return '<div class="card"><p>Error loading ledger data.</p></div>'
+        yield '<div class="card"><p>Error loading ledger data.</p></div>'
 
 def get_balance_sheet():
     """Generate balance sheet HTML"""
@@ -1186,1294 +2331,1383 @@ def get_cash_flow_statement():
         print(f"Error generating cash flow statement: {e}")
         return '<p>Error loading cash flow statement</p>'
 
-# ===== DEEP OCEAN HTML TEMPLATES =====
-def base_html(title, content, additional_css="", additional_js=""):
-    settings = {s.key: s.value for s in AppSetting.query.all()}
-    app_name = settings.get('app_name', 'Kang-Mas Shop')
-    app_logo = settings.get('app_logo', '/static/uploads/logos/logo.png')
-    
-    return f'''
-<!DOCTYPE html>
-<html lang="id">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} - {app_name}</title>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=Poppins:wght@300;400;500;600;700;800&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <link rel="icon" href="{app_logo}" type="image/x-icon">
-    <style>
-        :root {{
-            --primary: {COLORS['primary']};
-            --secondary: {COLORS['secondary']};
-            --accent: {COLORS['accent']};
-            --success: {COLORS['success']};
-            --warning: {COLORS['warning']};
-            --error: {COLORS['error']};
-            --dark: {COLORS['dark']};
-            --light: {COLORS['light']};
-            --white: {COLORS['white']};
-            --teal: {COLORS['teal']};
-            --navy: {COLORS['navy']};
-            --ocean-light: {COLORS['ocean-light']};
-            --ocean-medium: {COLORS['ocean-medium']};
-            --ocean-deep: {COLORS['ocean-deep']};
-            --shadow-sm: 0 2px 4px rgba(0,0,0,0.1);
-            --shadow-md: 0 4px 6px -1px rgba(0,0,0,0.1), 0 2px 4px -1px rgba(0,0,0,0.06);
-            --shadow-lg: 0 10px 15px -3px rgba(0,0,0,0.1), 0 4px 6px -2px rgba(0,0,0,0.05);
-            --shadow-xl: 0 20px 25px -5px rgba(0,0,0,0.1), 0 10px 10px -5px rgba(0,0,0,0.04);
-            --border-radius: 12px;
-            --border-radius-lg: 16px;
-            --border-radius-xl: 20px;
-        }}
-        
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Inter', sans-serif;
-            background: linear-gradient(135deg, #f0f9ff 0%, #e6f3ff 100%);
-            color: var(--dark);
-            min-height: 100vh;
-            line-height: 1.6;
-        }}
-        
-        /* Ocean Navbar */
-        .navbar {{
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-            padding: 1rem 2rem;
-            position: sticky;
-            top: 0;
-            z-index: 1000;
-            box-shadow: var(--shadow-lg);
-        }}
-        
-        .nav-container {{
-            max-width: 1400px;
-            margin: 0 auto;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }}
-        
-        .nav-brand {{
-            font-family: 'Poppins', sans-serif;
-            font-size: 1.8rem;
-            font-weight: 800;
-            color: var(--white);
-            text-decoration: none;
-            display: flex;
-            align-items: center;
-            gap: 0.75rem;
-        }}
-        
-        .nav-links {{
-            display: flex;
-            align-items: center;
-            gap: 1rem;
-        }}
-        
-        .nav-link {{
-            color: var(--white);
-            text-decoration: none;
-            padding: 0.75rem 1.5rem;
-            border-radius: var(--border-radius);
-            transition: all 0.3s ease;
-            font-weight: 500;
-        }}
-        
-        .nav-link:hover {{
-            background: rgba(255, 255, 255, 0.2);
-            transform: translateY(-2px);
-        }}
-        
-        .user-menu {{
-            display: flex;
-            align-items: center;
-            gap: 1rem;
-            background: rgba(255, 255, 255, 0.2);
-            padding: 0.75rem 1.5rem;
-            border-radius: var(--border-radius);
-            backdrop-filter: blur(10px);
-        }}
-        
-        .avatar {{
-            width: 45px;
-            height: 45px;
-            border-radius: 50%;
-            background: var(--ocean-medium);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 1.3rem;
-            color: var(--white);
-            box-shadow: var(--shadow-md);
-        }}
-        
-        .badge {{
-            padding: 0.4rem 1rem;
-            border-radius: 25px;
-            font-size: 0.75rem;
-            font-weight: 600;
-            text-transform: uppercase;
-            background: var(--ocean-medium);
-            color: var(--white);
-            box-shadow: var(--shadow-sm);
-        }}
-        
-        .container {{
-            max-width: 1400px;
-            margin: 0 auto;
-            padding: 2rem;
-        }}
-        
-        /* Ocean Cards */
-        .card {{
-            background: rgba(255, 255, 255, 0.9);
-            backdrop-filter: blur(10px);
-            border-radius: var(--border-radius-lg);
-            padding: 2rem;
-            box-shadow: var(--shadow-lg);
-            margin-bottom: 2rem;
-            border: 1px solid rgba(255, 255, 255, 0.3);
-            transition: all 0.3s ease;
-            position: relative;
-            overflow: hidden;
-        }}
-        
-        .card::before {{
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            height: 4px;
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-        }}
-        
-        .card:hover {{
-            transform: translateY(-5px);
-            box-shadow: var(--shadow-xl);
-        }}
-        
-        /* Ocean Buttons */
-        .btn {{
-            padding: 0.875rem 2rem;
-            border: none;
-            border-radius: var(--border-radius);
-            text-decoration: none;
-            display: inline-flex;
-            align-items: center;
-            gap: 0.75rem;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            font-weight: 600;
-            font-size: 0.95rem;
-        }}
-        
-        .btn-primary {{
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-            color: var(--white);
-            box-shadow: var(--shadow-md);
-        }}
-        
-        .btn-primary:hover {{
-            transform: translateY(-2px);
-            box-shadow: var(--shadow-lg);
-        }}
-        
-        .btn-success {{ 
-            background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%);
-            color: var(--white);
-            box-shadow: var(--shadow-md);
-        }}
-        
-        .btn-warning {{ 
-            background: linear-gradient(135deg, var(--warning) 0%, #b7791f 100%);
-            color: var(--white);
-            box-shadow: var(--shadow-md);
-        }}
-        
-        .btn-danger {{ 
-            background: linear-gradient(135deg, var(--error) 0%, #c53030 100%);
-            color: var(--white);
-            box-shadow: var(--shadow-md);
-        }}
-        
-        .btn-info {{ 
-            background: linear-gradient(135deg, var(--ocean-medium) 0%, var(--teal) 100%);
-            color: var(--white);
-            box-shadow: var(--shadow-md);
-        }}
-        
-        .grid {{
-            display: grid;
-            gap: 2rem;
-        }}
-        
-        .grid-2 {{ grid-template-columns: repeat(auto-fit, minmax(400px, 1fr)); }}
-        .grid-3 {{ grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); }}
-        .grid-4 {{ grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); }}
-        
-        /* Ocean Hero Section */
-        .hero {{
-            text-align: center;
-            padding: 5rem 2rem;
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-            border-radius: var(--border-radius-xl);
-            margin-bottom: 3rem;
-            color: var(--white);
-            position: relative;
-            overflow: hidden;
-        }}
-        
-        .hero::before {{
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 1000"><polygon fill="rgba(255,255,255,0.05)" points="0,1000 1000,0 1000,1000"/></svg>');
-        }}
-        
-        .hero h1 {{
-            font-size: 3.5rem;
-            margin-bottom: 1.5rem;
-            font-family: 'Poppins', sans-serif;
-            font-weight: 800;
-        }}
-        
-        .hero p {{
-            font-size: 1.25rem;
-            margin-bottom: 2rem;
-            opacity: 0.9;
-        }}
-        
-        /* Ocean Stats */
-        .stats {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 1.5rem;
-            margin: 3rem 0;
-        }}
-        
-        .stat-card {{
-            background: linear-gradient(135deg, var(--white) 0%, var(--ocean-light) 100%);
-            padding: 2.5rem 2rem;
-            border-radius: var(--border-radius-lg);
-            text-align: center;
-            box-shadow: var(--shadow-lg);
-            border: 1px solid rgba(255, 255, 255, 0.5);
-            transition: all 0.3s ease;
-            position: relative;
-            overflow: hidden;
-        }}
-        
-        .stat-card::before {{
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            height: 4px;
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-        }}
-        
-        .stat-card:hover {{
-            transform: translateY(-5px);
-            box-shadow: var(--shadow-xl);
-        }}
-        
-        .stat-number {{
-            font-family: 'Poppins', sans-serif;
-            font-size: 2.5rem;
-            font-weight: 800;
-            color: var(--primary);
-            margin-bottom: 0.5rem;
-        }}
-        
-        .price {{
-            font-family: 'Poppins', sans-serif;
-            font-size: 2rem;
-            font-weight: 700;
-            color: var(--primary);
-        }}
-        
-        /* Ocean Tables */
-        .table {{
-            width: 100%;
-            border-collapse: collapse;
-            background: var(--white);
-            border-radius: var(--border-radius);
-            overflow: hidden;
-            box-shadow: var(--shadow-lg);
-        }}
-        
-        .table th, .table td {{
-            padding: 1.25rem;
-            text-align: left;
-            border-bottom: 1px solid rgba(0,0,0,0.05);
-        }}
-        
-        .table th {{
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-            color: var(--white);
-            font-weight: 600;
-            font-size: 0.9rem;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-        }}
-        
-        .table tr:hover {{
-            background: rgba(49, 130, 206, 0.05);
-        }}
-        
-        /* Ocean Forms */
-        .form-group {{
-            margin-bottom: 1.75rem;
-        }}
-        
-        .form-label {{
-            display: block;
-            margin-bottom: 0.75rem;
-            font-weight: 600;
-            color: var(--dark);
-            font-size: 0.95rem;
-        }}
-        
-        .form-control {{
-            width: 100%;
-            padding: 1rem 1.25rem;
-            border: 2px solid rgba(0,0,0,0.1);
-            border-radius: var(--border-radius);
-            font-size: 1rem;
-            transition: all 0.3s ease;
-            background: rgba(255, 255, 255, 0.8);
-            font-family: 'Inter', sans-serif;
-        }}
-        
-        .form-control:focus {{
-            outline: none;
-            border-color: var(--ocean-medium);
-            box-shadow: 0 0 0 3px rgba(49, 130, 206, 0.1);
-            background: var(--white);
-        }}
-        
-        /* Ocean Tabs */
-        .accounting-tabs {{
-            display: flex;
-            gap: 0.5rem;
-            margin-bottom: 2rem;
-            background: rgba(255, 255, 255, 0.6);
-            padding: 0.5rem;
-            border-radius: var(--border-radius);
-            backdrop-filter: blur(10px);
-        }}
-        
-        .tab {{
-            padding: 1rem 2rem;
-            background: transparent;
-            border: none;
-            border-radius: var(--border-radius);
-            cursor: pointer;
-            font-weight: 600;
-            color: var(--dark);
-            transition: all 0.3s ease;
-            position: relative;
-        }}
-        
-        .tab.active {{
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-            color: var(--white);
-            box-shadow: var(--shadow-md);
-        }}
-        
-        .tab-content {{
-            display: none;
-        }}
-        
-        .tab-content.active {{
-            display: block;
-            animation: fadeIn 0.5s ease;
-        }}
-        
-        @keyframes fadeIn {{
-            from {{ opacity: 0; transform: translateY(10px); }}
-            to {{ opacity: 1; transform: translateY(0); }}
-        }}
-        
-        .debit {{ 
-            color: var(--success); 
-            font-weight: 600;
-            background: rgba(56, 161, 105, 0.1);
-            padding: 0.5rem 1rem;
-            border-radius: var(--border-radius);
-        }}
-        
-        .credit {{ 
-            color: var(--error); 
-            font-weight: 600;
-            background: rgba(229, 62, 62, 0.1);
-            padding: 0.5rem 1rem;
-            border-radius: var(--border-radius);
-        }}
-        
-        /* Product Cards */
-        .product-image {{
-            width: 100%;
-            height: 220px;
-            object-fit: cover;
-            border-radius: var(--border-radius);
-            margin-bottom: 1.5rem;
-            transition: transform 0.3s ease;
-            box-shadow: var(--shadow-md);
-        }}
-        
-        .product-card:hover .product-image {{
-            transform: scale(1.05);
-        }}
-        
-        /* Tracking Steps */
-        .tracking-steps {{
-            display: flex;
-            justify-content: space-between;
-            margin: 2rem 0;
-            position: relative;
-        }}
-        
-        .tracking-steps::before {{
-            content: '';
-            position: absolute;
-            top: 25px;
-            left: 0;
-            right: 0;
-            height: 3px;
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-            z-index: 1;
-            border-radius: 10px;
-        }}
-        
-        .tracking-step {{
-            text-align: center;
-            position: relative;
-            z-index: 2;
-            flex: 1;
-        }}
-        
-        .step-icon {{
-            width: 50px;
-            height: 50px;
-            border-radius: 50%;
-            background: var(--ocean-light);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            margin: 0 auto 0.75rem;
-            transition: all 0.3s ease;
-            font-size: 1.25rem;
-            box-shadow: var(--shadow-md);
-            border: 3px solid var(--white);
-        }}
-        
-        .step-active {{
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-            color: var(--white);
-            transform: scale(1.1);
-        }}
-        
-        .step-completed {{
-            background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%);
-            color: var(--white);
-        }}
-        
-        /* Google Button */
-        .google-btn {{
-            background: #4285F4;
-            color: white;
-            width: 100%;
-            justify-content: center;
-            margin-top: 1rem;
-            box-shadow: var(--shadow-md);
-        }}
-        
-        .google-btn:hover {{
-            background: #357ae8;
-            transform: translateY(-2px);
-            box-shadow: var(--shadow-lg);
-        }}
-        
-        /* Divider */
-        .divider {{
-            text-align: center;
-            margin: 1.5rem 0;
-            position: relative;
-        }}
-        
-        .divider::before {{
-            content: '';
-            position: absolute;
-            top: 50%;
-            left: 0;
-            right: 0;
-            height: 1px;
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-        }}
-        
-        .divider span {{
-            background: var(--white);
-            padding: 0 1.5rem;
-            position: relative;
-            color: var(--dark);
-            font-weight: 500;
-        }}
-        
-        /* Flash Messages */
-        .flash-messages {{
-            position: fixed;
-            top: 100px;
-            right: 20px;
-            z-index: 10000;
-        }}
-        
-        .flash-message {{
-            padding: 1.25rem 1.75rem;
-            border-radius: var(--border-radius);
-            margin-bottom: 0.75rem;
-            font-weight: 500;
-            box-shadow: var(--shadow-xl);
-            backdrop-filter: blur(20px);
-            border: 1px solid rgba(255, 255, 255, 0.2);
-            animation: slideInRight 0.5s ease;
-        }}
-        
-        @keyframes slideInRight {{
-            from {{ transform: translateX(100%); opacity: 0; }}
-            to {{ transform: translateX(0); opacity: 1; }}
-        }}
-        
-        .flash-success {{ 
-            background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%);
-            color: white;
-        }}
-        
-        .flash-error {{ 
-            background: linear-gradient(135deg, var(--error) 0%, #c53030 100%);
-            color: white;
-        }}
-        
-        .flash-warning {{ 
-            background: linear-gradient(135deg, var(--warning) 0%, #b7791f 100%);
-            color: white;
-        }}
-        
-        /* Logo Styling */
-        .navbar-logo {{
-            width: 45px;
-            height: 45px;
-            border-radius: 12px;
-            object-fit: cover;
-            margin-right: 12px;
-            box-shadow: var(--shadow-md);
-            border: 2px solid rgba(255, 255, 255, 0.3);
-        }}
-
-        /* Ocean Modal Styles */
-        .modal {{
-            display: none;
-            position: fixed;
-            z-index: 10000;
-            left: 0;
-            top: 0;
-            width: 100%;
-            height: 100%;
-            background-color: rgba(0,0,0,0.5);
-            backdrop-filter: blur(10px);
-        }}
-
-        .modal-content {{
-            background: rgba(255, 255, 255, 0.95);
-            backdrop-filter: blur(20px);
-            margin: 10% auto;
-            padding: 2.5rem;
-            border-radius: var(--border-radius-xl);
-            width: 90%;
-            max-width: 500px;
-            box-shadow: var(--shadow-xl);
-            border: 1px solid rgba(255, 255, 255, 0.3);
-            position: relative;
-            animation: modalSlideIn 0.3s ease;
-        }}
-        
-        @keyframes modalSlideIn {{
-            from {{ transform: translateY(-50px); opacity: 0; }}
-            to {{ transform: translateY(0); opacity: 1; }}
-        }}
-
-        .close {{
-            color: #aaa;
-            float: right;
-            font-size: 28px;
-            font-weight: bold;
-            cursor: pointer;
-            position: absolute;
-            right: 1.5rem;
-            top: 1.5rem;
-            transition: color 0.3s ease;
-        }}
-
-        .close:hover {{
-            color: var(--error);
-        }}
-
-        .modal-buttons {{
-            display: flex;
-            gap: 1rem;
-            margin-top: 2rem;
-        }}
-
-        .modal-buttons .btn {{
-            flex: 1;
-        }}
-
-        /* Status Badges */
-        .status-text {{
-            padding: 0.5rem 1rem;
-            border-radius: 25px;
-            font-weight: 600;
-            display: inline-block;
-            font-size: 0.85rem;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            box-shadow: var(--shadow-sm);
-        }}
-
-        .status-pending {{ 
-            background: linear-gradient(135deg, var(--warning) 0%, #b7791f 100%);
-            color: white;
-        }}
-        
-        .status-processing {{ 
-            background: linear-gradient(135deg, var(--ocean-medium) 0%, var(--ocean-deep) 100%);
-            color: white;
-        }}
-        
-        .status-completed {{ 
-            background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%);
-            color: white;
-        }}
-        
-        .status-cancelled {{ 
-            background: linear-gradient(135deg, var(--error) 0%, #c53030 100%);
-            color: white;
-        }}
-        
-        .status-paid {{ 
-            background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%);
-            color: white;
-        }}
-        
-        .status-unpaid {{ 
-            background: linear-gradient(135deg, var(--error) 0%, #c53030 100%);
-            color: white;
-        }}
-        
-        /* Floating Action Button */
-        .fab {{
-            position: fixed;
-            bottom: 2rem;
-            right: 2rem;
-            width: 60px;
-            height: 60px;
-            border-radius: 50%;
-            background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
-            color: white;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 1.5rem;
-            box-shadow: var(--shadow-xl);
-            cursor: pointer;
-            z-index: 1000;
-            transition: all 0.3s ease;
-            text-decoration: none;
-        }}
-        
-        .fab:hover {{
-            transform: scale(1.1);
-        }}
-        
-        /* Loading Animation */
-        .loading {{
-            display: inline-block;
-            width: 20px;
-            height: 20px;
-            border: 3px solid rgba(255,255,255,.3);
-            border-radius: 50%;
-            border-top-color: #fff;
-            animation: spin 1s ease-in-out infinite;
-        }}
-        
-        @keyframes spin {{
-            to {{ transform: rotate(360deg); }}
-        }}
-        
-        /* Responsive Design */
-        @media (max-width: 768px) {{
-            .nav-links {{
-                flex-direction: column;
-                gap: 0.5rem;
-            }}
-            
-            .hero h1 {{
-                font-size: 2.5rem;
-            }}
-            
-            .grid-2, .grid-3, .grid-4 {{
-                grid-template-columns: 1fr;
-            }}
-            
-            .container {{
-                padding: 1rem;
-            }}
-            
-            .stats {{
-                grid-template-columns: 1fr;
-            }}
-        }}
-        
-        {additional_css}
-    </style>
-</head>
-<body>
-    <!-- Floating Cart Button -->
-    {current_user.is_authenticated and current_user.user_type == 'customer' and '''
-    <a href="/cart" class="fab">
-        <i class="fas fa-shopping-cart"></i>
-        <span id="cart-count-fab" style="position: absolute; top: -5px; right: -5px; background: var(--error); color: white; border-radius: 50%; width: 20px; height: 20px; display: none; align-items: center; justify-content: center; font-size: 0.7rem; font-weight: bold;">0</span>
-    </a>
-    ''' or ''}
-
-    <nav class="navbar">
-        <div class="nav-container">
-            <a href="/" class="nav-brand">
-                <img src="{app_logo}" alt="{app_name}" class="navbar-logo" onerror="this.style.display='none'">
-                <span>{app_name}</span>
-            </a>
-            
-            <div class="nav-links">
-                {get_navigation()}
-            </div>
-        </div>
-    </nav>
-    
-    <div class="flash-messages">
-        {get_flash_messages()}
-    </div>
-    
-    <div class="container">
-        {content}
-    </div>
+# ===== STATIC ASSETS (CSS/JS SHELL) =====
+app.config['ASSET_BUILD_FOLDER'] = os.path.join(app.static_folder, 'build')
+ASSET_CACHE_MAX_AGE = 365 * 24 * 60 * 60
 
-    <!-- Ocean Payment Modal -->
-    <div id="paymentModal" class="modal">
-        <div class="modal-content">
-            <span class="close" onclick="closeModal('paymentModal')">&times;</span>
-            <div style="text-align: center; margin-bottom: 1.5rem;">
-                <div style="width: 60px; height: 60px; background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%); border-radius: 50%; display: flex; align-items: center; justify-content: center; margin: 0 auto 1rem;">
-                    <i class="fas fa-credit-card" style="color: white; font-size: 1.5rem;"></i>
-                </div>
-                <h2 style="margin-bottom: 0.5rem; color: var(--primary);">Pembayaran</h2>
-                <p style="color: var(--dark); opacity: 0.7;">Selesaikan pembayaran untuk melanjutkan</p>
-            </div>
-            
-            <div id="paymentInstructions" style="background: rgba(49, 130, 206, 0.05); padding: 1.5rem; border-radius: var(--border-radius); margin-bottom: 1.5rem;">
-                <!-- Instructions will be loaded here -->
-            </div>
-            
-            <div class="modal-buttons">
-                <button class="btn btn-success" onclick="showSuccessModal()" style="width: 100%;">
-                    <i class="fas fa-check-circle"></i>
-                    Sudah Bayar
-                </button>
-            </div>
-        </div>
-    </div>
+BASE_CSS = '''
+:root {
+    --shadow-sm: 0 2px 4px rgba(0,0,0,0.1);
+    --shadow-md: 0 4px 6px -1px rgba(0,0,0,0.1), 0 2px 4px -1px rgba(0,0,0,0.06);
+    --shadow-lg: 0 10px 15px -3px rgba(0,0,0,0.1), 0 4px 6px -2px rgba(0,0,0,0.05);
+    --shadow-xl: 0 20px 25px -5px rgba(0,0,0,0.1), 0 10px 10px -5px rgba(0,0,0,0.04);
+    --border-radius: 12px;
+    --border-radius-lg: 16px;
+    --border-radius-xl: 20px;
+}
 
-    <!-- Ocean Success Modal -->
-    <div id="successModal" class="modal">
-        <div class="modal-content">
-            <span class="close" onclick="closeModal('successModal')">&times;</span>
-            <div style="text-align: center;">
-                <div style="width: 80px; height: 80px; background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%); border-radius: 50%; display: flex; align-items: center; justify-content: center; margin: 0 auto 1.5rem;">
-                    <i class="fas fa-check" style="color: white; font-size: 2rem;"></i>
-                </div>
-                <h2 style="margin-bottom: 1rem; color: var(--success);">Sukses!</h2>
-                <p style="margin-bottom: 1rem; color: var(--dark);">Pembayaran berhasil dikonfirmasi</p>
-                <p style="color: var(--dark); opacity: 0.7; font-size: 0.9rem; margin-bottom: 2rem;">
-                    Pesanan Anda sedang diproses dan akan segera dikirim
-                </p>
-            </div>
-            
-            <div class="modal-buttons">
-                <button class="btn btn-success" onclick="closeModal('successModal'); window.location.href='/orders';" style="width: 100%;">
-                    <i class="fas fa-list"></i>
-                    Lihat Pesanan Saya
-                </button>
-                <button class="btn btn-primary" onclick="contactSeller()" style="width: 100%;">
-                    <i class="fab fa-whatsapp"></i>
-                    Hubungi Penjual
-                </button>
-            </div>
+* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    font-family: 'Inter', sans-serif;
+    background: linear-gradient(135deg, #f0f9ff 0%, #e6f3ff 100%);
+    color: var(--dark);
+    min-height: 100vh;
+    line-height: 1.6;
+}
+
+/* Ocean Navbar */
+.navbar {
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+    padding: 1rem 2rem;
+    position: sticky;
+    top: 0;
+    z-index: 1000;
+    box-shadow: var(--shadow-lg);
+}
+
+.nav-container {
+    max-width: 1400px;
+    margin: 0 auto;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+}
+
+.nav-brand {
+    font-family: 'Poppins', sans-serif;
+    font-size: 1.8rem;
+    font-weight: 800;
+    color: var(--white);
+    text-decoration: none;
+    display: flex;
+    align-items: center;
+    gap: 0.75rem;
+}
+
+.nav-links {
+    display: flex;
+    align-items: center;
+    gap: 1rem;
+}
+
+.nav-link {
+    color: var(--white);
+    text-decoration: none;
+    padding: 0.75rem 1.5rem;
+    border-radius: var(--border-radius);
+    transition: all 0.3s ease;
+    font-weight: 500;
+}
+
+.nav-link:hover {
+    background: rgba(255, 255, 255, 0.2);
+    transform: translateY(-2px);
+}
+
+.user-menu {
+    display: flex;
+    align-items: center;
+    gap: 1rem;
+    background: rgba(255, 255, 255, 0.2);
+    padding: 0.75rem 1.5rem;
+    border-radius: var(--border-radius);
+    backdrop-filter: blur(10px);
+}
+
+.avatar {
+    width: 45px;
+    height: 45px;
+    border-radius: 50%;
+    background: var(--ocean-medium);
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    font-size: 1.3rem;
+    color: var(--white);
+    box-shadow: var(--shadow-md);
+}
+
+.badge {
+    padding: 0.4rem 1rem;
+    border-radius: 25px;
+    font-size: 0.75rem;
+    font-weight: 600;
+    text-transform: uppercase;
+    background: var(--ocean-medium);
+    color: var(--white);
+    box-shadow: var(--shadow-sm);
+}
+
+.container {
+    max-width: 1400px;
+    margin: 0 auto;
+    padding: 2rem;
+}
+
+/* Ocean Cards */
+.card {
+    background: rgba(255, 255, 255, 0.9);
+    backdrop-filter: blur(10px);
+    border-radius: var(--border-radius-lg);
+    padding: 2rem;
+    box-shadow: var(--shadow-lg);
+    margin-bottom: 2rem;
+    border: 1px solid rgba(255, 255, 255, 0.3);
+    transition: all 0.3s ease;
+    position: relative;
+    overflow: hidden;
+}
+
+.card::before {
+    content: '';
+    position: absolute;
+    top: 0;
+    left: 0;
+    right: 0;
+    height: 4px;
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+}
+
+.card:hover {
+    transform: translateY(-5px);
+    box-shadow: var(--shadow-xl);
+}
+
+/* Ocean Buttons */
+.btn {
+    padding: 0.875rem 2rem;
+    border: none;
+    border-radius: var(--border-radius);
+    text-decoration: none;
+    display: inline-flex;
+    align-items: center;
+    gap: 0.75rem;
+    cursor: pointer;
+    transition: all 0.3s ease;
+    font-weight: 600;
+    font-size: 0.95rem;
+}
+
+.btn-primary {
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+    color: var(--white);
+    box-shadow: var(--shadow-md);
+}
+
+.btn-primary:hover {
+    transform: translateY(-2px);
+    box-shadow: var(--shadow-lg);
+}
+
+.btn-success { 
+    background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%);
+    color: var(--white);
+    box-shadow: var(--shadow-md);
+}
+
+.btn-warning { 
+    background: linear-gradient(135deg, var(--warning) 0%, #b7791f 100%);
+    color: var(--white);
+    box-shadow: var(--shadow-md);
+}
+
+.btn-danger { 
+    background: linear-gradient(135deg, var(--error) 0%, #c53030 100%);
+    color: var(--white);
+    box-shadow: var(--shadow-md);
+}
+
+.btn-info { 
+    background: linear-gradient(135deg, var(--ocean-medium) 0%, var(--teal) 100%);
+    color: var(--white);
+    box-shadow: var(--shadow-md);
+}
+
+.grid {
+    display: grid;
+    gap: 2rem;
+}
+
+.grid-2 { grid-template-columns: repeat(auto-fit, minmax(400px, 1fr)); }
+.grid-3 { grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); }
+.grid-4 { grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); }
+
+/* Ocean Hero Section */
+.hero {
+    text-align: center;
+    padding: 5rem 2rem;
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+    border-radius: var(--border-radius-xl);
+    margin-bottom: 3rem;
+    color: var(--white);
+    position: relative;
+    overflow: hidden;
+}
+
+.hero::before {
+    content: '';
+    position: absolute;
+    top: 0;
+    left: 0;
+    right: 0;
+    bottom: 0;
+    background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 1000"><polygon fill="rgba(255,255,255,0.05)" points="0,1000 1000,0 1000,1000"/></svg>');
+}
+
+.hero h1 {
+    font-size: 3.5rem;
+    margin-bottom: 1.5rem;
+    font-family: 'Poppins', sans-serif;
+    font-weight: 800;
+}
+
+.hero p {
+    font-size: 1.25rem;
+    margin-bottom: 2rem;
+    opacity: 0.9;
+}
+
+/* Ocean Stats */
+.stats {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+    gap: 1.5rem;
+    margin: 3rem 0;
+}
+
+.stat-card {
+    background: linear-gradient(135deg, var(--white) 0%, var(--ocean-light) 100%);
+    padding: 2.5rem 2rem;
+    border-radius: var(--border-radius-lg);
+    text-align: center;
+    box-shadow: var(--shadow-lg);
+    border: 1px solid rgba(255, 255, 255, 0.5);
+    transition: all 0.3s ease;
+    position: relative;
+    overflow: hidden;
+}
+
+.stat-card::before {
+    content: '';
+    position: absolute;
+    top: 0;
+    left: 0;
+    right: 0;
+    height: 4px;
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+}
+
+.stat-card:hover {
+    transform: translateY(-5px);
+    box-shadow: var(--shadow-xl);
+}
+
+.stat-number {
+    font-family: 'Poppins', sans-serif;
+    font-size: 2.5rem;
+    font-weight: 800;
+    color: var(--primary);
+    margin-bottom: 0.5rem;
+}
+
+.price {
+    font-family: 'Poppins', sans-serif;
+    font-size: 2rem;
+    font-weight: 700;
+    color: var(--primary);
+}
+
+/* Ocean Tables */
+.table {
+    width: 100%;
+    border-collapse: collapse;
+    background: var(--white);
+    border-radius: var(--border-radius);
+    overflow: hidden;
+    box-shadow: var(--shadow-lg);
+}
+
+.table th, .table td {
+    padding: 1.25rem;
+    text-align: left;
+    border-bottom: 1px solid rgba(0,0,0,0.05);
+}
+
+.table th {
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+    color: var(--white);
+    font-weight: 600;
+    font-size: 0.9rem;
+    text-transform: uppercase;
+    letter-spacing: 0.5px;
+}
+
+.table tr:hover {
+    background: rgba(49, 130, 206, 0.05);
+}
+
+/* Ocean Forms */
+.form-group {
+    margin-bottom: 1.75rem;
+}
+
+.form-label {
+    display: block;
+    margin-bottom: 0.75rem;
+    font-weight: 600;
+    color: var(--dark);
+    font-size: 0.95rem;
+}
+
+.form-control {
+    width: 100%;
+    padding: 1rem 1.25rem;
+    border: 2px solid rgba(0,0,0,0.1);
+    border-radius: var(--border-radius);
+    font-size: 1rem;
+    transition: all 0.3s ease;
+    background: rgba(255, 255, 255, 0.8);
+    font-family: 'Inter', sans-serif;
+}
+
+.form-control:focus {
+    outline: none;
+    border-color: var(--ocean-medium);
+    box-shadow: 0 0 0 3px rgba(49, 130, 206, 0.1);
+    background: var(--white);
+}
+
+/* Ocean Tabs */
+.accounting-tabs {
+    display: flex;
+    gap: 0.5rem;
+    margin-bottom: 2rem;
+    background: rgba(255, 255, 255, 0.6);
+    padding: 0.5rem;
+    border-radius: var(--border-radius);
+    backdrop-filter: blur(10px);
+}
+
+.tab {
+    padding: 1rem 2rem;
+    background: transparent;
+    border: none;
+    border-radius: var(--border-radius);
+    cursor: pointer;
+    font-weight: 600;
+    color: var(--dark);
+    transition: all 0.3s ease;
+    position: relative;
+}
+
+.tab.active {
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+    color: var(--white);
+    box-shadow: var(--shadow-md);
+}
+
+.tab-content {
+    display: none;
+}
+
+.tab-content.active {
+    display: block;
+    animation: fadeIn 0.5s ease;
+}
+
+@keyframes fadeIn {
+    from { opacity: 0; transform: translateY(10px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+
+.debit { 
+    color: var(--success); 
+    font-weight: 600;
+    background: rgba(56, 161, 105, 0.1);
+    padding: 0.5rem 1rem;
+    border-radius: var(--border-radius);
+}
+
+.credit { 
+    color: var(--error); 
+    font-weight: 600;
+    background: rgba(229, 62, 62, 0.1);
+    padding: 0.5rem 1rem;
+    border-radius: var(--border-radius);
+}
+
+/* Product Cards */
+.product-image {
+    width: 100%;
+    height: 220px;
+    object-fit: cover;
+    border-radius: var(--border-radius);
+    margin-bottom: 1.5rem;
+    transition: transform 0.3s ease;
+    box-shadow: var(--shadow-md);
+}
+
+.product-card:hover .product-image {
+    transform: scale(1.05);
+}
+
+/* Tracking Steps */
+.tracking-steps {
+    display: flex;
+    justify-content: space-between;
+    margin: 2rem 0;
+    position: relative;
+}
+
+.tracking-steps::before {
+    content: '';
+    position: absolute;
+    top: 25px;
+    left: 0;
+    right: 0;
+    height: 3px;
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+    z-index: 1;
+    border-radius: 10px;
+}
+
+.tracking-step {
+    text-align: center;
+    position: relative;
+    z-index: 2;
+    flex: 1;
+}
+
+.step-icon {
+    width: 50px;
+    height: 50px;
+    border-radius: 50%;
+    background: var(--ocean-light);
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    margin: 0 auto 0.75rem;
+    transition: all 0.3s ease;
+    font-size: 1.25rem;
+    box-shadow: var(--shadow-md);
+    border: 3px solid var(--white);
+}
+
+.step-active {
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+    color: var(--white);
+    transform: scale(1.1);
+}
+
+.step-completed {
+    background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%);
+    color: var(--white);
+}
+
+/* Google Button */
+.google-btn {
+    background: #4285F4;
+    color: white;
+    width: 100%;
+    justify-content: center;
+    margin-top: 1rem;
+    box-shadow: var(--shadow-md);
+}
+
+.google-btn:hover {
+    background: #357ae8;
+    transform: translateY(-2px);
+    box-shadow: var(--shadow-lg);
+}
+
+/* Divider */
+.divider {
+    text-align: center;
+    margin: 1.5rem 0;
+    position: relative;
+}
+
+.divider::before {
+    content: '';
+    position: absolute;
+    top: 50%;
+    left: 0;
+    right: 0;
+    height: 1px;
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+}
+
+.divider span {
+    background: var(--white);
+    padding: 0 1.5rem;
+    position: relative;
+    color: var(--dark);
+    font-weight: 500;
+}
+
+/* Flash Messages */
+.flash-messages {
+    position: fixed;
+    top: 100px;
+    right: 20px;
+    z-index: 10000;
+}
+
+.flash-message {
+    padding: 1.25rem 1.75rem;
+    border-radius: var(--border-radius);
+    margin-bottom: 0.75rem;
+    font-weight: 500;
+    box-shadow: var(--shadow-xl);
+    backdrop-filter: blur(20px);
+    border: 1px solid rgba(255, 255, 255, 0.2);
+    animation: slideInRight 0.5s ease;
+}
+
+@keyframes slideInRight {
+    from { transform: translateX(100%); opacity: 0; }
+    to { transform: translateX(0); opacity: 1; }
+}
+
+.flash-success { 
+    background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%);
+    color: white;
+}
+
+.flash-error { 
+    background: linear-gradient(135deg, var(--error) 0%, #c53030 100%);
+    color: white;
+}
+
+.flash-warning { 
+    background: linear-gradient(135deg, var(--warning) 0%, #b7791f 100%);
+    color: white;
+}
+
+/* Logo Styling */
+.navbar-logo {
+    width: 45px;
+    height: 45px;
+    border-radius: 12px;
+    object-fit: cover;
+    margin-right: 12px;
+    box-shadow: var(--shadow-md);
+    border: 2px solid rgba(255, 255, 255, 0.3);
+}
+
+/* Ocean Modal Styles */
+.modal {
+    display: none;
+    position: fixed;
+    z-index: 10000;
+    left: 0;
+    top: 0;
+    width: 100%;
+    height: 100%;
+    background-color: rgba(0,0,0,0.5);
+    backdrop-filter: blur(10px);
+}
+
+.modal-content {
+    background: rgba(255, 255, 255, 0.95);
+    backdrop-filter: blur(20px);
+    margin: 10% auto;
+    padding: 2.5rem;
+    border-radius: var(--border-radius-xl);
+    width: 90%;
+    max-width: 500px;
+    box-shadow: var(--shadow-xl);
+    border: 1px solid rgba(255, 255, 255, 0.3);
+    position: relative;
+    animation: modalSlideIn 0.3s ease;
+}
+
+@keyframes modalSlideIn {
+    from { transform: translateY(-50px); opacity: 0; }
+    to { transform: translateY(0); opacity: 1; }
+}
+
+.close {
+    color: #aaa;
+    float: right;
+    font-size: 28px;
+    font-weight: bold;
+    cursor: pointer;
+    position: absolute;
+    right: 1.5rem;
+    top: 1.5rem;
+    transition: color 0.3s ease;
+}
+
+.close:hover {
+    color: var(--error);
+}
+
+.modal-buttons {
+    display: flex;
+    gap: 1rem;
+    margin-top: 2rem;
+}
+
+.modal-buttons .btn {
+    flex: 1;
+}
+
+/* Status Badges */
+.status-text {
+    padding: 0.5rem 1rem;
+    border-radius: 25px;
+    font-weight: 600;
+    display: inline-block;
+    font-size: 0.85rem;
+    text-transform: uppercase;
+    letter-spacing: 0.5px;
+    box-shadow: var(--shadow-sm);
+}
+
+.status-pending { 
+    background: linear-gradient(135deg, var(--warning) 0%, #b7791f 100%);
+    color: white;
+}
+
+.status-processing { 
+    background: linear-gradient(135deg, var(--ocean-medium) 0%, var(--ocean-deep) 100%);
+    color: white;
+}
+
+.status-completed { 
+    background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%);
+    color: white;
+}
+
+.status-cancelled { 
+    background: linear-gradient(135deg, var(--error) 0%, #c53030 100%);
+    color: white;
+}
+
+.status-paid { 
+    background: linear-gradient(135deg, var(--success) 0%, var(--teal) 100%);
+    color: white;
+}
+
+.status-unpaid { 
+    background: linear-gradient(135deg, var(--error) 0%, #c53030 100%);
+    color: white;
+}
+
+/* Floating Action Button */
+.fab {
+    position: fixed;
+    bottom: 2rem;
+    right: 2rem;
+    width: 60px;
+    height: 60px;
+    border-radius: 50%;
+    background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%);
+    color: white;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    font-size: 1.5rem;
+    box-shadow: var(--shadow-xl);
+    cursor: pointer;
+    z-index: 1000;
+    transition: all 0.3s ease;
+    text-decoration: none;
+}
+
+.fab:hover {
+    transform: scale(1.1);
+}
+
+/* Loading Animation */
+.loading {
+    display: inline-block;
+    width: 20px;
+    height: 20px;
+    border: 3px solid rgba(255,255,255,.3);
+    border-radius: 50%;
+    border-top-color: #fff;
+    animation: spin 1s ease-in-out infinite;
+}
+
+@keyframes spin {
+    to { transform: rotate(360deg); }
+}
+
+/* Responsive Design */
+@media (max-width: 768px) {
+    .nav-links {
+        flex-direction: column;
+        gap: 0.5rem;
+    }
+    
+    .hero h1 {
+        font-size: 2.5rem;
+    }
+    
+    .grid-2, .grid-3, .grid-4 {
+        grid-template-columns: 1fr;
+    }
+    
+    .container {
+        padding: 1rem;
+    }
+    
+    .stats {
+        grid-template-columns: 1fr;
+    }
+}
+'''
+
+BASE_JS = '''
+// Ocean JavaScript Functions
+function addToCart(productId) {
+    console.log('🛒 Adding product to cart:', productId);
+    
+    if (!productId) {
+        showNotification('Product ID tidak valid', 'error');
+        return;
+    }
+    
+    const button = event.target;
+    const originalText = button.innerHTML;
+    
+    // Show loading state
+    button.innerHTML = '<div class="loading"></div> Menambahkan...';
+    button.disabled = true;
+    
+    const cartData = {
+        product_id: parseInt(productId),
+        quantity: 1
+    };
+    
+    fetch('/api/cart/add', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        },
+        body: JSON.stringify(cartData)
+    })
+    .then(response => {
+        if (!response.ok) {
+            return response.json().then(errorData => {
+                throw new Error(errorData.message || `HTTP error! status: ${response.status}`);
+            });
+        }
+        return response.json();
+    })
+    .then(data => {
+        if (data.success) {
+            showNotification('✅ ' + data.message, 'success');
+            updateCartCount(data.cart_count);
+        } else {
+            showNotification('❌ ' + data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Fetch error:', error);
+        let errorMessage = 'Gagal menambahkan ke keranjang';
+        
+        if (error.message.includes('HTTP error! status: 403')) {
+            errorMessage = 'Hanya customer yang bisa menambah ke keranjang';
+        } else if (error.message.includes('HTTP error! status: 404')) {
+            errorMessage = 'Produk tidak ditemukan';
+        } else if (error.message.includes('HTTP error! status: 400')) {
+            errorMessage = 'Stock tidak mencukupi';
+        }
+        
+        showNotification('❌ ' + errorMessage, 'error');
+    })
+    .finally(() => {
+        setTimeout(() => {
+            button.innerHTML = originalText;
+            button.disabled = false;
+        }, 1000);
+    });
+}
+
+function showTab(tabName, element) {
+    document.querySelectorAll('.tab-content').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    document.querySelectorAll('.tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    const tab = document.getElementById(tabName);
+    tab.classList.add('active');
+    element.classList.add('active');
+    loadTabContent(tab);
+}
+
+function loadTabContent(tab) {
+    // Isi tab yang berat baru diambil dari server saat tab pertama kali dibuka
+    tab.querySelectorAll('[data-tab-src]').forEach(container => {
+        const src = container.dataset.tabSrc;
+        container.removeAttribute('data-tab-src');
+        fetch(src)
+            .then(response => {
+                if (!response.ok) throw new Error(response.status);
+                return response.text();
+            })
+            .then(html => {
+                container.innerHTML = html;
+            })
+            .catch(() => {
+                container.setAttribute('data-tab-src', src);
+                container.innerHTML = '<p>Gagal memuat data. Silakan buka tab ini lagi.</p>';
+            });
+    });
+}
+
+function showNotification(message, type) {
+    const notification = document.createElement('div');
+    notification.className = `flash-message flash-${type}`;
+    notification.innerHTML = `
+        <div style="display: flex; align-items: center; gap: 0.75rem;">
+            <i class="fas fa-${type === 'success' ? 'check-circle' : 'exclamation-circle'}"></i>
+            <span>${message}</span>
         </div>
-    </div>
+    `;
     
-    <script>
-        // Ocean JavaScript Functions
-        function addToCart(productId) {{
-            console.log('🛒 Adding product to cart:', productId);
-            
-            if (!productId) {{
-                showNotification('Product ID tidak valid', 'error');
-                return;
-            }}
-            
-            const button = event.target;
-            const originalText = button.innerHTML;
-            
-            // Show loading state
-            button.innerHTML = '<div class="loading"></div> Menambahkan...';
-            button.disabled = true;
-            
-            const cartData = {{
-                product_id: parseInt(productId),
-                quantity: 1
-            }};
-            
-            fetch('/api/cart/add', {{
-                method: 'POST',
-                headers: {{
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json'
-                }},
-                body: JSON.stringify(cartData)
-            }})
-            .then(response => {{
-                if (!response.ok) {{
-                    return response.json().then(errorData => {{
-                        throw new Error(errorData.message || `HTTP error! status: ${{response.status}}`);
-                    }});
-                }}
-                return response.json();
-            }})
-            .then(data => {{
-                if (data.success) {{
-                    showNotification('✅ ' + data.message, 'success');
-                    updateCartCount();
-                }} else {{
-                    showNotification('❌ ' + data.message, 'error');
-                }}
-            }})
-            .catch(error => {{
-                console.error('Fetch error:', error);
-                let errorMessage = 'Gagal menambahkan ke keranjang';
-                
-                if (error.message.includes('HTTP error! status: 403')) {{
-                    errorMessage = 'Hanya customer yang bisa menambah ke keranjang';
-                }} else if (error.message.includes('HTTP error! status: 404')) {{
-                    errorMessage = 'Produk tidak ditemukan';
-                }} else if (error.message.includes('HTTP error! status: 400')) {{
-                    errorMessage = 'Stock tidak mencukupi';
-                }}
-                
-                showNotification('❌ ' + errorMessage, 'error');
-            }})
-            .finally(() => {{
-                setTimeout(() => {{
-                    button.innerHTML = originalText;
-                    button.disabled = false;
-                }}, 1000);
-            }});
-        }}
-        
-        function showTab(tabName, element) {{
-            document.querySelectorAll('.tab-content').forEach(tab => {{
-                tab.classList.remove('active');
-            }});
-            document.querySelectorAll('.tab').forEach(tab => {{
-                tab.classList.remove('active');
-            }});
-            document.getElementById(tabName).classList.add('active');
-            element.classList.add('active');
-        }}
-        
-        function showNotification(message, type) {{
-            const notification = document.createElement('div');
-            notification.className = `flash-message flash-${{type}}`;
-            notification.innerHTML = `
-                <div style="display: flex; align-items: center; gap: 0.75rem;">
-                    <i class="fas fa-${{type === 'success' ? 'check-circle' : 'exclamation-circle'}}"></i>
-                    <span>${{message}}</span>
-                </div>
-            `;
-            
-            const flashContainer = document.querySelector('.flash-messages');
-            flashContainer.appendChild(notification);
-            
-            setTimeout(() => {{
-                notification.style.animation = 'slideInRight 0.5s ease reverse';
-                setTimeout(() => {{
-                    flashContainer.removeChild(notification);
-                }}, 500);
-            }}, 4000);
-        }}
-        
-        function checkout() {{
-            window.location.href = '/checkout';
-        }}
-        
-        function processCheckout() {{
-            const shippingAddress = document.getElementById('shipping_address').value;
-            const shippingMethod = document.getElementById('shipping_method').value;
-            const paymentMethod = document.getElementById('payment_method').value;
-            
-            if (!shippingAddress) {{
-                showNotification('Harap isi alamat pengiriman!', 'error');
-                return;
-            }}
-            
-            if (!shippingMethod) {{
-                showNotification('Harap pilih metode pengiriman!', 'error');
-                return;
-            }}
-            
-            if (!paymentMethod) {{
-                showNotification('Harap pilih metode pembayaran!', 'error');
-                return;
-            }}
-            
-            const formData = new FormData();
-            formData.append('shipping_address', shippingAddress);
-            formData.append('shipping_method', shippingMethod);
-            formData.append('payment_method', paymentMethod);
-            
-            fetch('/process_checkout', {{
-                method: 'POST',
-                body: formData
-            }})
-            .then(response => response.json())
-            .then(data => {{
-                if (data.success) {{
-                    showPaymentModal(data.order_number, data.payment_method, data.total_amount);
-                }} else {{
-                    showNotification('❌ ' + data.message, 'error');
-                }}
-            }});
-        }}
-
-        function showPaymentModal(orderNumber, paymentMethod, totalAmount) {{
-            const paymentInstructions = {{
-                'bri': `
-                    <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-university"></i> Transfer Bank BRI</h4>
-                    <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid var(--primary);">
-                        <p style="margin: 0.5rem 0;"><strong>No. Rekening:</strong> 1234567890</p>
-                        <p style="margin: 0.5rem 0;"><strong>Atas Nama:</strong> Kang-Mas Shop</p>
-                        <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${{totalAmount.toLocaleString()}}</span></p>
-                    </div>
-                `,
-                'bca': `
-                    <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-university"></i> Transfer Bank BCA</h4>
-                    <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid var(--primary);">
-                        <p style="margin: 0.5rem 0;"><strong>No. Rekening:</strong> 0987654321</p>
-                        <p style="margin: 0.5rem 0;"><strong>Atas Nama:</strong> Kang-Mas Shop</p>
-                        <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${{totalAmount.toLocaleString()}}</span></p>
-                    </div>
-                `,
-                'mandiri': `
-                    <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-university"></i> Transfer Bank Mandiri</h4>
-                    <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid var(--primary);">
-                        <p style="margin: 0.5rem 0;"><strong>No. Rekening:</strong> 1122334455</p>
-                        <p style="margin: 0.5rem 0;"><strong>Atas Nama:</strong> Kang-Mas Shop</p>
-                        <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${{totalAmount.toLocaleString()}}</span></p>
-                    </div>
-                `,
-                'qris': `
-                    <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-qrcode"></i> QRIS</h4>
-                    <div style="text-align: center; margin: 1rem 0;">
-                        <div style="background: white; padding: 1.5rem; border-radius: var(--border-radius); display: inline-block;">
-                            <div style="width: 200px; height: 200px; background: linear-gradient(45deg, var(--primary), var(--ocean-deep)); border-radius: var(--border-radius); display: flex; align-items: center; justify-content: center; color: white; font-size: 3rem;">
-                                <i class="fas fa-qrcode"></i>
-                            </div>
-                        </div>
-                    </div>
-                    <p style="text-align: center; color: var(--success); font-weight: bold; font-size: 1.1rem;">Total: Rp ${{totalAmount.toLocaleString()}}</p>
-                `,
-                'gopay': `
-                    <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-mobile-alt"></i> Gopay</h4>
-                    <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid #00AA13;">
-                        <p style="margin: 0.5rem 0;"><strong>No. HP:</strong> +6289654733875</p>
-                        <p style="margin: 0.5rem 0;"><strong>Atas Nama:</strong> Kang-Mas Shop</p>
-                        <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${{totalAmount.toLocaleString()}}</span></p>
-                    </div>
-                `,
-                'dana': `
-                    <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-wallet"></i> Dana</h4>
-                    <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid #00B2FF;">
-                        <p style="margin: 0.5rem 0;"><strong>No. HP:</strong> +6289654733875</p>
-                        <p style="margin: 0.5rem 0;"><strong>Atas Nama:</strong> Kang-Mas Shop</p>
-                        <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${{totalAmount.toLocaleString()}}</span></p>
-                    </div>
-                `,
-                'cod': `
-                    <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-money-bill-wave"></i> Cash on Delivery</h4>
-                    <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid var(--success);">
-                        <p style="margin: 0.5rem 0;">Bayar ketika pesanan diterima</p>
-                        <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${{totalAmount.toLocaleString()}}</span></p>
+    const flashContainer = document.querySelector('.flash-messages');
+    flashContainer.appendChild(notification);
+    
+    setTimeout(() => {
+        notification.style.animation = 'slideInRight 0.5s ease reverse';
+        setTimeout(() => {
+            flashContainer.removeChild(notification);
+        }, 500);
+    }, 4000);
+}
+
+function importCatalog(form) {
+    const report = document.getElementById('import-report');
+    report.innerHTML = '<div class="loading"></div> Mengimpor...';
+    
+    fetch('/seller/products/import', {
+        method: 'POST',
+        body: new FormData(form)
+    })
+    .then(response => response.json())
+    .then(data => {
+        showNotification((data.success ? '✅ ' : '❌ ') + data.message, data.success ? 'success' : 'error');
+        // Pesan error bisa memuat isi sel CSV: dipasang sebagai teks, bukan HTML
+        const lines = (data.errors || []).map(error => `Baris ${error.line}: ${error.message}`);
+        if (data.error_count > lines.length) {
+            lines.push(`... dan ${data.error_count - lines.length} baris lainnya`);
+        }
+        report.innerHTML = '';
+        if (lines.length) {
+            const list = document.createElement('ul');
+            list.style.marginTop = '1rem';
+            lines.forEach(line => {
+                const item = document.createElement('li');
+                item.textContent = line;
+                list.appendChild(item);
+            });
+            report.appendChild(list);
+        }
+    })
+    .catch(() => {
+        report.innerHTML = '';
+        showNotification('❌ Gagal mengimpor file', 'error');
+    });
+}
+
+// Perubahan quantity di halaman keranjang dikumpulkan lalu dikirim sekali ke /api/cart/batch
+let pendingCartOperations = [];
+let cartBatchTimer = null;
+
+function setCartQuantity(productId, quantity) {
+    pendingCartOperations = pendingCartOperations.filter(operation => operation.product_id !== productId);
+    pendingCartOperations.push({op: 'set', product_id: productId, quantity: Math.max(parseInt(quantity) || 0, 0)});
+    clearTimeout(cartBatchTimer);
+    cartBatchTimer = setTimeout(flushCartOperations, 400);
+}
+
+function flushCartOperations() {
+    const operations = pendingCartOperations;
+    pendingCartOperations = [];
+    if (!operations.length) return;
+    
+    fetch('/api/cart/batch', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        },
+        body: JSON.stringify({operations: operations})
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            showNotification('❌ ' + data.message, 'error');
+            setTimeout(() => location.reload(), 1000);
+            return;
+        }
+        renderCartSummary(data.cart);
+    })
+    .catch(() => showNotification('❌ Gagal memperbarui keranjang', 'error'));
+}
+
+function renderCartSummary(cart) {
+    const formatRupiah = value => Math.round(value).toLocaleString('en-US');
+    let missing = false;
+    document.querySelectorAll('[id^="cart-subtotal-"]').forEach(element => {
+        const productId = parseInt(element.id.replace('cart-subtotal-', ''));
+        const item = cart.items.find(item => item.product_id === productId);
+        if (item) {
+            element.textContent = formatRupiah(item.subtotal);
+        } else {
+            missing = true;
+        }
+    });
+    const total = document.getElementById('cart-total');
+    if (total) total.textContent = formatRupiah(cart.total);
+    updateCartCount(cart.count);
+    // Item yang dihapus (quantity 0): muat ulang supaya daftarnya ikut hilang
+    if (missing) location.reload();
+}
+
+function checkout() {
+    window.location.href = '/checkout';
+}
+
+function processCheckout() {
+    const shippingAddress = document.getElementById('shipping_address').value;
+    const shippingMethod = document.getElementById('shipping_method').value;
+    const paymentMethod = document.getElementById('payment_method').value;
+    
+    if (!shippingAddress) {
+        showNotification('Harap isi alamat pengiriman!', 'error');
+        return;
+    }
+    
+    if (!shippingMethod) {
+        showNotification('Harap pilih metode pengiriman!', 'error');
+        return;
+    }
+    
+    if (!paymentMethod) {
+        showNotification('Harap pilih metode pembayaran!', 'error');
+        return;
+    }
+    
+    const formData = new FormData();
+    formData.append('shipping_address', shippingAddress);
+    formData.append('shipping_method', shippingMethod);
+    formData.append('payment_method', paymentMethod);
+    
+    fetch('/process_checkout', {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showPaymentModal(data.order_number, data.payment_method, data.total_amount);
+        } else {
+            showNotification('❌ ' + data.message, 'error');
+        }
+    });
+}
+
+function showPaymentModal(orderNumber, paymentMethod, totalAmount) {
+    const paymentInstructions = {
+        'bri': `
+            <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-university"></i> Transfer Bank BRI</h4>
+            <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid var(--primary);">
+                <p style="margin: 0.5rem 0;"><strong>No. Rekening:</strong> 1234567890</p>
+                <p style="margin: 0.5rem 0;"><strong>Atas Nama:</strong> Kang-Mas Shop</p>
+                <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${totalAmount.toLocaleString()}</span></p>
+            </div>
+        `,
+        'bca': `
+            <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-university"></i> Transfer Bank BCA</h4>
+            <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid var(--primary);">
+                <p style="margin: 0.5rem 0;"><strong>No. Rekening:</strong> 0987654321</p>
+                <p style="margin: 0.5rem 0;"><strong>Atas Nama:</strong> Kang-Mas Shop</p>
+                <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${totalAmount.toLocaleString()}</span></p>
+            </div>
+        `,
+        'mandiri': `
+            <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-university"></i> Transfer Bank Mandiri</h4>
+            <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid var(--primary);">
+                <p style="margin: 0.5rem 0;"><strong>No. Rekening:</strong> 1122334455</p>
+                <p style="margin: 0.5rem 0;"><strong>Atas Nama:</strong> Kang-Mas Shop</p>
+                <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${totalAmount.toLocaleString()}</span></p>
+            </div>
+        `,
+        'qris': `
+            <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-qrcode"></i> QRIS</h4>
+            <div style="text-align: center; margin: 1rem 0;">
+                <div style="background: white; padding: 1.5rem; border-radius: var(--border-radius); display: inline-block;">
+                    <div style="width: 200px; height: 200px; background: linear-gradient(45deg, var(--primary), var(--ocean-deep)); border-radius: var(--border-radius); display: flex; align-items: center; justify-content: center; color: white; font-size: 3rem;">
+                        <i class="fas fa-qrcode"></i>
                     </div>
-                `
-            }};
-
-            document.getElementById('paymentInstructions').innerHTML = paymentInstructions[paymentMethod] || '<p>Silakan selesaikan pembayaran</p>';
-            document.getElementById('paymentModal').style.display = 'block';
-            window.currentOrderNumber = orderNumber;
-            window.currentPaymentMethod = paymentMethod;
-            window.currentTotalAmount = totalAmount;
-        }}
-
-        function showSuccessModal() {{
-            closeModal('paymentModal');
-            document.getElementById('successModal').style.display = 'block';
-            confirmPayment();
-        }}
-
-        function closeModal(modalId) {{
-            document.getElementById(modalId).style.display = 'none';
-        }}
-
-        function contactSeller() {{
-            const orderNumber = window.currentOrderNumber;
-            const totalAmount = window.currentTotalAmount;
-            
-            const message = `Hai Kak, saya telah melakukan pembayaran untuk:
+                </div>
+            </div>
+            <p style="text-align: center; color: var(--success); font-weight: bold; font-size: 1.1rem;">Total: Rp ${totalAmount.toLocaleString()}</p>
+        `,
+        'gopay': `
+            <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-mobile-alt"></i> Gopay</h4>
+            <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid #00AA13;">
+                <p style="margin: 0.5rem 0;"><strong>No. HP:</strong> +6289654733875</p>
+                <p style="margin: 0.5rem 0;"><strong>Atas Nama:</strong> Kang-Mas Shop</p>
+                <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${totalAmount.toLocaleString()}</span></p>
+            </div>
+        `,
+        'dana': `
+            <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-wallet"></i> Dana</h4>
+            <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid #00B2FF;">
+                <p style="margin: 0.5rem 0;"><strong>No. HP:</strong> +6289654733875</p>
+                <p style="margin: 0.5rem 0;"><strong>Atas Nama:</strong> Kang-Mas Shop</p>
+                <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${totalAmount.toLocaleString()}</span></p>
+            </div>
+        `,
+        'cod': `
+            <h4 style="margin-bottom: 1rem; color: var(--primary);"><i class="fas fa-money-bill-wave"></i> Cash on Delivery</h4>
+            <div style="background: white; padding: 1rem; border-radius: var(--border-radius); border-left: 4px solid var(--success);">
+                <p style="margin: 0.5rem 0;">Bayar ketika pesanan diterima</p>
+                <p style="margin: 0.5rem 0;"><strong>Total:</strong> <span style="color: var(--success); font-weight: bold;">Rp ${totalAmount.toLocaleString()}</span></p>
+            </div>
+        `
+    };
 
-🛍️ Order #: ${{orderNumber}}
-💰 Total: Rp ${{totalAmount.toLocaleString()}}
+    document.getElementById('paymentInstructions').innerHTML = paymentInstructions[paymentMethod] || '<p>Silakan selesaikan pembayaran</p>';
+    document.getElementById('paymentModal').style.display = 'block';
+    window.currentOrderNumber = orderNumber;
+    window.currentPaymentMethod = paymentMethod;
+    window.currentTotalAmount = totalAmount;
+}
+
+function showSuccessModal() {
+    closeModal('paymentModal');
+    document.getElementById('successModal').style.display = 'block';
+    confirmPayment();
+}
+
+function closeModal(modalId) {
+    document.getElementById(modalId).style.display = 'none';
+}
+
+function contactSeller() {
+    const orderNumber = window.currentOrderNumber;
+    const totalAmount = window.currentTotalAmount;
+    
+    const message = `Hai Kak, saya telah melakukan pembayaran untuk:
+
+🛍️ Order #: ${orderNumber}
+💰 Total: Rp ${totalAmount.toLocaleString()}
 
 Mohon konfirmasi pembayaran saya ya. Terima kasih! 😊`;
-            
-            const phone = '+6285876127696';
-            const url = 'https://wa.me/' + phone + '?text=' + encodeURIComponent(message);
-            window.open(url, '_blank');
-            
-            // Konfirmasi pembayaran di sistem
-            confirmPayment();
-            
-            // Tutup modal
-            closeModal('paymentModal');
-            closeModal('successModal');
-            
-            showNotification('✅ Pembayaran dikonfirmasi! Pesanan sedang diproses.', 'success');
-            
-            setTimeout(() => {{
-                window.location.href = '/orders';
-            }}, 2000);
-        }}
-
-        function confirmPayment() {{
-            fetch('/confirm_payment/' + window.currentOrderNumber, {{
-                method: 'POST'
-            }})
-            .then(response => response.json())
-            .then(data => {{
-                if (data.success) {{
-                    console.log('Payment confirmed successfully');
-                }}
-            }});
-        }}
-        
-        function updateCartCount() {{
-            fetch('/api/cart/count')
-                .then(response => response.json())
-                .then(data => {{
-                    const cartBadge = document.getElementById('cart-count');
-                    const cartFab = document.getElementById('cart-count-fab');
-                    
-                    if (cartBadge) {{
-                        cartBadge.textContent = data.count;
-                        cartBadge.style.display = data.count > 0 ? 'flex' : 'none';
-                    }}
-                    
-                    if (cartFab) {{
-                        cartFab.textContent = data.count;
-                        cartFab.style.display = data.count > 0 ? 'flex' : 'none';
-                    }}
-                }});
-        }}
-        
-        function updateTracking(orderId, status) {{
-            fetch('/update_tracking/' + orderId, {{
-                method: 'POST',
-                headers: {{
-                    'Content-Type': 'application/json',
-                }},
-                body: JSON.stringify({{
-                    status: status,
-                    tracking_info: document.getElementById('tracking-info-' + orderId).value
-                }})
-            }})
-            .then(response => response.json())
-            .then(data => {{
-                if (data.success) {{
-                    showNotification('✅ Status pengiriman diperbarui!', 'success');
-                    setTimeout(() => location.reload(), 1000);
-                }} else {{
-                    showNotification('❌ ' + data.message, 'error');
-                }}
-            }});
-        }}
-        
-        function loadTransactionTemplate() {{
-            const templateKey = document.getElementById('transaction_template').value;
-            if (!templateKey) return;
-            
-            fetch('/api/get_transaction_template/' + templateKey)
-                .then(response => response.json())
-                .then(data => {{
-                    if (data.success) {{
-                        const formContainer = document.getElementById('templateFormContainer');
-                        formContainer.innerHTML = data.form_html;
-                    }} else {{
-                        showNotification('❌ ' + data.message, 'error');
-                    }}
-                }});
-        }}
-        
-        function submitTemplateJournal() {{
-            const formData = new FormData(document.getElementById('templateJournalForm'));
-            const data = {{
-                template_key: formData.get('template_key'),
-                date: formData.get('date'),
-                amounts: {{}}
-            }};
-            
-            // Collect amounts from form
-            document.querySelectorAll('[id^="amount_"]').forEach(input => {{
-                const accountType = input.id.replace('amount_', '');
-                data.amounts[accountType] = parseFloat(input.value) || 0;
-            }});
-            
-            fetch('/seller/add_template_journal', {{
-                method: 'POST',
-                headers: {{
-                    'Content-Type': 'application/json',
-                }},
-                body: JSON.stringify(data)
-            }})
+    
+    const phone = '+6285876127696';
+    const url = 'https://wa.me/' + phone + '?text=' + encodeURIComponent(message);
+    window.open(url, '_blank');
+    
+    // Konfirmasi pembayaran di sistem
+    confirmPayment();
+    
+    // Tutup modal
+    closeModal('paymentModal');
+    closeModal('successModal');
+    
+    showNotification('✅ Pembayaran dikonfirmasi! Pesanan sedang diproses.', 'success');
+    
+    setTimeout(() => {
+        window.location.href = '/orders';
+    }, 2000);
+}
+
+function confirmPayment() {
+    fetch('/confirm_payment/' + window.currentOrderNumber, {
+        method: 'POST'
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            console.log('Payment confirmed successfully');
+        }
+    });
+}
+
+function updateCartCount(count) {
+    // Jumlah awal sudah dirender server di navigasi; setelah keranjang berubah
+    // pakai jumlah dari response, atau ambil ulang jika tidak ada
+    if (count === undefined) {
+        fetch('/api/cart/count')
             .then(response => response.json())
-            .then(data => {{
-                if (data.success) {{
-                    showNotification('✅ ' + data.message, 'success');
-                    setTimeout(() => location.reload(), 1000);
-                }} else {{
-                    showNotification('❌ ' + data.message, 'error');
-                }}
-            }});
-        }}
-        
-        // Initialize when DOM is loaded
-        document.addEventListener('DOMContentLoaded', function() {{
-            updateCartCount();
-            
-            // Activate first tab by default
-            const firstTab = document.querySelector('.tab');
-            const firstTabContent = document.querySelector('.tab-content');
-            if (firstTab && firstTabContent) {{
-                firstTab.classList.add('active');
-                firstTabContent.classList.add('active');
-            }}
-            
-            // Auto-hide flash messages after 5 seconds
-            setTimeout(() => {{
-                const flashMessages = document.querySelector('.flash-messages');
-                if (flashMessages) {{
-                    flashMessages.style.display = 'none';
-                }}
-            }}, 5000);
-
-            // Close modal when clicking outside
-            window.onclick = function(event) {{
-                const modals = document.getElementsByClassName('modal');
-                for (let modal of modals) {{
-                    if (event.target == modal) {{
-                        modal.style.display = 'none';
-                    }}
-                }}
-            }}
-            
-            // Add smooth scrolling
-            document.querySelectorAll('a[href^="#"]').forEach(anchor => {{
-                anchor.addEventListener('click', function (e) {{
-                    e.preventDefault();
-                    document.querySelector(this.getAttribute('href')).scrollIntoView({{
-                        behavior: 'smooth'
-                    }});
-                }});
-            }});
-        }});
-    </script>
-    {additional_js}
-</body>
-</html>
+            .then(data => updateCartCount(data.count));
+        return;
+    }
+    
+    const cartBadge = document.getElementById('cart-count');
+    const cartFab = document.getElementById('cart-count-fab');
+    
+    if (cartBadge) {
+        cartBadge.textContent = count;
+        cartBadge.style.display = count > 0 ? 'flex' : 'none';
+    }
+    
+    if (cartFab) {
+        cartFab.textContent = count;
+        cartFab.style.display = count > 0 ? 'flex' : 'none';
+    }
+}
+
+function updateTracking(orderId, status) {
+    fetch('/update_tracking/' + orderId, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            status: status,
+            tracking_info: document.getElementById('tracking-info-' + orderId).value
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification('✅ Status pengiriman diperbarui!', 'success');
+            setTimeout(() => location.reload(), 1000);
+        } else {
+            showNotification('❌ ' + data.message, 'error');
+        }
+    });
+}
+
+function loadTransactionTemplate() {
+    const templateKey = document.getElementById('transaction_template').value;
+    if (!templateKey) return;
+    
+    fetch('/api/get_transaction_template/' + templateKey)
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                const formContainer = document.getElementById('templateFormContainer');
+                formContainer.innerHTML = data.form_html;
+            } else {
+                showNotification('❌ ' + data.message, 'error');
+            }
+        });
+}
+
+function submitTemplateJournal() {
+    const formData = new FormData(document.getElementById('templateJournalForm'));
+    const data = {
+        template_key: formData.get('template_key'),
+        date: formData.get('date'),
+        amounts: {}
+    };
+    
+    // Collect amounts from form
+    document.querySelectorAll('[id^="amount_"]').forEach(input => {
+        const accountType = input.id.replace('amount_', '');
+        data.amounts[accountType] = parseFloat(input.value) || 0;
+    });
+    
+    fetch('/seller/add_template_journal', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification('✅ ' + data.message, 'success');
+            setTimeout(() => location.reload(), 1000);
+        } else {
+            showNotification('❌ ' + data.message, 'error');
+        }
+    });
+}
+
+// Initialize when DOM is loaded
+document.addEventListener('DOMContentLoaded', function() {
+    // Activate first tab by default
+    const firstTab = document.querySelector('.tab');
+    const firstTabContent = document.querySelector('.tab-content');
+    if (firstTab && firstTabContent) {
+        firstTab.classList.add('active');
+        firstTabContent.classList.add('active');
+    }
+    
+    // Auto-hide flash messages after 5 seconds
+    setTimeout(() => {
+        const flashMessages = document.querySelector('.flash-messages');
+        if (flashMessages) {
+            flashMessages.style.display = 'none';
+        }
+    }, 5000);
+
+    // Close modal when clicking outside
+    window.onclick = function(event) {
+        const modals = document.getElementsByClassName('modal');
+        for (let modal of modals) {
+            if (event.target == modal) {
+                modal.style.display = 'none';
+            }
+        }
+    }
+    
+    // Add smooth scrolling
+    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+        anchor.addEventListener('click', function (e) {
+            e.preventDefault();
+            document.querySelector(this.getAttribute('href')).scrollIntoView({
+                behavior: 'smooth'
+            });
+        });
+    });
+});
 '''
 
-def get_navigation():
-    if current_user.is_authenticated:
-        user_badge = f"""
-            <div class="user-menu">
-                <div class="avatar">{current_user.avatar}</div>
-                <div>
-                    <div style="font-weight: 600; font-size: 0.95rem;">{current_user.full_name}</div>
-                    <div class="badge">
-                        {current_user.user_type.upper()}
-                    </div>
-                </div>
-            </div>
-        """
-        
-        nav_links = []
-        
-        if current_user.user_type == 'customer':
-            nav_links.extend([
-                '<a href="/products" class="nav-link"><i class="fas fa-store"></i> Produk</a>',
-                f'<a href="/cart" class="nav-link"><i class="fas fa-shopping-cart"></i> Keranjang <span id="cart-count" style="background: var(--error); color: white; border-radius: 50%; width: 20px; height: 20px; display: none; align-items: center; justify-content: center; font-size: 0.8rem; margin-left: 5px;">0</span></a>',
-                '<a href="/orders" class="nav-link"><i class="fas fa-box"></i> Pesanan Saya</a>',
-                '<a href="/profile" class="nav-link"><i class="fas fa-user"></i> Profile</a>'
-            ])
-        else:  # seller
-            nav_links.extend([
-                '<a href="/seller/dashboard" class="nav-link"><i class="fas fa-chart-line"></i> Dashboard</a>',
-                '<a href="/seller/orders" class="nav-link"><i class="fas fa-boxes"></i> Pesanan</a>',
-                '<a href="/seller/accounting" class="nav-link"><i class="fas fa-chart-bar"></i> Akuntansi</a>',
-                '<a href="/seller/products" class="nav-link"><i class="fas fa-fish"></i> Produk</a>'
-            ])
-        
-        nav_links.append('<a href="/logout" class="nav-link"><i class="fas fa-sign-out-alt"></i> Logout</a>')
-        
-        return user_badge + ''.join(nav_links)
+# URL aset hasil build, diisi oleh build_static_assets()
+STATIC_ASSETS = {}
+
+def render_base_css():
+    """Render stylesheet dasar dengan variabel warna dari COLORS"""
+    color_vars = ''.join(f'\n    --{name}: {value};' for name, value in COLORS.items())
+    return f':root {{{color_vars}\n}}\n{BASE_CSS}'
+
+def build_static_assets():
+    """Tulis CSS/JS shell sekali ke file ber-hash di static/build"""
+    build_dir = app.config['ASSET_BUILD_FOLDER']
+    os.makedirs(build_dir, exist_ok=True)
+    
+    for ext, source in (('css', render_base_css()), ('js', BASE_JS)):
+        data = source.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        filename = f'app.{digest}.{ext}'
+        filepath = os.path.join(build_dir, filename)
+        
+        # Nama file mengikuti isi, jadi file yang sudah ada tidak perlu ditulis ulang
+        if not os.path.exists(filepath):
+            tmp_path = f'{filepath}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, filepath)
+        
+        STATIC_ASSETS[ext] = f'/static/build/{filename}'
+    
+    return STATIC_ASSETS
+
+build_static_assets()
+
+@app.after_request
+def add_asset_cache_headers(response):
+    """Aset ber-hash tidak pernah berubah isinya, jadi boleh di-cache selamanya"""
+    if request.path.startswith('/static/build/') and response.status_code in (200, 206, 304):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = ASSET_CACHE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+# ===== PENYAJIAN FILE UPLOAD =====
+# /static/uploads/... dilayani route ini (lebih spesifik dari route static bawaan) supaya
+# pengiriman byte bisa diserahkan ke proxy depan. Contoh nginx untuk mode 'x-accel':
+#     location /_uploads/ { internal; alias /srv/raa/static/uploads/; }
+UPLOAD_CACHE_MAX_AGE = 60 * 60
+# Blob & varian bernama hash SHA-256 isinya: isi URL yang sama tidak pernah berubah
+FINGERPRINTED_UPLOAD = re.compile(r'^[0-9a-f]{64}[._]')
+
+@app.route('/static/uploads/<path:filename>')
+def uploaded_file(filename):
+    upload_root = os.path.abspath(app.config['UPLOAD_FOLDER'])
+    path = safe_join(upload_root, filename)
+    if path is None or not os.path.isfile(path):
+        return jsonify({'success': False, 'message': 'File tidak ditemukan'}), 404
+    
+    fingerprinted = bool(FINGERPRINTED_UPLOAD.match(os.path.basename(filename)))
+    mode = app.config['UPLOAD_SERVE_MODE']
+    
+    if mode == 'x-accel':
+        response = Response(mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = app.config['UPLOAD_ACCEL_PREFIX'] + quote(filename)
     else:
-        return '''
-            <a href="/login" class="nav-link"><i class="fas fa-sign-in-alt"></i> Login</a>
-            <a href="/register" class="nav-link"><i class="fas fa-user-plus"></i> Register</a>
-        '''
+        # send_file menangani ETag, If-None-Match/If-Modified-Since dan Range (206)
+        response = werkzeug_send_file(
+            path, request.environ,
+            use_x_sendfile=(mode == 'x-sendfile'),
+            response_class=app.response_class,
+            max_age=UPLOAD_CACHE_MAX_AGE,
+        )
+    
+    response.cache_control.public = True
+    response.cache_control.no_cache = None
+    if fingerprinted:
+        response.cache_control.max_age = ASSET_CACHE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = UPLOAD_CACHE_MAX_AGE
+    return response
+
+# ===== DEEP OCEAN HTML TEMPLATES =====
+# Shell halaman ada di templates/layout/. Setiap halaman adalah template yang
+# meng-extend layout/base.html dan dirender lewat render_page(); halaman streaming
+# memakai layout/stream.html (lihat stream_page). AppSetting yang dipakai shell
+# sudah dari cache get_settings().
+@app.template_filter('rupiah')
+def rupiah_filter(value):
+    return f"{value or 0:,.0f}"
+
+@app.context_processor
+def inject_shell_context():
+    return {'settings': get_settings(), 'assets': STATIC_ASSETS}
+
+def render_page(template_name, title, **context):
+    """Render halaman template yang meng-extend layout/base.html"""
+    return render_template(template_name, title=title, additional_css='', additional_js='', **context)
 
-def get_flash_messages():
-    messages = ""
-    for category, message in get_flashed_messages(with_categories=True):
-        messages += f'<div class="flash-message flash-{category}">{message}</div>'
-    return messages
+# ===== STREAMING HTML =====
+STREAM_CHUNK_ROWS = 100          # baris per batch fetch dari DB
+STREAM_CHUNK_SIZE = 16 * 1024    # karakter minimal per chunk yang dikirim
+
+def chunked_html(fragments, min_size=STREAM_CHUNK_SIZE):
+    """Gabungkan potongan HTML kecil menjadi chunk minimal `min_size` karakter"""
+    buffer = []
+    size = 0
+    for fragment in fragments:
+        buffer.append(fragment)
+        size += len(fragment)
+        if size >= min_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+def _iter_stream(name, body):
+    try:
+        yield from body
+    except Exception as e:
+        print(f"Error streaming {name}: {e}")
+        yield '<div class="card"><p>Error loading content. Please try again.</p></div>'
+
+def stream_page(title, body):
+    """Response streaming: layout/stream.html dengan body (generator) di block content"""
+    # Flash message di-pop sebelum response dikirim, selagi session cookie masih bisa
+    # disimpan; get_flashed_messages() menyimpan hasilnya untuk sisa request
+    get_flashed_messages()
+    stream = stream_template('layout/stream.html', title=title, additional_css='', additional_js='',
+                             body=_iter_stream(title, body))
+    return Response(chunked_html(stream), mimetype='text/html')
+
+def stream_fragment(name, body):
+    """Potongan HTML tanpa shell (untuk dimuat lewat fetch), di-stream seperti stream_page"""
+    return Response(stream_with_context(chunked_html(_iter_stream(name, body))), mimetype='text/html')
 
 def get_account_options():
     accounts = Account.query.all()
@@ -2521,21 +3755,33 @@ def get_trial_balance():
     except:
         return '<tr><td colspan="4">Error loading trial balance</td></tr>'
 
-def get_journal_entries_table():
-    """Generate single table for all journal entries"""
+def iter_journal_entries_table():
+    """Satu tabel untuk semua jurnal, dikirim baris demi baris"""
     try:
-        # Get all journal entries ordered by date
-        journal_entries = JournalEntry.query.order_by(JournalEntry.date).all()
-        
-        if not journal_entries:
-            return '''
+        # Jurnal + detail + akun dalam satu query terurut, diambil per batch
+        rows = iter(db.session.execute(
+            db.select(
+                JournalEntry.id, JournalEntry.date, JournalEntry.transaction_number,
+                JournalEntry.description, Account.code, Account.name,
+                JournalDetail.debit, JournalDetail.credit
+            )
+            .outerjoin(JournalDetail, JournalDetail.journal_id == JournalEntry.id)
+            .outerjoin(Account, Account.id == JournalDetail.account_id)
+            .order_by(JournalEntry.date, JournalEntry.id, JournalDetail.id)
+            .execution_options(yield_per=STREAM_CHUNK_ROWS)
+        ))
+        
+        first_row = next(rows, None)
+        if first_row is None:
+            yield '''
             <div class="card">
                 <h4 style="color: var(--primary);">Belum Ada Transaksi</h4>
                 <p>Gunakan form Input Jurnal Otomatis di atas untuk menambahkan transaksi pertama.</p>
             </div>
             '''
+            return
         
-        table_html = '''
+        yield '''
         <div class="card">
             <h4 style="color: var(--primary); margin-bottom: 1.5rem;"><i class="fas fa-list"></i> Daftar Semua Jurnal</h4>
             <div style="overflow-x: auto;">
@@ -2553,40 +3799,41 @@ def get_journal_entries_table():
                     <tbody>
         '''
         
-        for journal in journal_entries:
+        current_journal_id = None
+        for row in itertools.chain([first_row], rows):
             # Add transaction header
-            table_html += f'''
+            if row.id != current_journal_id:
+                current_journal_id = row.id
+                yield f'''
             <tr style="background: rgba(49, 130, 206, 0.05);">
-                <td><strong>{journal.date.strftime('%d/%m/%Y')}</strong></td>
-                <td><strong>{journal.transaction_number}</strong></td>
-                <td colspan="4"><strong>{journal.description}</strong></td>
+                <td><strong>{row.date.strftime('%d/%m/%Y')}</strong></td>
+                <td><strong>{row.transaction_number}</strong></td>
+                <td colspan="4"><strong>{row.description}</strong></td>
             </tr>
             '''
             
             # Add account details
-            for detail in journal.journal_details:
-                table_html += f'''
+            if row.code is not None:
+                yield f'''
                 <tr>
                     <td></td>
                     <td></td>
                     <td></td>
-                    <td>{detail.account.code} - {detail.account.name}</td>
-                    <td class="debit">{"Rp {0:,.0f}".format(detail.debit) if detail.debit > 0 else ""}</td>
-                    <td class="credit">{"Rp {0:,.0f}".format(detail.credit) if detail.credit > 0 else ""}</td>
+                    <td>{row.code} - {row.name}</td>
+                    <td class="debit">{"Rp {0:,.0f}".format(row.debit) if row.debit > 0 else ""}</td>
+                    <td class="credit">{"Rp {0:,.0f}".format(row.credit) if row.credit > 0 else ""}</td>
                 </tr>
                 '''
         
-        table_html += '''
+        yield '''
                     </tbody>
                 </table>
             </div>
         </div>
         '''
-        
-        return table_html
     except Exception as e:
         print(f"Error generating journal table: {e}")
-        return '<div class="card"><p>Error loading journal entries</p></div>'
+        yield '<div class="card"><p>Error loading journal entries</p></div>'
 
 def get_income_statement():
     """Generate income statement HTML"""
@@ -2665,6 +3912,542 @@ def get_income_statement():
         print(f"Error generating income statement: {e}")
         return '<p>Error loading income statement</p>'
 
+# ===== KARTU PRODUK =====
+def render_product_card(product, variant):
+    """Kartu produk dari fragment cache.
+
+    variant: 'featured' (home), 'catalog' (/products) atau 'seller' (manajemen produk).
+    """
+    role = viewer_role()
+    key = ('product', product.id, product.updated_at, role, variant)
+    template = app.jinja_env.get_template(PRODUCT_CARD_TEMPLATES[variant])
+    return fragment_cache.get_or_render(key, lambda: template.render(product=product, role=role))
+
+app.add_template_global(product_image_tag, 'product_image')
+
+@app.template_global('product_card')
+def product_card_global(product, variant):
+    return Markup(render_product_card(product, variant))
+
+PRODUCT_CARD_TEMPLATES = {
+    'featured': 'products/_card_featured.html',
+    'catalog': 'products/_card_catalog.html',
+    'seller': 'products/_card_seller.html',
+}
+
+# ===== PENCARIAN PRODUK (FTS5) =====
+# Indeks full-text SQLite atas nama & deskripsi produk (external content: teksnya tetap
+# di tabel product). Trigger menjaga indeks tetap sinkron untuk semua insert/update/delete,
+# termasuk yang tidak lewat ORM.
+PRODUCT_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, description, content='product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    # Nama lebih menentukan relevansi daripada deskripsi
+    """INSERT INTO product_fts(product_fts, rank) VALUES('rank', 'bm25(10.0, 1.0)')""",
+    """INSERT INTO product_fts(product_fts) VALUES('rebuild')""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF name, description ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+]
+
+for _statement in PRODUCT_FTS_DDL:
+    event.listen(Product.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Product.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS product_fts').execute_if(dialect='sqlite'))
+
+product_fts = db.table('product_fts', db.column('rowid'), db.column('product_fts'), db.column('rank'))
+
+def fts_query(text, phrase=False):
+    """Ubah teks bebas menjadi query FTS5 yang aman (token di-quote).
+
+    Default: semua kata harus ada, kata boleh berupa awalan ("ika" cocok dengan "ikan").
+    phrase=True: kata-kata harus muncul berurutan.
+    """
+    tokens = re.findall(r'\w+', text.lower())
+    if not tokens:
+        return None
+    if phrase:
+        return '"' + ' '.join(tokens) + '"'
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def find_product_by_text(text):
+    """Produk yang nama/deskripsinya paling cocok dengan `text` (frasa utuh), atau None"""
+    match = fts_query(text, phrase=True)
+    if not match:
+        return None
+    return (Product.query
+            .join(product_fts, product_fts.c.rowid == Product.id)
+            .filter(product_fts.c.product_fts.op('MATCH')(match))
+            .order_by(product_fts.c.rank)
+            .first())
+
+# ===== KATALOG PRODUK =====
+# Paginasi keyset: halaman berikutnya diambil dengan WHERE (kolom_sort, id) > nilai
+# baris terakhir halaman sebelumnya, jadi biayanya sama di halaman berapa pun (tanpa OFFSET).
+CATALOG_PAGE_SIZE = 24
+CATALOG_MAX_PAGE_SIZE = 100
+
+PRODUCT_CATEGORIES = {
+    'bibit': 'Bibit',
+    'konsumsi': 'Konsumsi',
+    'ikan_mas': 'Ikan Mas',
+}
+
+# nama sort -> (kolom, menurun, label)
+PRODUCT_SORTS = {
+    'relevance': (product_fts.c.rank, False, 'Paling Relevan'),
+    'newest': (Product.created_at, True, 'Terbaru'),
+    'price_asc': (Product.price, False, 'Harga Termurah'),
+    'price_desc': (Product.price, True, 'Harga Termahal'),
+    'name': (Product.name, False, 'Nama (A-Z)'),
+}
+
+# nama filter rentang -> kolom (dipakai sebagai min_<nama> / max_<nama> di query string)
+PRODUCT_RANGE_FILTERS = {
+    'price': Product.price,
+    'size': Product.size_cm,
+    'weight': Product.weight_kg,
+}
+
+def parse_catalog_params(args):
+    """Filter, sort dan cursor katalog dari query string. ValueError jika ada yang tidak valid."""
+    q = (args.get('q') or '').strip()
+    match = fts_query(q)
+    params = {
+        'q': q,
+        'match': match,
+        'category': args.get('category') or None,
+        'in_stock': args.get('in_stock') in ('1', 'true', 'on'),
+        'sort': args.get('sort') or ('relevance' if match else 'newest'),
+        'cursor': args.get('cursor') or None,
+        'ranges': {},
+    }
+    if params['category'] and params['category'] not in PRODUCT_CATEGORIES:
+        raise ValueError('Kategori tidak dikenal')
+    if params['sort'] not in PRODUCT_SORTS:
+        raise ValueError('Urutan tidak dikenal')
+    if params['sort'] == 'relevance' and not params['match']:
+        raise ValueError('Urutan relevansi membutuhkan kata kunci pencarian')
+    
+    for name in PRODUCT_RANGE_FILTERS:
+        for bound in ('min', 'max'):
+            raw = (args.get(f'{bound}_{name}') or '').strip()
+            if raw:
+                try:
+                    value = float(raw)
+                except ValueError:
+                    raise ValueError(f'{bound}_{name} harus berupa angka')
+                # float() menerima 'nan' dan 'inf'
+                if not math.isfinite(value):
+                    raise ValueError(f'{bound}_{name} harus berupa angka')
+                params['ranges'][(name, bound)] = value
+    
+    try:
+        limit = int(args.get('limit') or CATALOG_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('limit harus berupa angka')
+    params['limit'] = max(1, min(limit, CATALOG_MAX_PAGE_SIZE))
+    # Cursor rusak/diubah ditolak di sini seperti filter lain, bukan saat query
+    params['after'] = decode_catalog_cursor(params['cursor'], params['sort']) if params['cursor'] else None
+    return params
+
+def encode_catalog_cursor(value, product_id):
+    """Cursor = nilai kolom sort + id baris terakhir halaman"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, product_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_catalog_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, product_id = json.loads(raw)
+        if PRODUCT_SORTS[sort][0] is Product.created_at:
+            value = datetime.fromisoformat(value)
+        elif isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(value)
+        elif isinstance(value, float) and not math.isfinite(value):
+            raise ValueError(value)
+        return value, int(product_id)
+    except (ValueError, TypeError):
+        raise ValueError('Cursor tidak valid')
+
+def query_product_page(params, seller_id=None):
+    """Satu halaman produk + cursor halaman berikutnya (None jika sudah habis).
+
+    Tanpa seller_id: katalog publik (hanya produk aktif). Dengan seller_id: semua
+    produk milik seller tersebut.
+    """
+    query = Product.query
+    if seller_id is None:
+        query = query.filter(Product.is_active == True)
+    else:
+        query = query.filter(Product.seller_id == seller_id)
+    
+    if params['match']:
+        query = query.join(product_fts, product_fts.c.rowid == Product.id)
+        query = query.filter(product_fts.c.product_fts.op('MATCH')(params['match']))
+    elif params['q']:
+        # Kata kunci tanpa huruf/angka sama sekali tidak cocok dengan produk apa pun
+        query = query.filter(db.false())
+    if params['category']:
+        query = query.filter(Product.category == params['category'])
+    if params['in_stock']:
+        query = query.filter(Product.stock > 0)
+    for (name, bound), value in params['ranges'].items():
+        column = PRODUCT_RANGE_FILTERS[name]
+        query = query.filter(column >= value if bound == 'min' else column <= value)
+    
+    column, descending, _ = PRODUCT_SORTS[params['sort']]
+    query = query.add_columns(column)
+    sort_key = db.tuple_(column, Product.id)
+    if params['after']:
+        query = query.filter(sort_key < params['after'] if descending else sort_key > params['after'])
+    if descending:
+        query = query.order_by(column.desc(), Product.id.desc())
+    else:
+        query = query.order_by(column.asc(), Product.id.asc())
+    
+    limit = params['limit']
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_product, last_value = rows[-1]
+        next_cursor = encode_catalog_cursor(last_value, last_product.id)
+    return [product for product, _ in rows], next_cursor
+
+def next_page_url(next_cursor):
+    """URL halaman berikutnya dengan filter yang sama"""
+    if not next_cursor:
+        return None
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    return url_for(request.endpoint, **args)
+
+def product_to_dict(product):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'description': product.description,
+        'price': product.price,
+        'stock': product.stock,
+        'size_cm': product.size_cm,
+        'weight_kg': product.weight_kg,
+        'category': product.category,
+        'image_url': product.image_url,
+        'is_featured': product.is_featured,
+    }
+
+# ===== IMPOR/EKSPOR KATALOG =====
+# Kolom file ekspor (juga header CSV); impor membaca kolom yang sama kecuali image_url
+CATALOG_EXPORT_FIELDS = (
+    'id', 'name', 'description', 'price', 'cost_price', 'stock', 'size_cm', 'weight_kg',
+    'category', 'is_featured', 'is_active', 'image_url',
+)
+CATALOG_EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+CATALOG_EXPORT_BATCH_SIZE = 500
+CATALOG_IMPORT_BATCH_SIZE = 500
+CATALOG_IMPORT_MAX_REPORTED_ERRORS = 200
+# kolom impor -> parser nilai sel (sel kosong = kolom tidak diubah/nilai default)
+CATALOG_IMPORT_FIELDS = {
+    'name': str,
+    'description': str,
+    'price': float,
+    'cost_price': float,
+    'stock': int,
+    'size_cm': float,
+    'weight_kg': float,
+    'category': str,
+    'is_featured': lambda raw: parse_import_bool(raw),
+    'is_active': lambda raw: parse_import_bool(raw),
+}
+CATALOG_IMPORT_REQUIRED = ('name', 'price', 'stock')
+
+def parse_import_bool(raw):
+    value = raw.strip().lower()
+    if value in ('1', 'true', 'ya', 'yes', 'y'):
+        return True
+    if value in ('0', 'false', 'tidak', 'no', 'n'):
+        return False
+    raise ValueError(f'nilai boolean tidak dikenal: {raw}')
+
+def iter_catalog_export(seller_id, fmt):
+    """Generator isi file ekspor; produk dibaca per batch (keyset id), bukan sekaligus"""
+    columns = [getattr(Product, field) for field in CATALOG_EXPORT_FIELDS]
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CATALOG_EXPORT_FIELDS)
+    
+    last_id = 0
+    while True:
+        rows = (db.session.query(*columns)
+                          .filter(Product.seller_id == seller_id, Product.id > last_id)
+                          .order_by(Product.id)
+                          .limit(CATALOG_EXPORT_BATCH_SIZE)
+                          .all())
+        if fmt == 'csv':
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        else:
+            yield ''.join(json.dumps(dict(zip(CATALOG_EXPORT_FIELDS, row)), ensure_ascii=False) + '\n'
+                          for row in rows)
+        if len(rows) < CATALOG_EXPORT_BATCH_SIZE:
+            break
+        last_id = rows[-1][0]
+
+def parse_import_row(row):
+    """Satu baris CSV -> (id atau None, dict kolom yang diisi). ValueError jika tidak valid."""
+    raw_id = (row.get('id') or '').strip()
+    try:
+        product_id = int(raw_id) if raw_id else None
+    except ValueError:
+        raise ValueError('id harus berupa angka')
+    
+    values = {}
+    for field, parse in CATALOG_IMPORT_FIELDS.items():
+        raw = (row.get(field) or '').strip()
+        if not raw:
+            continue
+        try:
+            values[field] = parse(raw)
+        except ValueError:
+            raise ValueError(f'{field} tidak valid: {raw}')
+        # float() menerima 'nan' dan 'inf'
+        if isinstance(values[field], float) and not math.isfinite(values[field]):
+            raise ValueError(f'{field} tidak valid: {raw}')
+    
+    if 'category' in values and values['category'] not in PRODUCT_CATEGORIES:
+        raise ValueError(f"kategori tidak dikenal: {values['category']}")
+    for field in ('price', 'cost_price', 'stock'):
+        if values.get(field, 0) < 0:
+            raise ValueError(f'{field} tidak boleh negatif')
+    if product_id is None:
+        missing = [field for field in CATALOG_IMPORT_REQUIRED if field not in values]
+        if missing:
+            raise ValueError(f"kolom wajib kosong: {', '.join(missing)}")
+    elif not values:
+        raise ValueError('tidak ada kolom yang diubah')
+    return product_id, values
+
+def apply_import_batch(seller_id, batch, report):
+    """Tulis satu batch baris valid: satu executemany INSERT + satu executemany UPDATE, satu commit"""
+    update_ids = {product_id for _, product_id, _ in batch if product_id is not None}
+    owned_ids = set()
+    if update_ids:
+        owned_ids = {product_id for (product_id,) in db.session.query(Product.id)
+                                                            .filter(Product.seller_id == seller_id,
+                                                                    Product.id.in_(update_ids))}
+    
+    inserts, updates = [], []
+    for line, product_id, values in batch:
+        if product_id is None:
+            inserts.append(dict(values, seller_id=seller_id))
+        elif product_id in owned_ids:
+            updates.append(dict(values, id=product_id))
+        else:
+            report['errors'].append({'line': line, 'message': f'produk #{product_id} tidak ditemukan'})
+    
+    try:
+        # Bulk INSERT/UPDATE ORM tidak memicu event per objek: versi ditandai manual
+        if inserts:
+            db.session.execute(db.insert(Product), inserts)
+        if updates:
+            db.session.execute(db.update(Product), updates)
+        mark_stamp_dirty(db.session, 'products')
+        mark_stamp_dirty(db.session, 'featured')
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error importing catalog batch: {e}")
+        for line, _, _ in batch:
+            report['errors'].append({'line': line, 'message': 'gagal disimpan'})
+        return
+    report['inserted'] += len(inserts)
+    report['updated'] += len(updates)
+
+def import_catalog_csv(seller_id, stream):
+    """Impor CSV produk milik seller. Baris tanpa id = produk baru, dengan id = update.
+
+    Baris yang tidak valid dilewati dan dicatat di laporan (nomor baris file).
+    """
+    report = {'inserted': 0, 'updated': 0, 'errors': []}
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    unknown = set(reader.fieldnames or ()) - set(CATALOG_EXPORT_FIELDS)
+    if not reader.fieldnames or unknown:
+        raise ValueError(f"Header CSV tidak valid: {', '.join(sorted(unknown)) or 'kosong'}")
+    
+    batch = []
+    for row in reader:
+        try:
+            product_id, values = parse_import_row(row)
+        except ValueError as e:
+            report['errors'].append({'line': reader.line_num, 'message': str(e)})
+            continue
+        batch.append((reader.line_num, product_id, values))
+        if len(batch) >= CATALOG_IMPORT_BATCH_SIZE:
+            apply_import_batch(seller_id, batch, report)
+            batch = []
+    if batch:
+        apply_import_batch(seller_id, batch, report)
+    
+    report['errors'].sort(key=lambda error: error['line'])
+    return report
+
+# ===== UPDATE MASSAL HARGA & STOK =====
+BULK_UPDATE_MAX_ROWS = 1000
+BULK_UPDATE_FIELDS = ('price', 'cost_price', 'stock_delta')
+
+# Satu statement Core untuk semua baris (executemany); kolom yang tidak dikirim tetap (COALESCE).
+# Syarat stok >= 0 ikut di WHERE supaya checkout yang berjalan bersamaan tidak membuat stok minus.
+_product_table = Product.__table__
+BULK_UPDATE_STATEMENT = (
+    db.update(_product_table)
+      .where(_product_table.c.id == bindparam('b_id'))
+      .where(_product_table.c.stock + bindparam('b_stock_delta') >= 0)
+      .values(
+          price=db.func.coalesce(bindparam('b_price'), _product_table.c.price),
+          cost_price=db.func.coalesce(bindparam('b_cost_price'), _product_table.c.cost_price),
+          stock=_product_table.c.stock + bindparam('b_stock_delta'),
+          updated_at=bindparam('b_updated_at'),
+      )
+)
+
+# Pengurangan stok saat checkout: hanya berhasil jika stok masih cukup di saat UPDATE
+STOCK_DECREMENT_STATEMENT = (
+    db.update(_product_table)
+      .where(_product_table.c.id == bindparam('b_id'))
+      .where(_product_table.c.stock >= bindparam('b_quantity'))
+      .values(stock=_product_table.c.stock - bindparam('b_quantity'))
+)
+
+def decrement_stock(quantities):
+    """Kurangi stok {product_id: quantity} dengan UPDATE bersyarat (satu executemany).
+
+    Total rowcount menentukan hasilnya: kurang dari jumlah produk berarti ada stok yang
+    sudah tidak cukup (kalah balapan dengan checkout lain) dan pemanggil wajib rollback.
+    Mengembalikan True jika semua berhasil. Tidak melakukan commit.
+    """
+    if not quantities:
+        return True
+    result = db.session.execute(STOCK_DECREMENT_STATEMENT, [
+        {'b_id': product_id, 'b_quantity': quantity} for product_id, quantity in quantities.items()
+    ])
+    if result.rowcount != len(quantities):
+        return False
+    # UPDATE Core tidak memicu event ORM
+    mark_stamp_dirty(db.session, 'products')
+    mark_stamp_dirty(db.session, 'featured')
+    return True
+
+def validate_bulk_update(records):
+    """Validasi format semua baris sekaligus -> (baris valid, hasil error per indeks)"""
+    valid, errors = [], {}
+    seen = set()
+    for index, record in enumerate(records):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError('baris harus berupa object')
+            product_id = record.get('product_id')
+            if not isinstance(product_id, int) or isinstance(product_id, bool):
+                raise ValueError('product_id harus berupa angka')
+            if product_id in seen:
+                raise ValueError('product_id muncul lebih dari sekali')
+            seen.add(product_id)
+            
+            row = {'product_id': product_id}
+            for field in ('price', 'cost_price'):
+                value = record.get(field)
+                if value is not None:
+                    # Parser JSON Flask menerima NaN/Infinity; NaN terikat sebagai NULL di COALESCE
+                    if (not isinstance(value, (int, float)) or isinstance(value, bool)
+                            or not math.isfinite(value) or value < 0):
+                        raise ValueError(f'{field} harus berupa angka >= 0')
+                    row[field] = float(value)
+            stock_delta = record.get('stock_delta')
+            if stock_delta is not None and (not isinstance(stock_delta, int) or isinstance(stock_delta, bool)):
+                raise ValueError('stock_delta harus berupa bilangan bulat')
+            # stock_delta 0 tidak mengubah apa pun
+            if stock_delta:
+                row['stock_delta'] = stock_delta
+            if not any(field in row for field in BULK_UPDATE_FIELDS):
+                raise ValueError('tidak ada kolom yang diubah')
+        except ValueError as e:
+            errors[index] = {'product_id': record.get('product_id') if isinstance(record, dict) else None,
+                             'success': False, 'message': str(e)}
+            continue
+        valid.append((index, row))
+    return valid, errors
+
+def apply_bulk_update(seller_id, records):
+    """Terapkan update harga/stok produk milik seller dalam satu transaksi.
+
+    Mengembalikan hasil per baris (urutan sama dengan input). Baris yang gagal
+    validasi dilewati; baris lain tetap diterapkan.
+    """
+    valid, results = validate_bulk_update(records)
+    
+    ids = [row['product_id'] for _, row in valid]
+    stocks = dict(db.session.query(Product.id, Product.stock)
+                            .filter(Product.seller_id == seller_id, Product.id.in_(ids))) if ids else {}
+    
+    params = []
+    for index, row in valid:
+        product_id = row['product_id']
+        if product_id not in stocks:
+            results[index] = {'product_id': product_id, 'success': False, 'message': 'Produk tidak ditemukan'}
+        elif stocks[product_id] + row.get('stock_delta', 0) < 0:
+            results[index] = {'product_id': product_id, 'success': False,
+                              'message': f'Stok tidak cukup (stok sekarang {stocks[product_id]})'}
+        else:
+            params.append((index, row))
+    
+    if params:
+        now = datetime.utcnow()
+        result = db.session.execute(BULK_UPDATE_STATEMENT, [{
+            'b_id': row['product_id'],
+            'b_price': row.get('price'),
+            'b_cost_price': row.get('cost_price'),
+            'b_stock_delta': row.get('stock_delta', 0),
+            'b_updated_at': now,
+        } for _, row in params])
+        if result.rowcount != len(params):
+            # Stok berubah di antara validasi dan UPDATE: batalkan semuanya
+            db.session.rollback()
+            raise RuntimeError('Stok berubah selama update, silakan coba lagi')
+        
+        # Stok hasil UPDATE dibaca ulang di transaksi yang sama (snapshot di atas bisa
+        # sudah basi jika ada checkout di antaranya)
+        updated_ids = [row['product_id'] for _, row in params]
+        stocks = dict(db.session.query(Product.id, Product.stock).filter(Product.id.in_(updated_ids)))
+        
+        # UPDATE Core tidak memicu event ORM: versi katalog dinaikkan sekali untuk seluruh batch
+        mark_stamp_dirty(db.session, 'products')
+        mark_stamp_dirty(db.session, 'featured')
+    db.session.commit()
+    
+    for index, row in params:
+        results[index] = {
+            'product_id': row['product_id'],
+            'success': True,
+            'stock': stocks[row['product_id']],
+            **{field: row[field] for field in ('price', 'cost_price') if field in row},
+        }
+    return [results[index] for index in range(len(records))]
+
 # ===== ROUTES UTAMA =====
 @app.route('/')
 def index():
@@ -2672,83 +4455,17 @@ def index():
         return redirect('/login')
     
     try:
-        settings = {s.key: s.value for s in AppSetting.query.all()}
-        featured_products = Product.query.filter_by(is_featured=True).limit(3).all()
-        
-        featured_html = ""
-        for product in featured_products:
-            weight_info = f"{product.weight_kg}kg" if product.weight_kg else f"{product.size_cm}cm"
-            add_to_cart_btn = ''
-            if current_user.user_type == 'customer':
-                add_to_cart_btn = f'''
-                <button class="btn btn-primary" onclick="addToCart({product.id})" style="margin-top: 1rem;">
-                    <i class="fas fa-cart-plus"></i> Tambah ke Keranjang
-                </button>
-                '''
-            
-            featured_html += f'''
-                <div class="card product-card">
-                    <img src="{product.image_url}" alt="{product.name}" class="product-image" onerror="this.style.display='none'">
-                    <h3 style="margin-bottom: 0.5rem; color: var(--dark);">{product.name}</h3>
-                    <p style="color: #6B7280; margin-bottom: 1rem;">{product.description}</p>
-                    <div class="price" style="margin-bottom: 0.5rem;">Rp {product.price:,.0f}</div>
-                    <p style="color: #6B7280; font-size: 0.9rem;">Stock: {product.stock} | {weight_info}</p>
-                    {add_to_cart_btn}
-                </div>
-            '''
-        
-        content = f'''
-        <div class="hero">
-            <h1>{settings.get('app_name', 'Kang-Mas Shop')}</h1>
-            <p>{settings.get('app_description', 'Sejak 2017 - Melayani dengan Kualitas Terbaik')}</p>
-            <p><em>Ikan mas segar langsung dari kolam Magelang</em></p>
-            
-            <div style="margin-top: 2rem;">
-                <p style="font-size: 1.2rem;">
-                    Selamat datang kembali, <strong>{current_user.full_name}</strong>!
-                </p>
-                {current_user.user_type == 'customer' and '''
-                <a href="/products" class="btn btn-primary" style="margin-top: 1rem;">
-                    <i class="fas fa-store"></i> Lihat Semua Produk
-                </a>
-                ''' or '''
-                <a href="/seller/dashboard" class="btn btn-primary" style="margin-top: 1rem;">
-                    <i class="fas fa-chart-line"></i> Seller Dashboard
-                </a>
-                '''}
-            </div>
-        </div>
-
-        <h2 style="margin-bottom: 2rem; text-align: center; color: var(--primary);">
-            <i class="fas fa-star"></i> Produk Unggulan
-        </h2>
-        <div class="grid grid-3">
-            {featured_html}
-        </div>
-
-        <div class="stats">
-            <div class="stat-card">
-                <div class="stat-number">7+</div>
-                <div class="stat-label">Tahun Pengalaman</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">1000+</div>
-                <div class="stat-label">Pelanggan Puas</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">100%</div>
-                <div class="stat-label">Ikan Segar</div>
-            </div>
-        </div>
-        '''
+        featured_products = get_featured_products()
         
-        return base_html('Home', content)
+        return render_page('index.html', 'Home', featured_products=featured_products)
     except Exception as e:
         print(f"Error in index route: {e}")
-        return base_html('Home', '<div class="card"><h2>Welcome to Kang-Mas Shop</h2><p>Error loading content. Please try again.</p></div>')
+        return render_page('layout/error.html', 'Home', heading='Welcome to Kang-Mas Shop',
+                           message='Error loading content. Please try again.')
 
 # ===== ROUTES AUTH =====
 @app.route('/register', methods=['GET', 'POST'])
+@anonymous_page_cache
 def register():
     if current_user.is_authenticated:
         return redirect('/')
@@ -2785,63 +4502,10 @@ def register():
                 db.session.commit()
                 flash('Gagal mengirim email verifikasi. Silakan coba lagi.', 'error')
     
-    content = '''
-    <div style="max-width: 500px; margin: 0 auto;">
-        <div class="card">
-            <div style="text-align: center; margin-bottom: 2rem;">
-                <div style="width: 80px; height: 80px; background: linear-gradient(135deg, var(--primary) 0%, var(--ocean-deep) 100%); border-radius: 50%; display: flex; align-items: center; justify-content: center; margin: 0 auto 1rem;">
-                    <i class="fas fa-user-plus" style="color: white; font-size: 2rem;"></i>
-                </div>
-                <h2 style="color: var(--primary);">Daftar Akun Baru</h2>
-            </div>
-            
-            <form method="POST">
-                <div class="form-group">
-                    <label class="form-label"><i class="fas fa-envelope"></i> Email</label>
-                    <input type="email" name="email" class="form-control" required>
-                </div>
-                <div class="form-group">
-                    <label class="form-label"><i class="fas fa-user"></i> Nama Lengkap</label>
-                    <input type="text" name="full_name" class="form-control" required>
-                </div>
-                <div class="form-group">
-                    <label class="form-label"><i class="fas fa-lock"></i> Password</label>
-                    <input type="password" name="password" class="form-control" required>
-                </div>
-                <div class="form-group">
-                    <label class="form-label"><i class="fas fa-phone"></i> No. Telepon</label>
-                    <input type="text" name="phone" class="form-control" required>
-                </div>
-                <div class="form-group">
-                    <label class="form-label"><i class="fas fa-map-marker-alt"></i> Alamat</label>
-                    <textarea name="address" class="form-control" required></textarea>
-                </div>
-                <button type="submit" class="btn btn-primary" style="width: 100%;">
-                    <i class="fas fa-user-plus"></i> Daftar dengan Email
-                </button>
-            </form>
-            
-            <div class="divider">
-                <span>atau</span>
-            </div>
-            
-            <div style="text-align: center;">
-                <a href="/google-login" class="btn google-btn">
-                    <img src="https://developers.google.com/identity/images/g-logo.png" 
-                         style="width: 20px; height: 20px; margin-right: 10px; background: white; padding: 2px; border-radius: 2px;">
-                    Daftar dengan Google
-                </a>
-            </div>
-            
-            <p style="text-align: center; margin-top: 1rem;">
-                Sudah punya akun? <a href="/login" style="color: var(--primary); text-decoration: none; font-weight: 600;">Login di sini</a>
-            </p>
-        </div>
-    </div>
-    '''
-    return base_html('Register', content)
+    return render_page('auth/register.html', 'Register')
 
 @app.route('/login', methods=['GET', 'POST'])
+@anonymous_page_cache
 def login():
     if current_user.is_authenticated:
         return redirect('/')
@@ -2862,56 +4526,7 @@ def login():
         else:
             flash('Email atau password salah!', 'error')
     
-    settings = {s.key: s.value for s in AppSetting.query.all()}
-    app_logo = settings.get('app_logo', '/static/uploads/logos/logo.png')
-    
-    content = f'''
-    <div style="max-width: 400px; margin: 0 auto;">
-        <div class="card">
-            <div style="display: flex; align-items: center; gap: 1rem; margin-bottom: 2rem;">
-                <img src="{app_logo}" alt="Kang-Mas Shop" style="width: 50px; height: 50px; border-radius: 12px; box-shadow: var(--shadow-md);" onerror="this.style.display='none'">
-                <h2 style="margin: 0; color: var(--primary);">Masuk ke Akun</h2>
-            </div>
-            
-            <form method="POST">
-                <div class="form-group">
-                    <label class="form-label"><i class="fas fa-envelope"></i> Email</label>
-                    <input type="email" name="email" class="form-control" required>
-                </div>
-                <div class="form-group">
-                    <label class="form-label"><i class="fas fa-lock"></i> Password</label>
-                    <input type="password" name="password" class="form-control" required>
-                </div>
-                <button type="submit" class="btn btn-primary" style="width: 100%;">
-                    <i class="fas fa-sign-in-alt"></i> Login
-                </button>
-            </form>
-            
-            <div class="divider">
-                <span>atau</span>
-            </div>
-            
-            <div style="text-align: center;">
-                <a href="/google-login" class="btn google-btn">
-                    <img src="https://developers.google.com/identity/images/g-logo.png" 
-                         style="width: 20px; height: 20px; margin-right: 10px; background: white; padding: 2px; border-radius: 2px;">
-                    Login dengan Google
-                </a>
-            </div>
-            
-            <div style="margin-top: 1rem; padding: 1rem; background: rgba(49, 130, 206, 0.1); border-radius: var(--border-radius);">
-                <h4 style="margin-bottom: 0.5rem; color: var(--primary);"><i class="fas fa-info-circle"></i> Demo Accounts:</h4>
-                <p style="margin: 0.25rem 0; font-size: 0.9rem;"><strong>Customer:</strong> customer@example.com / customer123</p>
-                <p style="margin: 0.25rem 0; font-size: 0.9rem;"><strong>Seller:</strong> kang.mas1817@gmail.com / TugasSiaKangMas</p>
-            </div>
-            
-            <p style="text-align: center; margin-top: 1rem;">
-                Belum punya akun? <a href="/register" style="color: var(--primary); text-decoration: none; font-weight: 600;">Daftar sebagai Customer</a>
-            </p>
-        </div>
-    </div>
-    '''
-    return base_html('Login', content)
+    return render_page('auth/login.html', 'Login')
 
 @app.route('/verify_email', methods=['GET', 'POST'])
 def verify_email():
@@ -2938,25 +4553,7 @@ def verify_email():
         else:
             flash('Kode verifikasi salah! Silakan coba lagi.', 'error')
     
-    content = f'''
-    <div style="max-width: 400px; margin: 0 auto;">
-        <div class="card">
-            <h2 style="color: var(--primary);"><i class="fas fa-envelope"></i> Verifikasi Email</h2>
-            <p>Kami telah mengirim kode verifikasi ke <strong>{user.email}</strong></p>
-            <form method="POST">
-                <div class="form-group">
-                    <label class="form-label">Kode Verifikasi (6 digit)</label>
-                    <input type="text" name="verification_code" class="form-control" maxlength="6" required>
-                </div>
-                <button type="submit" class="btn btn-primary" style="width: 100%;">Verifikasi</button>
-            </form>
-            <p style="text-align: center; margin-top: 1rem;">
-                Tidak menerima kode? <a href="/resend_verification">Kirim ulang</a>
-            </p>
-        </div>
-    </div>
-    '''
-    return base_html('Verifikasi Email', content)
+    return render_page('auth/verify_email.html', 'Verifikasi Email', user=user)
 
 @app.route('/resend_verification')
 def resend_verification():
@@ -2992,33 +4589,7 @@ def profile():
             total_orders = 0
             total_spent = 0
         
-        content = f'''
-        <div class="card">
-            <h2 style="color: var(--primary);"><i class="fas fa-user"></i> Profile {current_user.user_type.title()}</h2>
-            <div class="grid grid-2">
-                <div>
-                    <h4>Informasi Pribadi</h4>
-                    <p><strong>Nama:</strong> {current_user.full_name}</p>
-                    <p><strong>Email:</strong> {current_user.email}</p>
-                    <p><strong>Alamat:</strong> {current_user.address or '-'}</p>
-                    <p><strong>Tipe Akun:</strong> <span class="badge">{current_user.user_type.upper()}</span></p>
-                </div>
-                <div>
-                    <h4>Statistik</h4>
-                    {current_user.user_type == 'customer' and f'''
-                    <p><strong>Total Order:</strong> {total_orders}</p>
-                    <p><strong>Total Belanja:</strong> Rp {total_spent:,.0f}</p>
-                    ''' or '''
-                    <p><strong>Role:</strong> Penjual/Pemilik Toko</p>
-                    <p><strong>Akses:</strong> Manajemen Penuh</p>
-                    '''}
-                    <p><strong>Member sejak:</strong> {current_user.created_at.strftime('%d/%m/%Y')}</p>
-                    <p><strong>Status Verifikasi:</strong> {'✅ Terverifikasi' if current_user.email_verified else '❌ Belum diverifikasi'}</p>
-                </div>
-            </div>
-        </div>
-        '''
-        return base_html('Profile', content)
+        return render_page('customer/profile.html', 'Profile', total_orders=total_orders, total_spent=total_spent)
     except Exception as e:
         print(f"Error in profile route: {e}")
         flash('Terjadi error saat memuat profile.', 'error')
@@ -3026,39 +4597,23 @@ def profile():
 
 @app.route('/products')
 @login_required
+@conditional_page('products')
 def products():
     try:
-        products_list = Product.query.filter_by(is_active=True).all()
-        
-        products_html = ""
-        for product in products_list:
-            weight_info = f"{product.weight_kg}kg" if product.weight_kg else f"{product.size_cm}cm"
-            add_to_cart_btn = ''
-            if current_user.user_type == 'customer':
-                add_to_cart_btn = f'''
-                <button class="btn btn-primary" onclick="addToCart({product.id})" style="margin-top: 1rem;">
-                    <i class="fas fa-cart-plus"></i> Tambah ke Keranjang
-                </button>
-                '''
-            
-            products_html += f'''
-            <div class="card">
-                <img src="{product.image_url}" alt="{product.name}" class="product-image" onerror="this.style.display='none'">
-                <h3>{product.name}</h3>
-                <p>{product.description}</p>
-                <div class="price">Rp {product.price:,.0f}</div>
-                <p>Stock: {product.stock} | {weight_info}</p>
-                {add_to_cart_btn}
-            </div>
-            '''
-        
-        content = f'''
-        <h1 style="color: var(--primary);"><i class="fas fa-store"></i> Semua Produk</h1>
-        <div class="grid grid-3">
-            {products_html}
-        </div>
-        '''
-        return base_html('Produk', content)
+        params = parse_catalog_params(request.args)
+    except ValueError as e:
+        flash(f'Filter tidak valid: {e}', 'error')
+        return redirect('/products')
+    
+    try:
+        products_list, next_cursor = query_product_page(params)
+        
+        return render_page('products/catalog.html', 'Produk',
+                           products=products_list,
+                           params=params,
+                           categories=PRODUCT_CATEGORIES,
+                           sorts=PRODUCT_SORTS,
+                           next_url=next_page_url(next_cursor))
     except Exception as e:
         print(f"Error in products route: {e}")
         flash('Terjadi error saat memuat produk.', 'error')
@@ -3073,53 +4628,8 @@ def cart():
             flash('Hanya customer yang bisa mengakses keranjang belanja.', 'error')
             return redirect('/')
         
-        cart_items = CartItem.query.filter_by(user_id=current_user.id).all()
-        
-        if not cart_items:
-            content = '''
-            <div class="card">
-                <h2 style="color: var(--primary);"><i class="fas fa-shopping-cart"></i> Keranjang Belanja</h2>
-                <p>Keranjang belanja Anda kosong.</p>
-                <a href="/products" class="btn btn-primary">Belanja Sekarang</a>
-            </div>
-            '''
-        else:
-            cart_html = ""
-            total = 0
-            
-            for item in cart_items:
-                product = Product.query.get(item.product_id)
-                if product:  # Pastikan product exists
-                    subtotal = product.price * item.quantity
-                    total += subtotal
-                    
-                    cart_html += f'''
-                    <div class="card" style="display: flex; justify-content: space-between; align-items: center;">
-                        <div style="flex: 1;">
-                            <h4>{product.name}</h4>
-                            <p>Rp {product.price:,.0f} x {item.quantity}</p>
-                            <p>Subtotal: Rp {subtotal:,.0f}</p>
-                        </div>
-                        <div>
-                            <form action="/remove_from_cart/{item.id}" method="POST" style="display: inline;">
-                                <button type="submit" class="btn btn-danger">Hapus</button>
-                            </form>
-                        </div>
-                    </div>
-                    '''
-            
-            content = f'''
-            <h1 style="color: var(--primary);"><i class="fas fa-shopping-cart"></i> Keranjang Belanja</h1>
-            {cart_html}
-            <div class="card">
-                <h3>Total: Rp {total:,.0f}</h3>
-                <button class="btn btn-success" onclick="checkout()">
-                    <i class="fas fa-credit-card"></i> Checkout Sekarang
-                </button>
-            </div>
-            '''
-        
-        return base_html('Keranjang', content)
+        cart = load_cart(current_user.id)
+        return render_page('customer/cart.html', 'Keranjang', cart=cart, thumb_sizes=THUMB_IMAGE_SIZES)
     except Exception as e:
         print(f"Error in cart route: {e}")
         flash('Terjadi error saat memuat keranjang.', 'error')
@@ -3133,10 +4643,7 @@ def remove_from_cart(cart_item_id):
             flash('Akses ditolak.', 'error')
             return redirect('/')
         
-        cart_item = CartItem.query.get(cart_item_id)
-        if cart_item and cart_item.user_id == current_user.id:
-            db.session.delete(cart_item)
-            db.session.commit()
+        if cart_store.remove(current_user.id, cart_item_id):
             flash('Produk dihapus dari keranjang', 'success')
         return redirect('/cart')
     except Exception as e:
@@ -3152,67 +4659,13 @@ def checkout_page():
             flash('Hanya customer yang bisa checkout.', 'error')
             return redirect('/')
         
-        cart_items = CartItem.query.filter_by(user_id=current_user.id).all()
+        cart = load_cart(current_user.id)
         
-        if not cart_items:
+        if not cart['lines']:
             flash('Keranjang belanja Anda kosong', 'error')
             return redirect('/cart')
         
-        total = 0
-        for item in cart_items:
-            product = Product.query.get(item.product_id)
-            if product:
-                total += product.price * item.quantity
-        
-        content = f'''
-        <div style="max-width: 600px; margin: 0 auto;">
-            <div class="card">
-                <h2 style="color: var(--primary);"><i class="fas fa-credit-card"></i> Checkout</h2>
-                
-                <div class="form-group">
-                    <label class="form-label">Alamat Pengiriman</label>
-                    <textarea id="shipping_address" class="form-control" required placeholder="Masukkan alamat lengkap pengiriman">{current_user.address or ''}</textarea>
-                </div>
-                
-                <div class="form-group">
-                    <label class="form-label">Metode Pengiriman</label>
-                    <select id="shipping_method" class="form-control" required>
-                        <option value="">Pilih metode pengiriman</option>
-                        <option value="jne">JNE Reguler - Rp 15,000</option>
-                        <option value="jnt">JNT Express - Rp 12,000</option>
-                        <option value="pos">POS Indonesia - Rp 10,000</option>
-                        <option value="grab">Grab Express - Rp 20,000</option>
-                    </select>
-                </div>
-                
-                <div class="form-group">
-                    <label class="form-label">Metode Pembayaran</label>
-                    <select id="payment_method" class="form-control" required>
-                        <option value="">Pilih metode pembayaran</option>
-                        <option value="bri">BRI (123456)</option>
-                        <option value="bca">BCA (789012)</option>
-                        <option value="mandiri">Mandiri (345678)</option>
-                        <option value="qris">QRIS</option>
-                        <option value="gopay">Gopay +6289654733875</option>
-                        <option value="dana">Dana +6289654733875</option>
-                        <option value="cod">Cash on Delivery (COD)</option>
-                    </select>
-                </div>
-                
-                <div class="card" style="background: var(--ocean-light);">
-                    <h4>Ringkasan Pesanan</h4>
-                    <p><strong>Total Belanja:</strong> Rp {total:,.0f}</p>
-                    <p><strong>Ongkos Kirim:</strong> Rp 15,000</p>
-                    <p><strong>Total Pembayaran:</strong> Rp {total + 15000:,.0f}</p>
-                </div>
-                
-                <button class="btn btn-success" style="width: 100%; margin-top: 1rem;" onclick="processCheckout()">
-                    <i class="fas fa-credit-card"></i> Proses Pembayaran
-                </button>
-            </div>
-        </div>
-        '''
-        return base_html('Checkout', content)
+        return render_page('customer/checkout.html', 'Checkout', total=cart['total'], shipping_cost=15000)
     except Exception as e:
         print(f"Error in checkout route: {e}")
         flash('Terjadi error saat memuat halaman checkout.', 'error')
@@ -3225,9 +4678,9 @@ def process_checkout():
         if current_user.user_type != 'customer':
             return jsonify({'success': False, 'message': 'Akses ditolak'})
         
-        cart_items = CartItem.query.filter_by(user_id=current_user.id).all()
+        cart = load_cart(current_user.id)
         
-        if not cart_items:
+        if not cart['lines']:
             return jsonify({'success': False, 'message': 'Keranjang kosong'})
         
         shipping_address = request.form.get('shipping_address')
@@ -3237,20 +4690,24 @@ def process_checkout():
         if not shipping_address or not shipping_method or not payment_method:
             return jsonify({'success': False, 'message': 'Harap lengkapi semua data pengiriman dan pembayaran'})
         
-        order_number = f"ORD{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        total_amount = 0
-        
         # Cek stok sebelum checkout
-        for cart_item in cart_items:
-            product = Product.query.get(cart_item.product_id)
-            if not product or product.stock < cart_item.quantity:
-                product_name = product.name if product else 'Produk'
-                return jsonify({'success': False, 'message': f'Stock {product_name} tidak mencukupi'})
+        if cart['unavailable']:
+            product = cart['unavailable'][0].product
+            product_name = product.name if product else 'Produk'
+            return jsonify({'success': False, 'message': f'Stock {product_name} tidak mencukupi'})
+        
+        # Satu transaksi (satu commit): order, item, stok dan pengosongan keranjang
+        # tersimpan bersama atau tidak sama sekali
+        lines = [line for line in cart['lines'] if line.product]
+        shipping_cost = 15000
+        total_amount = cart['total'] + shipping_cost
         
+        # Nomor diambil setelah cek stok supaya checkout yang ditolak tidak membuat lubang di seri ORD
+        order_number = generate_order_number()
         order = Order(
             order_number=order_number,
             customer_id=current_user.id,
-            total_amount=0,
+            total_amount=total_amount,
             shipping_address=shipping_address,
             shipping_method=shipping_method,
             payment_method=payment_method,
@@ -3260,32 +4717,22 @@ def process_checkout():
         db.session.add(order)
         db.session.flush()
         
-        # Kurangi stok dan buat order items
-        for cart_item in cart_items:
-            product = Product.query.get(cart_item.product_id)
-            if product:
-                product.stock -= cart_item.quantity  # Kurangi stok
-                print(f"✅ Stok {product.name} berkurang {cart_item.quantity} menjadi {product.stock}")
-                
-                order_item = OrderItem(
-                    order_id=order.id,
-                    product_id=product.id,
-                    quantity=cart_item.quantity,
-                    price=product.price,
-                    cost_price=product.cost_price
-                )
-                db.session.add(order_item)
-                total_amount += product.price * cart_item.quantity
-        
-        # Tambahkan ongkos kirim
-        shipping_cost = 15000
-        total_amount += shipping_cost
-        
-        order.total_amount = total_amount
-        db.session.commit()
-        
-        # Hapus cart items
-        CartItem.query.filter_by(user_id=current_user.id).delete()
+        # Kurangi stok dengan UPDATE bersyarat: checkout lain yang berjalan bersamaan
+        # tidak bisa membuat stok minus; jika satu produk kalah, seluruh order dibatalkan
+        if not decrement_stock({line.product.id: line.item.quantity for line in lines}):
+            db.session.rollback()
+            unavailable = load_cart(current_user.id)['unavailable']
+            product_name = unavailable[0].product.name if unavailable and unavailable[0].product else 'Produk'
+            return jsonify({'success': False, 'message': f'Stock {product_name} tidak mencukupi'})
+        
+        db.session.execute(db.insert(OrderItem), [{
+            'order_id': order.id,
+            'product_id': line.product.id,
+            'quantity': line.item.quantity,
+            'price': line.product.price,
+            'cost_price': line.product.cost_price,
+        } for line in lines])
+        cart_store.clear(current_user.id)
         db.session.commit()
         
         return jsonify({
@@ -3296,6 +4743,7 @@ def process_checkout():
             'total_amount': total_amount
         })
     except Exception as e:
+        db.session.rollback()
         print(f"Error processing checkout: {e}")
         return jsonify({'success': False, 'message': 'Terjadi error saat proses checkout'})
 
@@ -3328,60 +4776,15 @@ def orders():
             orders_list = Order.query.order_by(Order.order_date.desc()).all()
             title = 'Semua Pesanan'
         
-        if not orders_list:
-            content = f'''
-            <div class="card">
-                <h2 style="color: var(--primary);"><i class="fas fa-box"></i> {title}</h2>
-                <p>Belum ada pesanan.</p>
-                {current_user.user_type == 'customer' and '<a href="/products" class="btn btn-primary">Belanja Sekarang</a>' or ''}
-            </div>
-            '''
+        if current_user.user_type == 'customer':
+            customers = {current_user.id: current_user}
         else:
-            orders_html = ""
-            for order in orders_list:
-                customer = User.query.get(order.customer_id) if current_user.user_type != 'customer' else current_user
-                
-                # Status dengan style text normal
-                status_display = f"<span class='status-text status-{order.status}'>{order.status.upper()}</span>"
-                payment_status_display = f"<span class='status-text status-{order.payment_status}'>{order.payment_status.upper()}</span>"
-                
-                customer_info = f"<p><strong>Customer:</strong> {customer.full_name}</p>" if current_user.user_type != 'customer' else ""
-                
-                orders_html += f'''
-                <div class="card">
-                    <h4>Order #{order.order_number}</h4>
-                    {customer_info}
-                    <p><strong>Total:</strong> Rp {order.total_amount:,.0f}</p>
-                    <p><strong>Status:</strong> {status_display}</p>
-                    <p><strong>Pembayaran:</strong> {payment_status_display}</p>
-                    <p><strong>Metode:</strong> {order.payment_method} | <strong>Pengiriman:</strong> {order.shipping_method}</p>
-                    <p><strong>Tanggal:</strong> {order.order_date.strftime('%d/%m/%Y %H:%M')}</p>
-                    <p><strong>Alamat:</strong> {order.shipping_address}</p>
-                    {order.tracking_info and f'<p><strong>Tracking:</strong> {order.tracking_info}</p>' or ''}
-                    
-                    {current_user.user_type == 'seller' and order.payment_status == 'unpaid' and '''
-                    <div style="margin-top: 1rem; padding: 1rem; background: rgba(229, 62, 62, 0.1); border-radius: 8px;">
-                        <p style="color: var(--error); margin: 0;">
-                            <strong>⚠️ Menunggu Pembayaran:</strong> Pesanan belum dapat diproses karena pembayaran belum diterima.
-                        </p>
-                    </div>
-                    ''' or ''}
-                    
-                    {current_user.user_type == 'seller' and order.payment_status == 'paid' and order.status == 'processing' and f'''
-                    <form action="/seller/update_order_status/{order.id}" method="POST" style="margin-top: 1rem;">
-                        <input type="hidden" name="status" value="completed">
-                        <button type="submit" class="btn btn-success">Selesaikan Order</button>
-                    </form>
-                    ''' or ''}
-                </div>
-                '''
-            
-            content = f'''
-            <h1 style="color: var(--primary);"><i class="fas fa-box"></i> {title}</h1>
-            {orders_html}
-            '''
+            # Nama customer diambil sekaligus, bukan satu query per order
+            customer_ids = {order.customer_id for order in orders_list}
+            customers = {user.id: user for user in User.query.filter(User.id.in_(customer_ids))} if customer_ids else {}
         
-        return base_html('Pesanan', content)
+        return render_page('customer/orders.html', 'Pesanan', heading=title,
+                           orders=[(order, customers.get(order.customer_id)) for order in orders_list])
     except Exception as e:
         print(f"Error in orders route: {e}")
         flash('Terjadi error saat memuat pesanan.', 'error')
@@ -3399,85 +4802,26 @@ def seller_dashboard():
         total_sales = total_sales_result if total_sales_result else 0
         total_customers = User.query.filter_by(user_type='customer').count()
         
-        # Recent orders
-        recent_orders = Order.query.order_by(Order.order_date.desc()).limit(5).all()
-        recent_orders_html = ""
-        for order in recent_orders:
-            customer = User.query.get(order.customer_id)
-            status_display = f"<span class='status-text status-{order.status}'>{order.status.upper()}</span>"
-            recent_orders_html += f'''
-            <div style="padding: 1rem; border-bottom: 1px solid rgba(0,0,0,0.1);">
-                <div style="display: flex; justify-content: between; align-items: center;">
-                    <div style="flex: 1;">
-                        <strong>#{order.order_number}</strong>
-                        <br><small>{customer.full_name if customer else 'Unknown'}</small>
-                    </div>
-                    <div>
-                        {status_display}
-                        <br><small>Rp {order.total_amount:,.0f}</small>
-                    </div>
-                </div>
-            </div>
-            '''
-        
-        content = f'''
-        <h1 style="color: var(--primary);"><i class="fas fa-chart-line"></i> Seller Dashboard</h1>
-        
-        <div class="stats">
-            <div class="stat-card">
-                <div class="stat-number">{total_products}</div>
-                <div class="stat-label">Total Produk</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">{total_orders}</div>
-                <div class="stat-label">Total Pesanan</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">Rp {total_sales:,.0f}</div>
-                <div class="stat-label">Total Penjualan</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">{total_customers}</div>
-                <div class="stat-label">Total Customer</div>
-            </div>
-        </div>
-        
-        <div class="grid grid-2">
-            <div class="card">
-                <h3 style="color: var(--primary);"><i class="fas fa-bolt"></i> Quick Actions</h3>
-                <div style="display: flex; flex-direction: column; gap: 1rem;">
-                    <a href="/seller/orders" class="btn btn-primary"><i class="fas fa-boxes"></i> Kelola Pesanan</a>
-                    <a href="/seller/accounting" class="btn btn-success"><i class="fas fa-chart-bar"></i> Lihat Akuntansi</a>
-                    <a href="/seller/products" class="btn btn-info"><i class="fas fa-fish"></i> Kelola Produk</a>
-                </div>
-            </div>
-            
-            <div class="card">
-                <h3 style="color: var(--primary);"><i class="fas fa-list"></i> Pesanan Terbaru</h3>
-                <div style="max-height: 300px; overflow-y: auto;">
-                    {recent_orders_html or '<p style="text-align: center; padding: 2rem;">Belum ada pesanan</p>'}
-                </div>
-            </div>
-        </div>
-        
-        <div class="grid grid-2">
-            <div class="card">
-                <h3 style="color: var(--primary);"><i class="fas fa-money-bill-wave"></i> Ringkasan Keuangan</h3>
-                <p><strong>Kas:</strong> Rp {Account.query.filter_by(type='kas').first().balance if Account.query.filter_by(type='kas').first() else 0:,.0f}</p>
-                <p><strong>Pendapatan:</strong> Rp {Account.query.filter_by(type='pendapatan').first().balance if Account.query.filter_by(type='pendapatan').first() else 0:,.0f}</p>
-                <p><strong>Laba Bersih:</strong> Rp {calculate_net_income():,.0f}</p>
-            </div>
-            
-            <div class="card">
-                <h3 style="color: var(--primary);"><i class="fas fa-chart-pie"></i> Status Pesanan</h3>
-                <p><strong>Pending:</strong> {Order.query.filter_by(status='pending').count()} pesanan</p>
-                <p><strong>Processing:</strong> {Order.query.filter_by(status='processing').count()} pesanan</p>
-                <p><strong>Completed:</strong> {Order.query.filter_by(status='completed').count()} pesanan</p>
-            </div>
-        </div>
-        '''
+        # Recent orders, nama customer ikut di-join
+        recent_orders = (db.session.query(Order, User)
+                         .outerjoin(User, User.id == Order.customer_id)
+                         .order_by(Order.order_date.desc()).limit(5).all())
+        balances = dict(db.session.query(Account.type, Account.balance)
+                        .filter(Account.type.in_(('kas', 'pendapatan'))).order_by(Account.id.desc()))
+        status_counts = dict(
+            db.session.query(Order.status, db.func.count(Order.id)).group_by(Order.status).all()
+        )
         
-        return base_html('Seller Dashboard', content)
+        return render_page('seller/dashboard.html', 'Seller Dashboard',
+                           total_products=total_products,
+                           total_orders=total_orders,
+                           total_sales=total_sales,
+                           total_customers=total_customers,
+                           recent_orders=recent_orders,
+                           cash_balance=balances.get('kas', 0),
+                           revenue_balance=balances.get('pendapatan', 0),
+                           net_income=calculate_net_income(),
+                           status_counts=status_counts)
     except Exception as e:
         print(f"Error in seller dashboard: {e}")
         flash('Terjadi error saat memuat dashboard.', 'error')
@@ -3501,91 +4845,107 @@ def calculate_net_income():
 @seller_required
 def seller_orders():
     try:
-        orders = Order.query.order_by(Order.order_date.desc()).all()
-        
-        orders_html = ""
-        for order in orders:
-            customer = User.query.get(order.customer_id)
-            status_display = f"<span class='status-text status-{order.status}'>{order.status.upper()}</span>"
-            payment_status_display = f"<span class='status-text status-{order.payment_status}'>{order.payment_status.upper()}</span>"
-            
-            tracking_steps = get_tracking_steps(order.status, order.tracking_info)
-            
-            orders_html += f'''
-            <div class="card">
-                <div style="display: flex; justify-content: space-between; align-items: start;">
-                    <div style="flex: 1;">
-                        <h4>Order #{order.order_number}</h4>
-                        <p><strong>Customer:</strong> {customer.full_name if customer else 'Unknown'}</p>
-                        <p><strong>Total:</strong> Rp {order.total_amount:,.0f}</p>
-                        <p><strong>Status:</strong> {status_display}</p>
-                        <p><strong>Pembayaran:</strong> {payment_status_display}</p>
-                        <p><strong>Metode:</strong> {order.payment_method} | <strong>Pengiriman:</strong> {order.shipping_method}</p>
-                        <p><strong>Tanggal:</strong> {order.order_date.strftime('%d/%m/%Y %H:%M')}</p>
-                        
-                        <div class="tracking-steps">
-                            {tracking_steps}
-                        </div>
-                        
-                        {order.payment_status == 'paid' and f'''
-                        <div class="form-group">
-                            <label class="form-label">Update Status Pengiriman:</label>
-                            <select id="tracking-info-{order.id}" class="form-control">
-                                <option value="Pesanan diproses" {'selected' if order.tracking_info == 'Pesanan diproses' else ''}>Pesanan diproses</option>
-                                <option value="Pesanan dikemas" {'selected' if order.tracking_info == 'Pesanan dikemas' else ''}>Pesanan dikemas</option>
-                                <option value="Pesanan dikirim" {'selected' if order.tracking_info == 'Pesanan dikirim' else ''}>Pesanan dikirim</option>
-                                <option value="Dalam perjalanan" {'selected' if order.tracking_info == 'Dalam perjalanan' else ''}>Dalam perjalanan</option>
-                                <option value="Tiba di tujuan" {'selected' if order.tracking_info == 'Tiba di tujuan' else ''}>Tiba di tujuan</option>
-                                <option value="Pesanan selesai" {'selected' if order.tracking_info == 'Pesanan selesai' else ''}>Pesanan selesai</option>
-                            </select>
-                        </div>
-                        ''' or '''
-                        <div style="margin-top: 1rem; padding: 1rem; background: rgba(229, 62, 62, 0.1); border-radius: 8px;">
-                            <p style="color: var(--error); margin: 0;">
-                                <strong>⚠️ Menunggu Pembayaran:</strong> Pesanan belum dapat diproses karena pembayaran belum diterima.
-                            </p>
-                        </div>
-                        '''}
-                    </div>
-                    <div>
-                        {get_order_actions(order)}
-                        {order.payment_status == 'paid' and f'''
-                        <button class="btn btn-info" onclick="updateTracking({order.id}, 'processing')">
-                            <i class="fas fa-map-marker-alt"></i> Update Tracking
-                        </button>
-                        ''' or ''}
-                    </div>
-                </div>
-            </div>
-            '''
-        
-        content = f'''
-        <h1 style="color: var(--primary);"><i class="fas fa-boxes"></i> Manajemen Pesanan</h1>
-        <div class="stats">
-            <div class="stat-card">
-                <div class="stat-number">{Order.query.filter_by(status='pending').count()}</div>
-                <div class="stat-label">Pending</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">{Order.query.filter_by(status='processing').count()}</div>
-                <div class="stat-label">Diproses</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">{Order.query.filter_by(status='completed').count()}</div>
-                <div class="stat-label">Selesai</div>
-            </div>
-        </div>
-        
-        {orders_html}
-        '''
-        
-        return base_html('Pesanan Seller', content)
+        return stream_page('Pesanan Seller', iter_seller_orders())
     except Exception as e:
         print(f"Error in seller orders: {e}")
         flash('Terjadi error saat memuat pesanan.', 'error')
         return redirect('/seller/dashboard')
 
-def get_tracking_steps(status, tracking_info):
+def iter_seller_orders():
+    """Isi halaman pesanan seller: ringkasan status dulu, lalu satu kartu per order"""
+    status_counts = dict(
+        db.session.query(Order.status, db.func.count(Order.id)).group_by(Order.status).all()
+    )
+    
+    yield f'''
+    <h1 style="color: var(--primary);"><i class="fas fa-boxes"></i> Manajemen Pesanan</h1>
+    <div class="stats">
+        <div class="stat-card">
+            <div class="stat-number">{status_counts.get('pending', 0)}</div>
+            <div class="stat-label">Pending</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-number">{status_counts.get('processing', 0)}</div>
+            <div class="stat-label">Diproses</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-number">{status_counts.get('completed', 0)}</div>
+            <div class="stat-label">Selesai</div>
+        </div>
+    </div>
+    '''
+    
+    # Ambil kolom saja (bukan objek ORM) per batch supaya memori tidak ikut membesar
+    # dengan jumlah order; nama customer ikut di-join, tanpa query per order
+    orders = db.session.execute(
+        db.select(Order.__table__, User.full_name.label('customer_name'))
+        .outerjoin(User, User.id == Order.customer_id)
+        .order_by(Order.order_date.desc())
+        .execution_options(yield_per=STREAM_CHUNK_ROWS)
+    )
+    for order in orders:
+        key = ('order', order.id, order.updated_at, 'seller', order.customer_name)
+        yield fragment_cache.get_or_render(
+            key, lambda: render_seller_order_card(order, order.customer_name)
+        )
+
+def render_seller_order_card(order, customer_name):
+    status_display = f"<span class='status-text status-{order.status}'>{order.status.upper()}</span>"
+    payment_status_display = f"<span class='status-text status-{order.payment_status}'>{order.payment_status.upper()}</span>"
+    
+    tracking_steps = get_tracking_steps(order.status)
+    
+    return f'''
+    <div class="card">
+        <div style="display: flex; justify-content: space-between; align-items: start;">
+            <div style="flex: 1;">
+                <h4>Order #{order.order_number}</h4>
+                <p><strong>Customer:</strong> {customer_name or 'Unknown'}</p>
+                <p><strong>Total:</strong> Rp {order.total_amount:,.0f}</p>
+                <p><strong>Status:</strong> {status_display}</p>
+                <p><strong>Pembayaran:</strong> {payment_status_display}</p>
+                <p><strong>Metode:</strong> {order.payment_method} | <strong>Pengiriman:</strong> {order.shipping_method}</p>
+                <p><strong>Tanggal:</strong> {order.order_date.strftime('%d/%m/%Y %H:%M')}</p>
+                
+                <div class="tracking-steps">
+                    {tracking_steps}
+                </div>
+                
+                {order.payment_status == 'paid' and f'''
+                <div class="form-group">
+                    <label class="form-label">Update Status Pengiriman:</label>
+                    <select id="tracking-info-{order.id}" class="form-control">
+                        <option value="Pesanan diproses" {'selected' if order.tracking_info == 'Pesanan diproses' else ''}>Pesanan diproses</option>
+                        <option value="Pesanan dikemas" {'selected' if order.tracking_info == 'Pesanan dikemas' else ''}>Pesanan dikemas</option>
+                        <option value="Pesanan dikirim" {'selected' if order.tracking_info == 'Pesanan dikirim' else ''}>Pesanan dikirim</option>
+                        <option value="Dalam perjalanan" {'selected' if order.tracking_info == 'Dalam perjalanan' else ''}>Dalam perjalanan</option>
+                        <option value="Tiba di tujuan" {'selected' if order.tracking_info == 'Tiba di tujuan' else ''}>Tiba di tujuan</option>
+                        <option value="Pesanan selesai" {'selected' if order.tracking_info == 'Pesanan selesai' else ''}>Pesanan selesai</option>
+                    </select>
+                </div>
+                ''' or '''
+                <div style="margin-top: 1rem; padding: 1rem; background: rgba(229, 62, 62, 0.1); border-radius: 8px;">
+                    <p style="color: var(--error); margin: 0;">
+                        <strong>⚠️ Menunggu Pembayaran:</strong> Pesanan belum dapat diproses karena pembayaran belum diterima.
+                    </p>
+                </div>
+                '''}
+            </div>
+            <div>
+                {get_order_actions(order)}
+                {order.payment_status == 'paid' and f'''
+                <button class="btn btn-info" onclick="updateTracking({order.id}, 'processing')">
+                    <i class="fas fa-map-marker-alt"></i> Update Tracking
+                </button>
+                ''' or ''}
+            </div>
+        </div>
+    </div>
+    '''
+
+# Hanya bergantung pada status, jadi cache cukup satu entri per status
+@lru_cache(maxsize=16)
+def get_tracking_steps(status):
     steps = [
         {'id': 'pending', 'label': 'Pesanan Diterima', 'icon': '📥'},
         {'id': 'processing', 'label': 'Diproses', 'icon': '⚙️'},
@@ -3616,6 +4976,7 @@ def get_tracking_steps(status, tracking_info):
     return steps_html
 
 def get_order_actions(order):
+    # Tidak di-memo: kartu order yang memakainya sudah ada di fragment_cache
     if order.payment_status != 'paid':
         return '<span class="status-text status-unpaid">MENUNGGU PEMBAYARAN</span>'
     
@@ -3652,6 +5013,7 @@ def update_order_status(order_id):
                 flash('Status order berhasil diupdate!', 'success')
             
             db.session.commit()
+            fragment_cache.invalidate('order', order.id)
         else:
             flash('Order tidak dapat diproses karena pembayaran belum diterima!', 'error')
         
@@ -3689,6 +5051,7 @@ def update_tracking(order_id):
                     create_sales_journal(order)
             
             db.session.commit()
+            fragment_cache.invalidate('order', order.id)
             return jsonify({'success': True, 'message': 'Status pengiriman diperbarui'})
         
         return jsonify({'success': False, 'message': 'Order tidak ditemukan atau belum dibayar'})
@@ -3701,41 +5064,90 @@ def update_tracking(order_id):
 @seller_required
 def seller_products():
     try:
-        products = Product.query.filter_by(seller_id=current_user.id).all()
-        
-        products_html = ""
-        for product in products:
-            weight_info = f"{product.weight_kg}kg" if product.weight_kg else f"{product.size_cm}cm"
-            products_html += f'''
-            <div class="card">
-                <div style="display: flex; justify-content: space-between; align-items: start;">
-                    <div style="flex: 1;">
-                        <img src="{product.image_url}" alt="{product.name}" class="product-image" style="max-width: 200px;" onerror="this.style.display='none'">
-                        <h4>{product.name}</h4>
-                        <p>{product.description}</p>
-                        <div class="price">Rp {product.price:,.0f}</div>
-                        <p>Stock: {product.stock} | {weight_info} | Kategori: {product.category}</p>
-                        <p>Harga Cost: Rp {product.cost_price:,.0f}</p>
-                    </div>
-                    <div>
-                        <a href="/seller/edit_product/{product.id}" class="btn btn-warning"><i class="fas fa-edit"></i> Edit</a>
-                    </div>
-                </div>
-            </div>
-            '''
-        
-        content = f'''
-        <h1 style="color: var(--primary);"><i class="fas fa-fish"></i> Manajemen Produk</h1>
-        <a href="/seller/add_product" class="btn btn-primary"><i class="fas fa-plus"></i> Tambah Produk Baru</a>
-        {products_html}
-        '''
+        params = parse_catalog_params(request.args)
+    except ValueError as e:
+        flash(f'Filter tidak valid: {e}', 'error')
+        return redirect('/seller/products')
+    
+    try:
+        products, next_cursor = query_product_page(params, seller_id=current_user.id)
         
-        return base_html('Produk Seller', content)
+        return render_page('seller/products.html', 'Produk Seller',
+                           products=products,
+                           params=params,
+                           next_url=next_page_url(next_cursor))
     except Exception as e:
         print(f"Error in seller products: {e}")
         flash('Terjadi error saat memuat produk.', 'error')
         return redirect('/seller/dashboard')
 
+@app.route('/seller/products/export')
+@login_required
+@seller_required
+def export_products():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in CATALOG_EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': 'Format tidak dikenal'}), 400
+    
+    mimetype, extension = CATALOG_EXPORT_FORMATS[fmt]
+    response = Response(stream_with_context(iter_catalog_export(current_user.id, fmt)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=produk-{datetime.now():%Y%m%d}.{extension}'
+    return response
+
+@app.route('/seller/products/import', methods=['POST'])
+@login_required
+@seller_required
+def import_products():
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        return jsonify({'success': False, 'message': 'File CSV belum dipilih'}), 400
+    
+    try:
+        report = import_catalog_csv(current_user.id, file.stream)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'success': False, 'message': f'File tidak bisa dibaca: {e}'}), 400
+    except Exception as e:
+        print(f"Error importing products: {e}")
+        return jsonify({'success': False, 'message': 'Terjadi error saat impor'}), 500
+    
+    errors = report['errors']
+    return jsonify({
+        'success': True,
+        'message': f"{report['inserted']} produk ditambahkan, {report['updated']} diperbarui, {len(errors)} baris gagal",
+        'inserted': report['inserted'],
+        'updated': report['updated'],
+        'error_count': len(errors),
+        'errors': errors[:CATALOG_IMPORT_MAX_REPORTED_ERRORS],
+    })
+
+@app.route('/seller/products/bulk_update', methods=['POST'])
+@login_required
+@seller_required
+def bulk_update_products():
+    """Body: [{product_id, price?, cost_price?, stock_delta?}, ...] atau {"updates": [...]}"""
+    data = request.get_json(silent=True)
+    records = data.get('updates') if isinstance(data, dict) else data
+    if not isinstance(records, list) or not records:
+        return jsonify({'success': False, 'message': 'Daftar update kosong atau tidak valid'}), 400
+    if len(records) > BULK_UPDATE_MAX_ROWS:
+        return jsonify({'success': False, 'message': f'Maksimal {BULK_UPDATE_MAX_ROWS} baris per request'}), 400
+    
+    try:
+        results = apply_bulk_update(current_user.id, records)
+    except RuntimeError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in bulk update products: {e}")
+        return jsonify({'success': False, 'message': 'Terjadi error'}), 500
+    
+    updated = sum(1 for result in results if result['success'])
+    return jsonify({
+        'success': True,
+        'message': f'{updated} dari {len(results)} produk diperbarui',
+        'results': results,
+    })
+
 @app.route('/seller/add_product', methods=['GET', 'POST'])
 @login_required
 @seller_required
@@ -3767,7 +5179,7 @@ def add_product():
             if 'image' in request.files:
                 file = request.files['image']
                 if file and file.filename != '':
-                    filename = save_product_image(file, product.name)
+                    filename = save_product_image(file)
                     if filename:
                         product.image_url = f'/static/{filename}'
             
@@ -3777,64 +5189,7 @@ def add_product():
             flash('Produk berhasil ditambahkan!', 'success')
             return redirect('/seller/products')
         
-        content = '''
-        <div style="max-width: 600px; margin: 0 auto;">
-            <div class="card">
-                <h2 style="color: var(--primary);"><i class="fas fa-plus"></i> Tambah Produk Baru</h2>
-                <form method="POST" enctype="multipart/form-data">
-                    <div class="form-group">
-                        <label class="form-label">Gambar Produk</label>
-                        <input type="file" name="image" class="form-control" accept="image/*">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label class="form-label">Nama Produk</label>
-                        <input type="text" name="name" class="form-control" required>
-                    </div>
-                    <div class="form-group">
-                        <label class="form-label">Deskripsi</label>
-                        <textarea name="description" class="form-control" required></textarea>
-                    </div>
-                    <div class="grid grid-2">
-                        <div class="form-group">
-                            <label class="form-label">Harga Jual</label>
-                            <input type="number" name="price" class="form-control" step="0.01" required>
-                        </div>
-                        <div class="form-group">
-                            <label class="form-label">Harga Cost</label>
-                            <input type="number" name="cost_price" class="form-control" step="0.01" required>
-                        </div>
-                    </div>
-                    <div class="grid grid-3">
-                        <div class="form-group">
-                            <label class="form-label">Stock</label>
-                            <input type="number" name="stock" class="form-control" required>
-                        </div>
-                        <div class="form-group">
-                            <label class="form-label">Kategori</label>
-                            <select name="category" class="form-control" required>
-                                <option value="bibit">Bibit</option>
-                                <option value="konsumsi">Konsumsi</option>
-                                <option value="ikan_mas">Ikan Mas</option>
-                            </select>
-                        </div>
-                    </div>
-                    <div class="grid grid-2">
-                        <div class="form-group">
-                            <label class="form-label">Ukuran (cm)</label>
-                            <input type="number" name="size_cm" class="form-control" step="0.1">
-                        </div>
-                        <div class="form-group">
-                            <label class="form-label">Berat (kg)</label>
-                            <input type="number" name="weight_kg" class="form-control" step="0.1">
-                        </div>
-                    </div>
-                    <button type="submit" class="btn btn-primary"><i class="fas fa-save"></i> Simpan Produk</button>
-                </form>
-            </div>
-        </div>
-        '''
-        return base_html('Tambah Produk', content)
+        return render_page('seller/product_form.html', 'Tambah Produk', product=None, categories=PRODUCT_CATEGORIES)
     except Exception as e:
         print(f"Error in add product: {e}")
         flash('Terjadi error saat menambah produk.', 'error')
@@ -3861,81 +5216,16 @@ def edit_product(product_id):
             if 'image' in request.files:
                 file = request.files['image']
                 if file and file.filename != '':
-                    filename = save_product_image(file, product.name)
+                    filename = save_product_image(file)
                     if filename:
                         product.image_url = f'/static/{filename}'
             
             db.session.commit()
+            fragment_cache.invalidate('product', product.id)
             flash('Produk berhasil diperbarui!', 'success')
             return redirect('/seller/products')
         
-        content = f'''
-        <div style="max-width: 600px; margin: 0 auto;">
-            <div class="card">
-                <h2 style="color: var(--primary);"><i class="fas fa-edit"></i> Edit Produk</h2>
-                
-                <form method="POST" enctype="multipart/form-data">
-                    <div class="form-group">
-                        <label class="form-label">Gambar Produk</label>
-                        <input type="file" name="image" class="form-control" accept="image/*">
-                        <small>Upload gambar baru untuk mengganti gambar saat ini</small>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label class="form-label">Nama Produk</label>
-                        <input type="text" name="name" class="form-control" value="{product.name}" required>
-                    </div>
-                    <div class="form-group">
-                        <label class="form-label">Deskripsi</label>
-                        <textarea name="description" class="form-control" required>{product.description}</textarea>
-                    </div>
-                    <div class="grid grid-2">
-                        <div class="form-group">
-                            <label class="form-label">Harga Jual</label>
-                            <input type="number" name="price" class="form-control" step="0.01" value="{product.price}" required>
-                        </div>
-                        <div class="form-group">
-                            <label class="form-label">Harga Cost</label>
-                            <input type="number" name="cost_price" class="form-control" step="0.01" value="{product.cost_price}" required>
-                        </div>
-                    </div>
-                    <div class="grid grid-3">
-                        <div class="form-group">
-                            <label class="form-label">Stock</label>
-                            <input type="number" name="stock" class="form-control" value="{product.stock}" required>
-                        </div>
-                        <div class="form-group">
-                            <label class="form-label">Kategori</label>
-                            <select name="category" class="form-control" required>
-                                <option value="bibit" {'selected' if product.category == 'bibit' else ''}>Bibit</option>
-                                <option value="konsumsi" {'selected' if product.category == 'konsumsi' else ''}>Konsumsi</option>
-                                <option value="ikan_mas" {'selected' if product.category == 'ikan_mas' else ''}>Ikan Mas</option>
-                            </select>
-                        </div>
-                    </div>
-                    <div class="grid grid-2">
-                        <div class="form-group">
-                            <label class="form-label">Ukuran (cm)</label>
-                            <input type="number" name="size_cm" class="form-control" step="0.1" value="{product.size_cm or ''}">
-                        </div>
-                        <div class="form-group">
-                            <label class="form-label">Berat (kg)</label>
-                            <input type="number" name="weight_kg" class="form-control" step="0.1" value="{product.weight_kg or ''}">
-                        </div>
-                    </div>
-                    <button type="submit" class="btn btn-primary"><i class="fas fa-save"></i> Update Produk</button>
-                </form>
-                
-                <div style="margin-top: 2rem;">
-                    <h4>Gambar Saat Ini:</h4>
-                    <img src="{product.image_url}" alt="{product.name}" 
-                         style="max-width: 200px; height: auto; border-radius: 8px; margin-top: 1rem;"
-                         onerror="this.style.display='none'">
-                </div>
-            </div>
-        </div>
-        '''
-        return base_html('Edit Produk', content)
+        return render_page('seller/product_form.html', 'Edit Produk', product=product, categories=PRODUCT_CATEGORIES)
     except Exception as e:
         print(f"Error editing product: {e}")
         flash('Terjadi error saat mengupdate produk.', 'error')
@@ -3945,149 +5235,19 @@ def edit_product(product_id):
 @app.route('/seller/accounting')
 @login_required
 @seller_required
+@conditional_page()
 def seller_accounting():
+    """Halaman akuntansi. Isi tab selain saldo awal dimuat saat tabnya dibuka
+    (lihat seller_accounting_tab), jadi kunjungan awal hanya merender form template."""
     try:
-        # Get template options for dropdown
-        template_options = ""
-        for key, template in TRANSACTION_TEMPLATES.items():
-            template_options += f'<option value="{key}">{template["name"]}</option>'
-        
-        # Generate input form for template transactions
-        template_form = f'''
-        <div class="card">
-            <h3 style="color: var(--primary);"><i class="fas fa-plus-circle"></i> Input Jurnal Otomatis</h3>
-            <p>Pilih jenis transaksi dan sistem akan menampilkan form yang sesuai</p>
-            
-            <div class="form-group">
-                <label class="form-label">Jenis Transaksi</label>
-                <select id="transaction_template" class="form-control" onchange="loadTransactionTemplate()">
-                    <option value="">Pilih Jenis Transaksi</option>
-                    {template_options}
-                </select>
-            </div>
-            
-            <div id="templateFormContainer">
-                <!-- Form will be loaded here based on template selection -->
-            </div>
-        </div>
-        '''
-        
-        content = f'''
-        <h1 style="color: var(--primary);"><i class="fas fa-chart-bar"></i> Sistem Akuntansi Kang-Mas Shop</h1>
-        <p>Sistem akuntansi lengkap dengan siklus akuntansi terintegrasi</p>
-        
-        <div class="accounting-tabs">
-            <button class="tab active" onclick="showTab('saldo-awal', this)">Saldo Awal</button>
-            <button class="tab" onclick="showTab('jurnal-umum', this)">Jurnal Umum</button>
-            <button class="tab" onclick="showTab('buku-besar', this)">Buku Besar</button>
-            <button class="tab" onclick="showTab('neraca-saldo', this)">Neraca Saldo</button>
-            <button class="tab" onclick="showTab('laporan-keuangan', this)">Laporan Keuangan</button>
-        </div>
-        
-        <div id="saldo-awal" class="tab-content active">
-            <div class="card">
-                <h3 style="color: var(--primary);"><i class="fas fa-file-invoice-dollar"></i> Saldo Awal</h3>
-                <p>Pencatatan saldo awal usaha Kang-Mas Shop per 1 Januari 2025</p>
-                
-                <div style="background: var(--ocean-light); padding: 1.5rem; border-radius: var(--border-radius); margin: 1.5rem 0;">
-                    <h4 style="color: var(--primary); margin-bottom: 1rem;">Ringkasan Saldo Awal:</h4>
-                    <div class="grid grid-2">
-                        <div>
-                            <h5>Aset:</h5>
-                            <p>Kas: Rp 10,000,000</p>
-                            <p>Persediaan Barang Dagang: Rp 5,000,000</p>
-                            <p>Peralatan Toko: Rp 5,000,000</p>
-                            <p>Perlengkapan Toko: Rp 6,500,000</p>
-                            <p><strong>Total Aset: Rp 26,500,000</strong></p>
-                        </div>
-                        <div>
-                            <h5>Kewajiban & Ekuitas:</h5>
-                            <p>Utang Dagang: Rp 20,000,000</p>
-                            <p>Pendapatan Penjualan: Rp 6,500,000</p>
-                            <p><strong>Total Kewajiban & Ekuitas: Rp 26,500,000</strong></p>
-                        </div>
-                    </div>
-                </div>
-                
-                <table class="table">
-                    <thead>
-                        <tr>
-                            <th>Akun</th>
-                            <th>Kode</th>
-                            <th>Debit</th>
-                            <th>Kredit</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        <tr>
-                            <td>Kas</td>
-                            <td>101</td>
-                            <td class="debit">Rp 10,000,000</td>
-                            <td></td>
-                        </tr>
-                        <tr>
-                            <td>Persediaan Barang Dagang</td>
-                            <td>103</td>
-                            <td class="debit">Rp 5,000,000</td>
-                            <td></td>
-                        </tr>
-                        <tr>
-                            <td>Peralatan Toko</td>
-                            <td>105</td>
-                            <td class="debit">Rp 5,000,000</td>
-                            <td></td>
-                        </tr>
-                        <tr>
-                            <td>Perlengkapan Toko</td>
-                            <td>104</td>
-                            <td class="debit">Rp 6,500,000</td>
-                            <td></td>
-                        </tr>
-                        <tr>
-                            <td>Pendapatan Penjualan</td>
-                            <td>401</td>
-                            <td></td>
-                            <td class="credit">Rp 6,500,000</td>
-                        </tr>
-                        <tr>
-                            <td>Utang Dagang</td>
-                            <td>201</td>
-                            <td></td>
-                            <td class="credit">Rp 20,000,000</td>
-                        </tr>
-                        <tr style="font-weight: bold; border-top: 2px solid var(--primary);">
-                            <td colspan="2">TOTAL</td>
-                            <td class="debit">Rp 26,500,000</td>
-                            <td class="credit">Rp 26,500,000</td>
-                        </tr>
-                    </tbody>
-                </table>
-            </div>
-        </div>
-        
-        <div id="jurnal-umum" class="tab-content">
-            <div class="card">
-                <h3 style="color: var(--primary);"><i class="fas fa-book"></i> Jurnal Umum</h3>
-                <p>Pencatatan semua transaksi usaha dalam periode akuntansi</p>
-            </div>
-            
-            {template_form}
-            
-            {get_journal_entries_table()}
-        </div>
+        return render_page('seller/accounting.html', 'Akuntansi', transaction_templates=TRANSACTION_TEMPLATES)
+    except Exception as e:
+        print(f"Error in accounting: {e}")
+        flash('Terjadi error saat memuat data akuntansi.', 'error')
+        return redirect('/seller/dashboard')
 
-        <div id="buku-besar" class="tab-content">
-            <div class="card">
-                <h3 style="color: var(--primary);"><i class="fas fa-book-open"></i> Buku Besar</h3>
-                <p>Ringkasan semua transaksi per akun dalam periode akuntansi</p>
-                {get_ledger_data()}
-            </div>
-        </div>
-        
-        <div id="neraca-saldo" class="tab-content">
-            <div class="card">
-                <h3 style="color: var(--primary);"><i class="fas fa-balance-scale"></i> Neraca Saldo</h3>
-                <p>Daftar saldo semua akun buku besar sebelum penyesuaian</p>
+def iter_trial_balance_tab():
+    yield f'''
                 <table class="table">
                     <thead>
                         <tr>
@@ -4101,32 +5261,46 @@ def seller_accounting():
                         {get_trial_balance()}
                     </tbody>
                 </table>
-            </div>
-        </div>
-        
-        <div id="laporan-keuangan" class="tab-content">
+    '''
+
+def iter_financial_statements_tab():
+    yield f'''
             <div class="card">
                 <h3 style="color: var(--primary);"><i class="fas fa-chart-line"></i> Laporan Laba Rugi</h3>
                 {get_income_statement()}
             </div>
-            
+            '''
+    yield f'''
             <div class="card">
                 <h3 style="color: var(--primary);"><i class="fas fa-balance-scale-left"></i> Laporan Posisi Keuangan (Neraca)</h3>
                 {get_balance_sheet()}
             </div>
-            
+            '''
+    yield f'''
             <div class="card">
                 <h3 style="color: var(--primary);"><i class="fas fa-money-bill-wave"></i> Laporan Arus Kas</h3>
                 {get_cash_flow_statement()}
             </div>
-        </div>
-        '''
-        
-        return base_html('Akuntansi', content)
-    except Exception as e:
-        print(f"Error in accounting: {e}")
-        flash('Terjadi error saat memuat data akuntansi.', 'error')
-        return redirect('/seller/dashboard')
+    '''
+
+# Isi tiap tab akuntansi yang dimuat terpisah: nama tab -> generator potongan HTML
+ACCOUNTING_TABS = {
+    'jurnal-umum': iter_journal_entries_table,
+    'buku-besar': iter_ledger_data,
+    'neraca-saldo': iter_trial_balance_tab,
+    'laporan-keuangan': iter_financial_statements_tab,
+}
+
+@app.route('/seller/accounting/tab/<tab_name>')
+@login_required
+@seller_required
+@conditional_page('journals')
+def seller_accounting_tab(tab_name):
+    render_tab = ACCOUNTING_TABS.get(tab_name)
+    if not render_tab:
+        return jsonify({'success': False, 'message': 'Tab tidak ditemukan'}), 404
+    
+    return stream_fragment(f'tab akuntansi {tab_name}', render_tab())
 
 @app.route('/api/get_transaction_template/<template_key>')
 @login_required
@@ -4220,96 +5394,94 @@ def add_template_journal():
 @login_required
 def api_cart_add():
     try:
-        print("=== API CART ADD CALLED ===")
-        print("Current User:", current_user.id, current_user.email, current_user.user_type)
-        
-        # Check if user is customer
         if current_user.user_type != 'customer':
-            print("❌ User is not customer")
             return jsonify({'success': False, 'message': 'Hanya customer yang bisa menambah ke keranjang'})
         
-        # Check content type
         if not request.is_json:
-            print("❌ Request is not JSON")
             return jsonify({'success': False, 'message': 'Request harus berupa JSON'})
         
         data = request.get_json()
-        print("📦 Received data:", data)
-        
         if not data:
-            print("❌ No data received")
             return jsonify({'success': False, 'message': 'Data tidak valid'})
             
         product_id = data.get('product_id')
         quantity = data.get('quantity', 1)
         
         if not product_id:
-            print("❌ No product_id provided")
             return jsonify({'success': False, 'message': 'Product ID tidak ditemukan'})
         
-        # Convert to integer
         try:
             product_id = int(product_id)
             quantity = int(quantity)
         except (ValueError, TypeError):
-            print("❌ Invalid product_id or quantity")
             return jsonify({'success': False, 'message': 'Product ID atau quantity tidak valid'})
-        
-        product = Product.query.get(product_id)
-        if not product:
-            print("❌ Product not found with ID:", product_id)
-            return jsonify({'success': False, 'message': 'Produk tidak ditemukan'})
-        
-        print(f"✅ Product found: {product.name}, Stock: {product.stock}")
-        
-        # Check stock
-        if product.stock < quantity:
-            print(f"❌ Insufficient stock: {product.stock} < {quantity}")
-            return jsonify({'success': False, 'message': f'Stock {product.name} tidak mencukupi. Stok tersedia: {product.stock}'})
-        
-        # Check if item already in cart
-        existing_item = CartItem.query.filter_by(
-            user_id=current_user.id, 
-            product_id=product_id
-        ).first()
-        
-        if existing_item:
-            # Check if adding more would exceed stock
-            if product.stock < (existing_item.quantity + quantity):
-                print(f"❌ Would exceed stock: {existing_item.quantity} + {quantity} > {product.stock}")
-                return jsonify({'success': False, 'message': f'Stock tidak mencukupi untuk jumlah yang diminta. Stok tersedia: {product.stock}'})
-            
-            existing_item.quantity += quantity
-            print(f"✅ Updated existing item: {existing_item.quantity}")
-        else:
-            cart_item = CartItem(
-                user_id=current_user.id,
-                product_id=product_id,
-                quantity=quantity
-            )
-            db.session.add(cart_item)
-            print("✅ Created new cart item")
-        
-        db.session.commit()
-        print("✅ Cart updated successfully")
-        
-        # Get updated cart count
-        cart_count = CartItem.query.filter_by(user_id=current_user.id).count()
-        print(f"🛒 Cart count: {cart_count}")
+        if quantity < 1:
+            return jsonify({'success': False, 'message': 'Quantity minimal 1'})
+        
+        result = cart_store.add(current_user.id, product_id, quantity)
+        if result is None:
+            # Jalur gagal saja yang membaca produk lagi, untuk menyusun pesan yang jelas
+            db.session.rollback()
+            product = db.session.get(Product, product_id)
+            if not product:
+                return jsonify({'success': False, 'message': 'Produk tidak ditemukan'})
+            if product.stock < quantity:
+                return jsonify({'success': False, 'message': f'Stock {product.name} tidak mencukupi. Stok tersedia: {product.stock}'})
+            return jsonify({'success': False, 'message': f'Stock tidak mencukupi untuk jumlah yang diminta. Stok tersedia: {product.stock}'})
+        
+        _, product_name, cart_count = result
         
         return jsonify({
             'success': True, 
-            'message': f'{product.name} berhasil ditambahkan ke keranjang!',
+            'message': f'{product_name} berhasil ditambahkan ke keranjang!',
             'cart_count': cart_count
         })
         
     except Exception as e:
-        print(f"💥 ERROR in api_cart_add: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        print(f"Error in api_cart_add: {e}")
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Terjadi error sistem: {str(e)}'})
 
+@app.route('/api/cart/batch', methods=['POST'])
+@login_required
+def api_cart_batch():
+    """Body: {"operations": [{"op": "add"|"set"|"remove", "product_id": .., "quantity": ..}, ...]}"""
+    if current_user.user_type != 'customer':
+        return jsonify({'success': False, 'message': 'Hanya customer yang bisa mengubah keranjang'}), 403
+    
+    data = request.get_json(silent=True)
+    operations = data.get('operations') if isinstance(data, dict) else data
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'success': False, 'message': 'Daftar operasi kosong atau tidak valid'}), 400
+    if len(operations) > CART_BATCH_MAX_OPERATIONS:
+        return jsonify({'success': False, 'message': f'Maksimal {CART_BATCH_MAX_OPERATIONS} operasi per request'}), 400
+    
+    try:
+        summary, errors = apply_cart_operations(current_user.id, operations)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in cart batch: {e}")
+        return jsonify({'success': False, 'message': 'Terjadi error sistem'}), 500
+    
+    if errors:
+        return jsonify({'success': False, 'message': errors[0]['message'], 'errors': errors}), 400
+    return jsonify({'success': True, 'message': 'Keranjang diperbarui', 'cart': summary})
+
+@app.route('/api/products')
+@login_required
+def api_products():
+    try:
+        params = parse_catalog_params(request.args)
+        products, next_cursor = query_product_page(params)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'products': [product_to_dict(product) for product in products],
+        'next_cursor': next_cursor,
+    })
+
 @app.route('/api/cart/count')
 @login_required
 def api_cart_count():
@@ -4317,9 +5489,7 @@ def api_cart_count():
         if current_user.user_type != 'customer':
             return jsonify({'count': 0})
         
-        count = CartItem.query.filter_by(user_id=current_user.id).count()
-        print(f"🛒 Cart count requested: {count}")
-        return jsonify({'count': count})
+        return jsonify({'count': current_cart_count()})
     except Exception as e:
         print(f"Error getting cart count: {e}")
         return jsonify({'count': 0})
@@ -4330,4 +5500,6 @@ if __name__ == '__main__':
         # Reset database untuk memastikan skema terbaru
         reset_database_safe()
         create_initial_data()
-    app.run(debug=True, port=5000)
\ No newline at end of file
+        generate_missing_image_variants()
+        resume_image_jobs()
+    app.run(debug=True, port=5000)
@@ -0,0 +1,100 @@
+"""
+Benchmark throughput checkout (POST /process_checkout) di SQLite.
+
+Jalankan dari root repo:
+    python benchmarks/bench_checkout.py
+    python benchmarks/bench_checkout.py --app-dir /tmp/raa-lama --rounds 300 --items 10
+
+--app-dir menunjuk ke checkout lain (mis. `git worktree add /tmp/raa-lama <commit>`)
+sehingga angka sebelum/sesudah bisa dibandingkan dengan data dan skenario yang sama.
+Database memakai file SQLite sementara (fsync tetap terjadi), jadi data asli tidak
+tersentuh. Yang diukur hanya request checkout; pengisian keranjang tidak ikut dihitung.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+CHECKOUT_FORM = {'shipping_address': 'Jl. Benchmark 1', 'shipping_method': 'jne', 'payment_method': 'qris'}
+
+
+def load_app(app_dir, db_path, product_count):
+    os.environ['DATABASE_URI'] = 'sqlite:///' + db_path
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    spec = importlib.util.spec_from_file_location('bench_app', os.path.join(app_dir, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(module)
+        with module.app.app_context():
+            module.db.drop_all()
+            module.db.create_all()
+            module.create_initial_data()
+            seller_id = module.User.query.filter_by(user_type='seller').first().id
+            for i in range(product_count):
+                module.db.session.add(module.Product(name=f'Bench {i}', description='Produk benchmark',
+                                                     price=1000 + i, stock=10 ** 9, seller_id=seller_id,
+                                                     category='konsumsi'))
+            module.db.session.commit()
+            product_ids = [product.id for product in module.Product.query.filter(module.Product.name.like('Bench %'))]
+    return module, product_ids
+
+
+def use_unique_order_numbers(module):
+    # Nomor order versi lama berbasis detik; benchmark menjalankan banyak checkout per
+    # detik, jadi jam di modul app dimajukan satu detik setiap kali dibaca
+    clock = {'now': datetime(2030, 1, 1)}
+
+    class BenchDatetime(datetime):
+        # Nilai yang dikembalikan tetap datetime biasa supaya bisa disimpan driver SQLite
+        @classmethod
+        def now(cls, tz=None):
+            clock['now'] += timedelta(seconds=1)
+            return clock['now']
+
+        utcnow = staticmethod(datetime.utcnow)
+
+    module.datetime = BenchDatetime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app-dir', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--items', type=int, default=5, help='jumlah baris keranjang per checkout')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    module, product_ids = load_app(os.path.abspath(args.app_dir), os.path.join(tmp, 'bench.db'), args.items)
+    use_unique_order_numbers(module)
+
+    customer = module.app.test_client()
+    customer.post('/login', data={'email': 'customer@example.com', 'password': 'customer123'})
+
+    elapsed = 0.0
+    failures = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for round_index in range(args.rounds + 1):
+            for product_id in product_ids:
+                customer.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1})
+            start = time.perf_counter()
+            result = customer.post('/process_checkout', data=CHECKOUT_FORM).get_json()
+            duration = time.perf_counter() - start
+            if not result.get('success'):
+                failures += 1
+            # Checkout pertama adalah pemanasan
+            if round_index:
+                elapsed += duration
+
+    print(f"checkout: {args.rounds} x {args.items} item, gagal: {failures}")
+    print(f"ms/checkout:      {elapsed / args.rounds * 1000:10.2f}")
+    print(f"checkout/detik:   {args.rounds / elapsed:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
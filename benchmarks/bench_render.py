@@ -0,0 +1,88 @@
+"""
+Benchmark waktu CPU render per halaman.
+
+Jalankan dari root repo:
+    python benchmarks/bench_render.py
+    python benchmarks/bench_render.py --app-dir /tmp/raa-lama --rounds 200 --repeat 5
+
+--app-dir menunjuk ke checkout lain (mis. `git worktree add /tmp/raa-lama <commit>`)
+sehingga angka sebelum/sesudah bisa dibandingkan dengan data dan skenario yang sama.
+Database memakai SQLite sementara, jadi data asli tidak tersentuh. Setiap halaman diukur
+--repeat kali dan yang dilaporkan adalah ulangan tercepat, supaya gangguan dari proses lain
+tidak ikut terhitung.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import time
+
+CUSTOMER_PAGES = ['/login', '/register', '/', '/products', '/profile', '/cart', '/orders']
+SELLER_PAGES = ['/', '/seller/dashboard', '/seller/products', '/seller/orders', '/seller/accounting']
+
+
+def load_app(app_dir, db_path):
+    os.environ['DATABASE_URI'] = 'sqlite:///' + db_path
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    spec = importlib.util.spec_from_file_location('bench_app', os.path.join(app_dir, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(module)
+        with module.app.app_context():
+            module.db.drop_all()
+            module.db.create_all()
+            module.create_initial_data()
+    return module.app
+
+
+def measure(client, path, rounds, repeat):
+    # Satu request pemanasan supaya kompilasi template / cache pertama tidak ikut terhitung
+    client.get(path).get_data()
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        for _ in range(rounds):
+            client.get(path).get_data()
+        elapsed = (time.process_time() - start) / rounds * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app-dir', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    app = load_app(os.path.abspath(args.app_dir), os.path.join(tmp, 'bench.db'))
+    results = []
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        anonymous = app.test_client()
+        for path in CUSTOMER_PAGES[:2]:
+            results.append(('anonymous', path, measure(anonymous, path, args.rounds, args.repeat)))
+
+        customer = app.test_client()
+        customer.post('/login', data={'email': 'customer@example.com', 'password': 'customer123'})
+        for path in CUSTOMER_PAGES[2:]:
+            results.append(('customer', path, measure(customer, path, args.rounds, args.repeat)))
+
+        seller = app.test_client()
+        seller.post('/login', data={'email': 'kang.mas1817@gmail.com', 'password': 'TugasSiaKangMas'})
+        for path in SELLER_PAGES:
+            results.append(('seller', path, measure(seller, path, args.rounds, args.repeat)))
+
+    print(f"{'user':<10} {'halaman':<22} {'ms CPU/request':>15}")
+    for role, path, ms in results:
+        print(f"{role:<10} {path:<22} {ms:>15.2f}")
+    print(f"{'':<10} {'total':<22} {sum(ms for _, _, ms in results):>15.2f}")
+
+
+if __name__ == '__main__':
+    main()